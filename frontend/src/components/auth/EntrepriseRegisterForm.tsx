@@ -1,10 +1,14 @@
-import { useState, type JSX } from "react";
+import { useEffect, useRef, useState, type JSX } from "react";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
 import { ArrowLeft, Building2, Loader2 } from "lucide-react";
 import { useAuthStore } from "@/store/auth";
 import type { RegisterEntrepriseData } from "@/types/auth";
+import { entrepriseService, type EntrepriseAPI } from "@/services/entrepriseService";
+
+// Délai sans frappe avant d'interroger l'annuaire (ms)
+const SEARCH_DEBOUNCE_MS = 300;
 
 interface EntrepriseRegisterFormProps {
     onBack: () => void;
@@ -31,6 +35,12 @@ export default function EntrepriseRegisterForm({
         site_web: "",
     });
     const [error, setError] = useState<string>("");
+    const [suggestions, setSuggestions] = useState<EntrepriseAPI[]>([]);
+    const searchTimer = useRef<ReturnType<typeof setTimeout> | undefined>(undefined);
+    // Numéro de la dernière recherche lancée : les réponses plus anciennes sont ignorées
+    const searchSeq = useRef(0);
+
+    useEffect(() => () => clearTimeout(searchTimer.current), []);
 
     /**
      * Gère les changements dans les champs du formulaire
@@ -42,6 +52,48 @@ export default function EntrepriseRegisterForm({
         if (error) setError("");
     };
 
+    /**
+     * Pré-remplit le formulaire avec un établissement de l'annuaire,
+     * sans écraser ce que l'utilisateur a déjà saisi
+     * @param entreprise - Établissement sélectionné
+     */
+    const applyEntreprise = (entreprise: EntrepriseAPI): void => {
+        setFormData((prev) => ({
+            ...prev,
+            nom_entreprise: prev.nom_entreprise || entreprise.nom,
+            siret: entreprise.siret,
+            localisation: prev.localisation || entreprise.commune,
+        }));
+    };
+
+    /**
+     * Autocomplétion du nom d'entreprise, lancée après SEARCH_DEBOUNCE_MS sans frappe
+     * @param value - Nom saisi ou suggestion choisie
+     */
+    const handleNomEntrepriseChange = (value: string): void => {
+        handleInputChange("nom_entreprise", value);
+        clearTimeout(searchTimer.current);
+        const seq = ++searchSeq.current;
+        const match = suggestions.find((entreprise) => entreprise.nom === value);
+        if (match) {
+            applyEntreprise(match);
+            return;
+        }
+        searchTimer.current = setTimeout(async () => {
+            const results = await entrepriseService.search(value);
+            if (seq === searchSeq.current) setSuggestions(results);
+        }, SEARCH_DEBOUNCE_MS);
+    };
+
+    /**
+     * Recherche l'établissement quand un SIRET complet est saisi
+     */
+    const handleSiretBlur = async (): Promise<void> => {
+        if (formData.siret.replace(/\D/g, "").length !== 14) return;
+        const entreprise = await entrepriseService.getBySiret(formData.siret);
+        if (entreprise) applyEntreprise(entreprise);
+    };
+
     /**
      * Gère l'upload du fichier logo
      * @param e - Événement de changement de fichier
@@ -116,10 +168,19 @@ export default function EntrepriseRegisterForm({
                             id="nomEntreprise"
                             type="text"
                             value={formData.nom_entreprise}
-                            onChange={(e) => handleInputChange("nom_entreprise", e.target.value)}
+                            onChange={(e) => handleNomEntrepriseChange(e.target.value)}
                             placeholder="Ex: TechCorp Solutions"
+                            list="entreprisesSuggestions"
+                            autoComplete="off"
                             required
                         />
+                        <datalist id="entreprisesSuggestions">
+                            {suggestions.map((entreprise) => (
+                                <option key={entreprise.siret} value={entreprise.nom}>
+                                    {entreprise.commune} ({entreprise.siret})
+                                </option>
+                            ))}
+                        </datalist>
                     </div>
 
                     <div className="grid md:grid-cols-2 gap-4">
@@ -130,6 +191,7 @@ export default function EntrepriseRegisterForm({
                                 type="text"
                                 value={formData.siret}
                                 onChange={(e) => handleInputChange("siret", e.target.value)}
+                                onBlur={handleSiretBlur}
                                 placeholder="123 456 789 00001"
                                 required
                             />
@@ -20,6 +20,8 @@ export interface CompanyJobAPI {
     date_expiration: string;
     active: boolean;
     nombre_candidatures: number;
+    vues?: number;
+    impressions?: number;
 }
 
 /**
@@ -32,6 +34,23 @@ export interface DashboardStats {
     pendingApplications: number;
     acceptedApplications: number;
     rejectedApplications: number;
+    applicationsByStatut?: Record<'en_attente' | 'acceptee' | 'refusee', number>;
+    jobs?: {
+        id: number;
+        titre: string;
+        active: boolean;
+        applications: number;
+        byStatut: Record<'en_attente' | 'acceptee' | 'refusee', number>;
+    }[];
+    recentActivity?: {
+        candidatureId: number;
+        jobId: number;
+        jobTitre: string;
+        candidat: string;
+        statut: 'en_attente' | 'acceptee' | 'refusee';
+        dateCandidature: string;
+        dateModification: string;
+    }[];
 }
 
 /**
@@ -179,65 +198,15 @@ class CompanyService {
     }
 
     /**
-     * Calcule les statistiques dashboard à partir des jobs et candidatures
+     * Récupère les statistiques dashboard agrégées côté serveur
      */
     async getDashboardStats(): Promise<DashboardStats> {
         try {
-            // Récupérer tous les jobs du recruteur
-            const jobs = await this.getMyJobs();
-            
-            // Calculer les stats de base
-            const totalJobs = jobs.length;
-            const activeJobs = jobs.filter(job => job.active).length;
-            const totalApplications = jobs.reduce((sum, job) => sum + job.nombre_candidatures, 0);
-            
-            // Pour les statistiques détaillées des candidatures, on utilise l'API candidatures globale
-            let pendingApplications = 0;
-            let acceptedApplications = 0;
-            let rejectedApplications = 0;
-            
-            try {
-                // Récupérer toutes les candidatures du recruteur via l'endpoint général
-                const response = await AxiosService.get<PaginatedCandidaturesResponse>('/candidatures/');
-                
-                let allCandidatures: CandidatureAPI[] = [];
-                
-                // Extraire les candidatures de la réponse (paginée ou directe)
-                if (response.data && Array.isArray(response.data.results)) {
-                    allCandidatures = response.data.results;
-                } else if (Array.isArray(response.data)) {
-                    // Fallback si l'API retourne directement un tableau
-                    allCandidatures = response.data;
-                } else {
-                    console.warn('Format de réponse candidatures inattendu:', response.data);
-                    allCandidatures = [];
-                }
-                
-                // Les candidatures sont déjà filtrées côté backend pour ce recruteur
-                pendingApplications = allCandidatures.filter(c => c.statut === 'en_attente').length;
-                acceptedApplications = allCandidatures.filter(c => c.statut === 'acceptee').length;
-                rejectedApplications = allCandidatures.filter(c => c.statut === 'refusee').length;
-                
-            } catch (error) {
-                console.warn('Erreur récupération statistiques candidatures:', error);
-                // En cas d'erreur, estimation basée sur les jobs
-                // On estime que 70% sont en attente, 20% acceptées, 10% refusées
-                pendingApplications = Math.floor(totalApplications * 0.7);
-                acceptedApplications = Math.floor(totalApplications * 0.2);
-                rejectedApplications = totalApplications - pendingApplications - acceptedApplications;
-            }
-            
-            return {
-                totalJobs,
-                activeJobs,
-                totalApplications,
-                pendingApplications,
-                acceptedApplications,
-                rejectedApplications,
-            };
+            const response = await AxiosService.get<DashboardStats>('/recruteurs/me/stats/');
+            return response.data;
         } catch (error: any) {
             console.error('Erreur getDashboardStats:', error);
-            throw new Error(error.message || 'Erreur lors du calcul des statistiques');
+            throw new Error(error.response?.data?.detail || 'Erreur lors de la récupération des statistiques');
         }
     }
 
@@ -297,7 +266,7 @@ class CompanyService {
             createdAt: new Date(apiJob.date_creation),
             isActive: apiJob.active,
             applicationsCount: apiJob.nombre_candidatures,
-            viewsCount: 0, // Non disponible dans l'API pour l'instant
+            viewsCount: apiJob.vues ?? 0,
         };
     }
 }
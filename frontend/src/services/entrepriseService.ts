@@ -0,0 +1,48 @@
+import AxiosService from "./axiosService";
+
+/**
+ * Établissement issu de l'annuaire SIRENE local
+ */
+export interface EntrepriseAPI {
+    siret: string;
+    nom: string;
+    commune: string;
+    code_postal: string;
+    activite: string;
+}
+
+class EntrepriseService {
+    /**
+     * Récupère l'établissement correspondant à un SIRET (pré-remplissage)
+     * @param siret SIRET saisi (espaces acceptés)
+     * @returns L'établissement, ou null s'il est introuvable ou si l'annuaire est indisponible
+     */
+    async getBySiret(siret: string): Promise<EntrepriseAPI | null> {
+        try {
+            const cleaned = siret.replace(/\D/g, "");
+            const response = await AxiosService.get<EntrepriseAPI>(`/entreprises/siret/${cleaned}/`);
+            return response.data;
+        } catch {
+            return null;
+        }
+    }
+
+    /**
+     * Recherche des établissements par début de nom (autocomplétion)
+     * @param query Texte saisi (au moins 2 caractères)
+     */
+    async search(query: string): Promise<EntrepriseAPI[]> {
+        if (query.trim().length < 2) return [];
+        try {
+            const response = await AxiosService.get<EntrepriseAPI[]>("/entreprises/recherche/", {
+                params: { q: query },
+            });
+            return response.data;
+        } catch {
+            return [];
+        }
+    }
+}
+
+export const entrepriseService = new EntrepriseService();
+export default entrepriseService;
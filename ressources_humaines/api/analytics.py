@@ -0,0 +1,257 @@
+"""
+Séries temporelles pour les dashboards : un seul regroupement SQL par appel
+"""
+from datetime import date, datetime, timedelta
+
+from django.db.models import Count, F, Q, Sum, Window
+from django.db.models.functions import Ceil, Coalesce, RowNumber, TruncDay, TruncWeek, TruncMonth
+from django.utils import timezone
+
+from .models import CustomUser, Job, Candidature, DailyStat, DailyJobViews, StatutTransition
+
+TRUNCS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+DEFAULT_RANGE_DAYS = 30
+MAX_BUCKETS = 1000
+DECISION_STATUTS = ('acceptee', 'refusee')
+PERCENTILES = (50, 90)
+
+# Chaque métrique : source brute (avec filtres possibles) et, si elle existe,
+# colonne(s) équivalentes de DailyStat utilisées en l'absence de filtre.
+METRICS = {
+    'candidatures': {
+        'queryset': lambda: Candidature.objects.all(),
+        'date': 'date_candidature',
+        'value': Count('id'),
+        'recruteur': 'job__recruteur',
+        'type_contrat': 'job__type_contrat',
+        'rollup': ['candidatures'],
+    },
+    'acceptations': {
+        'queryset': lambda: Candidature.objects.filter(statut='acceptee'),
+        'date': 'date_modification',
+        'value': Count('id'),
+        'recruteur': 'job__recruteur',
+        'type_contrat': 'job__type_contrat',
+        'rollup': ['acceptations'],
+    },
+    'refus': {
+        'queryset': lambda: Candidature.objects.filter(statut='refusee'),
+        'date': 'date_modification',
+        'value': Count('id'),
+        'recruteur': 'job__recruteur',
+        'type_contrat': 'job__type_contrat',
+        'rollup': ['refus'],
+    },
+    'jobs': {
+        'queryset': lambda: Job.objects.all(),
+        'date': 'date_creation',
+        'value': Count('id'),
+        'recruteur': 'recruteur',
+        'type_contrat': 'type_contrat',
+        'rollup': ['jobs_crees'],
+    },
+    'inscriptions': {
+        'queryset': lambda: CustomUser.objects.all(),
+        'date': 'date_joined',
+        'value': Count('id'),
+        'rollup': ['inscriptions_candidats', 'inscriptions_recruteurs', 'inscriptions_admins'],
+    },
+    'vues': {
+        'queryset': lambda: DailyJobViews.objects.all(),
+        'date': 'date',
+        'value': Sum('vues'),
+        'recruteur': 'job__recruteur',
+        'type_contrat': 'job__type_contrat',
+    },
+    'impressions': {
+        'queryset': lambda: DailyJobViews.objects.all(),
+        'date': 'date',
+        'value': Sum('impressions'),
+        'recruteur': 'job__recruteur',
+        'type_contrat': 'job__type_contrat',
+    },
+}
+
+
+def parse_date(value, default):
+    if not value:
+        return default
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Date invalide: {value} (format AAAA-MM-JJ attendu)")
+
+
+def bucket_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(day, granularity):
+    if granularity == 'week':
+        return day + timedelta(days=7)
+    if granularity == 'month':
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def bucket_count(start, end, granularity):
+    """
+    Nombre de buckets de `start` à `end` inclus, sans les énumérer
+    """
+    first, last = bucket_start(start, granularity), bucket_start(end, granularity)
+    if granularity == 'week':
+        return (last - first).days // 7 + 1
+    if granularity == 'month':
+        return (last.year - first.year) * 12 + last.month - first.month + 1
+    return (last - first).days + 1
+
+
+def bucket_starts(start, end, granularity):
+    day = bucket_start(start, granularity)
+    starts = []
+    while day <= end:
+        starts.append(day)
+        day = next_bucket(day, granularity)
+    return starts
+
+
+def _as_day(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).date()
+    return value
+
+
+def timeseries(metric, granularity='day', start=None, end=None, recruteur_id=None, type_contrat=None):
+    """
+    Renvoie les buckets [(début, valeur)] de `start` à `end` inclus, dans le
+    fuseau du projet, y compris les buckets vides.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Métrique inconnue: {metric} (choix: {', '.join(METRICS)})")
+    if granularity not in TRUNCS:
+        raise ValueError(f"Granularité inconnue: {granularity} (choix: {', '.join(TRUNCS)})")
+
+    end = end or timezone.localdate()
+    start = start or end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if start > end:
+        raise ValueError("La date de début doit précéder la date de fin.")
+    count = bucket_count(start, end, granularity)
+    if count > MAX_BUCKETS:
+        raise ValueError(f"Trop de buckets demandés ({count} > {MAX_BUCKETS}).")
+    starts = bucket_starts(start, end, granularity)
+
+    spec = METRICS[metric]
+    filters = {}
+    if recruteur_id is not None:
+        filters['recruteur'] = recruteur_id
+    if type_contrat:
+        filters['type_contrat'] = type_contrat
+    for name in filters:
+        if name not in spec:
+            raise ValueError(f"Le filtre {name} n'est pas disponible pour la métrique {metric}.")
+
+    tz = timezone.get_current_timezone()
+    trunc = TRUNCS[granularity]
+
+    if not filters and 'rollup' in spec:
+        # Sans filtre : lecture de la table journalière (O(jours))
+        queryset = DailyStat.objects.filter(date__gte=start, date__lte=end)
+        value = Sum(spec['rollup'][0])
+        for column in spec['rollup'][1:]:
+            value = value + Sum(column)
+        bucket = trunc('date')
+    else:
+        queryset = spec['queryset']()
+        date_field = spec['date']
+        value = spec['value']
+        if date_field == 'date':
+            queryset = queryset.filter(date__gte=start, date__lte=end)
+            bucket = trunc('date')
+        else:
+            queryset = queryset.filter(**{
+                f'{date_field}__gte': timezone.make_aware(datetime.combine(start, datetime.min.time())),
+                f'{date_field}__lt': timezone.make_aware(datetime.combine(end + timedelta(days=1), datetime.min.time())),
+            })
+            bucket = trunc(date_field, tzinfo=tz)
+        queryset = queryset.filter(**{spec[name]: v for name, v in filters.items()})
+
+    rows = (
+        queryset
+        .annotate(bucket=bucket)
+        .values('bucket')
+        .annotate(value=value)
+        .order_by()
+    )
+    values = {_as_day(row['bucket']): row['value'] or 0 for row in rows}
+    return [(day, values.get(day, 0)) for day in starts]
+
+
+def _ratio(part, total):
+    return round(part / total, 4) if total else 0
+
+
+def decision_delay_percentiles(transitions, percentiles=PERCENTILES):
+    """
+    Percentiles (rang le plus proche) du délai dépôt → décision, en heures.
+    Le classement est fait en SQL (ROW_NUMBER() OVER) : seules les lignes
+    aux rangs demandés sont renvoyées, quel que soit le volume.
+    """
+    decisions = transitions.filter(ancien_statut='en_attente', nouveau_statut__in=DECISION_STATUTS)
+    ranked = decisions.annotate(
+        rang=Window(RowNumber(), order_by=F('delai').asc()),
+        total=Window(Count('id')),
+    )
+    targets = Q()
+    for p in percentiles:
+        targets |= Q(rang=Ceil(F('total') * p / 100.0))
+    rows = list(ranked.filter(targets).order_by().values_list('rang', 'total', 'delai'))
+
+    result = {'count': rows[0][1] if rows else 0}
+    by_rank = {rang: delai for rang, _, delai in rows}
+    for p in percentiles:
+        delai = None
+        if rows:
+            delai = by_rank.get(max(1, -(-rows[0][1] * p // 100)))
+        result[f'p{p}Hours'] = round(delai / 3600, 1) if delai is not None else None
+    return result
+
+
+def hiring_funnel(jobs):
+    """
+    Entonnoir de recrutement pour un ensemble d'offres : vues → candidatures
+    → acceptées / refusées, plus les percentiles du délai de décision.
+    """
+    audience = jobs.aggregate(
+        vues=Coalesce(Sum('vues'), 0),
+        impressions=Coalesce(Sum('impressions'), 0),
+    )
+    candidatures = Candidature.objects.filter(job__in=jobs).aggregate(
+        total=Count('id'),
+        en_attente=Count('id', filter=Q(statut='en_attente')),
+        acceptees=Count('id', filter=Q(statut='acceptee')),
+        refusees=Count('id', filter=Q(statut='refusee')),
+    )
+    delays = decision_delay_percentiles(StatutTransition.objects.filter(candidature__job__in=jobs))
+    decided = candidatures['acceptees'] + candidatures['refusees']
+    return {
+        'impressions': audience['impressions'],
+        'views': audience['vues'],
+        'applications': candidatures['total'],
+        'pending': candidatures['en_attente'],
+        'accepted': candidatures['acceptees'],
+        'refused': candidatures['refusees'],
+        'conversion': {
+            'viewToApplication': _ratio(candidatures['total'], audience['vues']),
+            'applicationToDecision': _ratio(decided, candidatures['total']),
+            'acceptanceRate': _ratio(candidatures['acceptees'], decided),
+        },
+        'timeToDecision': delays,
+    }
@@ -0,0 +1,265 @@
+"""
+Authentification par token avec cache mémoire (LRU borné + TTL)
+
+Le cache est local au processus : la déconnexion et les modifications du
+compte l'invalident immédiatement dans le processus courant (signaux). Avec
+un cache partagé (CACHE_SHARED), une marque de révocation par utilisateur y
+est aussi posée et vérifiée à chaque lecture : les autres workers rechargent
+l'utilisateur dès la requête suivante. Sans cache partagé, ils voient le
+changement au plus tard après TOKEN_CACHE_TTL.
+"""
+import copy
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from . import metrics
+from .models import CustomUser, Candidat, Recruteur
+
+TOKEN_CACHE_SIZE = getattr(settings, 'TOKEN_CACHE_SIZE', 10000)
+TOKEN_CACHE_TTL = getattr(settings, 'TOKEN_CACHE_TTL', 30)  # secondes
+REVOCATION_KEY = 'token_revoked:{}'
+CLOCK_SKEW = 1  # secondes tolérées entre les horloges des serveurs
+STREAM_TICKET_SALT = 'api.events.stream'
+STREAM_TICKET_MAX_AGE = getattr(settings, 'STREAM_TICKET_MAX_AGE', 60)  # secondes
+
+# Sous-classe multi-table correspondant à chaque rôle (accesseur user.<role>)
+PROFILE_MODELS = {'candidat': Candidat, 'recruteur': Recruteur}
+PROFILE_ROLES = tuple(PROFILE_MODELS)
+
+
+class TokenCache:
+    """
+    Cache token -> (utilisateur, token), borné à `maxsize` entrées (éviction
+    LRU) avec expiration après `ttl` secondes. `shared` : marques de
+    révocation dans le cache Django, communes aux workers.
+    """
+
+    def __init__(self, maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL, shared=False):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                metrics.cache_result('token', 'miss')
+                return None
+            expires, loaded, user, token = entry
+            self._entries.move_to_end(key)
+        if self.shared and self._revoked_since(user.pk, loaded):
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    self._remove(key)
+            metrics.cache_result('token', 'miss')
+            return None
+        metrics.cache_result('token', 'hit')
+        # Copie : une vue qui modifie request.user ne touche pas l'instance partagée
+        return copy.copy(user), token
+
+    def set(self, key, user, token, loaded):
+        """
+        `loaded` : time.time() relevé avant la lecture en base
+        """
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, loaded, copy.copy(user), token)
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+        if self.shared:
+            # Inutile au-delà du TTL : les entrées plus anciennes ont expiré
+            cache.set(REVOCATION_KEY.format(user_id), time.time(), self.ttl + CLOCK_SKEW)
+
+    def _revoked_since(self, user_id, loaded):
+        revoked = cache.get(REVOCATION_KEY.format(user_id))
+        return revoked is not None and revoked >= loaded - CLOCK_SKEW
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_id = entry[2].pk
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_id]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache(shared=getattr(settings, 'CACHE_SHARED', False))
+
+
+def resolve_profile(user):
+    """
+    Renvoie l'instance Candidat/Recruteur déjà chargée par select_related,
+    ou l'utilisateur lui-même (admin, profil absent).
+    """
+    if user.role in PROFILE_ROLES:
+        try:
+            return getattr(user, user.role)
+        except ObjectDoesNotExist:
+            pass
+    return user
+
+
+def get_profile(request):
+    """
+    Profil de l'utilisateur connecté (Candidat, Recruteur, ou l'utilisateur
+    lui-même pour un admin), mémorisé sur la requête. Aucune requête si
+    l'authentification l'a déjà chargé, sinon une seule (jointure MTI).
+    Renvoie None si la ligne de profil n'existe pas.
+    """
+    if not hasattr(request, '_profile'):
+        request._profile = _load_profile(request.user)
+    return request._profile
+
+
+def get_profile_for_update(request):
+    """
+    Profil relu en base, pour PUT/PATCH/DELETE : l'instance du cache des
+    tokens peut dater de TOKEN_CACHE_TTL secondes ou venir d'un autre worker.
+    Renvoie None si la ligne de profil n'existe pas.
+    """
+    user = request.user
+    if not user or not user.is_authenticated:
+        return None
+    return PROFILE_MODELS.get(user.role, CustomUser).objects.filter(pk=user.pk).first()
+
+
+def _load_profile(user):
+    if not user or not user.is_authenticated:
+        return None
+    model = PROFILE_MODELS.get(user.role)
+    if model is None or isinstance(user, model):
+        return user
+    return model.objects.filter(pk=user.pk).first()
+
+
+async def aload_profile(user):
+    """
+    Équivalent asynchrone de _load_profile (profil absent : None)
+    """
+    model = PROFILE_MODELS.get(user.role)
+    if model is None or isinstance(user, model):
+        return user
+    return await model.objects.filter(pk=user.pk).afirst()
+
+
+def _token_queryset():
+    return Token.objects.select_related(*['user'] + [f'user__{role}' for role in PROFILE_ROLES])
+
+
+def _authenticated(key, token, loaded):
+    if not token.user.is_active:
+        raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+    user = resolve_profile(token.user)
+    token_cache.set(key, user, token, loaded)
+    return user, token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication avec une seule requête (token + utilisateur + profil)
+    en cas d'absence du cache, aucune en cas de présence. request.user est
+    directement l'instance Candidat/Recruteur.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+
+        loaded = time.time()
+        try:
+            token = _token_queryset().get(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        return _authenticated(key, token, loaded)
+
+
+async def aauthenticate(request):
+    """
+    Équivalent pour les vues asynchrones (ORM asynchrone, même cache).
+    Renvoie l'utilisateur, None sans en-tête "Token", ou lève
+    AuthenticationFailed.
+    """
+    auth = request.headers.get('Authorization', '').split()
+    if not auth or auth[0].lower() != CachedTokenAuthentication.keyword.lower():
+        return None
+    if len(auth) != 2:
+        raise exceptions.AuthenticationFailed(_('Invalid token header. No credentials provided.'))
+
+    return await _aauthenticate_key(auth[1])
+
+
+async def _aauthenticate_key(key):
+    cached = token_cache.get(key)
+    if cached is not None:
+        return cached[0]
+    loaded = time.time()
+    try:
+        token = await _token_queryset().aget(key=key)
+    except Token.DoesNotExist:
+        raise exceptions.AuthenticationFailed(_('Invalid token.'))
+    return _authenticated(key, token, loaded)[0]
+
+
+def _token_digest(key):
+    # Le ticket est lisible (signé, non chiffré) : empreinte du token seulement
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def stream_ticket(token):
+    """
+    Ticket signé de courte durée pour EventSource (paramètre ?ticket=), qui
+    ne permet pas d'en-têtes : le token d'API n'apparaît pas dans les URL.
+    Lié au token : invalide après déconnexion.
+    """
+    return signing.dumps({'user': token.user_id, 'token': _token_digest(token.key)}, salt=STREAM_TICKET_SALT)
+
+
+async def aauthenticate_ticket(ticket):
+    """
+    Utilisateur d'un ticket de stream_ticket() (même cache que les tokens),
+    ou AuthenticationFailed
+    """
+    try:
+        data = signing.loads(ticket, salt=STREAM_TICKET_SALT, max_age=STREAM_TICKET_MAX_AGE)
+    except signing.BadSignature:
+        raise exceptions.AuthenticationFailed('Ticket invalide ou expiré.')
+    key = await Token.objects.filter(user_id=data['user']).values_list('key', flat=True).afirst()
+    if key is None or not hmac.compare_digest(_token_digest(key), data['token']):
+        raise exceptions.AuthenticationFailed('Ticket invalide ou expiré.')
+    return await _aauthenticate_key(key)
@@ -0,0 +1,274 @@
+"""
+Outils de benchmark : génération rapide de gros volumes et mesures de temps
+"""
+import logging
+import random
+import sqlite3
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import connection, transaction, OperationalError
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .models import CustomUser, Candidat, Recruteur, Job, Candidature, CVAnalysis
+from . import rollup
+from .executors import analysis_queue
+from .throttling import SharedThrottleStore
+
+BENCH_EMAIL_DOMAIN = 'bench.local'
+BENCH_CV = 'candidatures/cv/bench.pdf'
+CONTRATS = ['CDI', 'CDD', 'Stage', 'Freelance', 'Alternance']
+STATUTS = ['en_attente'] * 7 + ['refusee'] * 2 + ['acceptee']
+VILLES = ['Paris', 'Lyon', 'Marseille', 'Toulouse', 'Nantes', 'Lille', 'Bordeaux', 'Rennes']
+
+
+@contextmanager
+def auto_now_disabled(*fields):
+    """
+    Désactive auto_now/auto_now_add le temps du seed pour étaler les dates
+    """
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field, _, _ in saved:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _random_date(now, months):
+    return now - timedelta(seconds=random.randint(0, months * 30 * 24 * 3600))
+
+
+def _batches(total, batch_size):
+    for start in range(0, total, batch_size):
+        yield start, min(batch_size, total - start)
+
+
+def has_bench_data():
+    return CustomUser.objects.filter(email__endswith='@' + BENCH_EMAIL_DOMAIN).exists()
+
+
+def _insert_users(count, role, offset, now, months, batch_size):
+    """
+    bulk_create ne gère pas l'héritage multi-table : les lignes CustomUser
+    sont créées en masse, puis les lignes enfants via executemany.
+    """
+    ids = []
+    for start, size in _batches(count, batch_size):
+        users = [
+            CustomUser(
+                email=f'{role}-{offset + start + i}@{BENCH_EMAIL_DOMAIN}',
+                password='!',
+                role=role,
+                first_name=f'Prénom{start + i}',
+                last_name=f'Nom{start + i}',
+                date_joined=_random_date(now, months),
+            )
+            for i in range(size)
+        ]
+        created = CustomUser.objects.bulk_create(users, batch_size=batch_size)
+        batch_ids = [user.pk for user in created]
+        with connection.cursor() as cursor:
+            if role == 'candidat':
+                cursor.executemany(
+                    f'INSERT INTO {Candidat._meta.db_table} ({Candidat._meta.pk.column}) VALUES (%s)',
+                    [(pk,) for pk in batch_ids]
+                )
+            else:
+                cursor.executemany(
+                    f'INSERT INTO {Recruteur._meta.db_table} '
+                    f'({Recruteur._meta.pk.column}, nom_entreprise, siret, nom_gerant, '
+                    f'email_professionnel, localisation, logo) VALUES (%s, %s, %s, %s, %s, %s, %s)',
+                    [
+                        (pk, f'Entreprise {pk}', f'{pk:014d}', f'Gérant {pk}',
+                         f'pro-{pk}@{BENCH_EMAIL_DOMAIN}', random.choice(VILLES), '')
+                        for pk in batch_ids
+                    ]
+                )
+        ids.extend(batch_ids)
+    return ids
+
+
+def seed_dataset(users, jobs, candidatures, analyses=0, recruteur_ratio=0.05,
+                 months=18, batch_size=5000, log=print):
+    """
+    Génère un jeu de données de benchmark (emails @bench.local).
+    Les signaux ne sont pas déclenchés : aucune analyse IA n'est lancée et
+    la table DailyStat est reconstruite à la fin.
+    """
+    random.seed(42)
+    now = timezone.now()
+    offset = CustomUser.objects.count()
+    nb_recruteurs = max(1, int(users * recruteur_ratio))
+    nb_candidats = max(1, users - nb_recruteurs)
+
+    started = time.perf_counter()
+    recruteur_ids = _insert_users(nb_recruteurs, 'recruteur', offset, now, months, batch_size)
+    candidat_ids = _insert_users(nb_candidats, 'candidat', offset, now, months, batch_size)
+    log(f'{len(recruteur_ids)} recruteurs, {len(candidat_ids)} candidats ({time.perf_counter() - started:.1f}s)')
+
+    job_ids = []
+    date_creation = Job._meta.get_field('date_creation')
+    with auto_now_disabled(date_creation):
+        for start, size in _batches(jobs, batch_size):
+            created = Job.objects.bulk_create([
+                Job(
+                    recruteur_id=random.choice(recruteur_ids),
+                    titre=f'Offre {start + i}',
+                    description='Offre générée pour le benchmark',
+                    exigences='Python, Django',
+                    type_contrat=random.choice(CONTRATS),
+                    localisation=random.choice(VILLES),
+                    date_creation=_random_date(now, months),
+                    date_expiration=now + timedelta(days=random.randint(1, 180)),
+                    active=random.random() < 0.8,
+                )
+                for i in range(size)
+            ], batch_size=batch_size)
+            job_ids.extend(job.pk for job in created)
+    log(f'{len(job_ids)} jobs ({time.perf_counter() - started:.1f}s)')
+
+    # Couple (candidat, job) unique : chaque candidat avance d'un pas premier dans les jobs
+    step = 7919 + len(candidat_ids)
+    date_fields = [Candidature._meta.get_field(name) for name in ('date_candidature', 'date_modification')]
+    with auto_now_disabled(*date_fields):
+        for start, size in _batches(candidatures, batch_size):
+            batch = []
+            for k in range(start, start + size):
+                t, c = divmod(k, len(candidat_ids))
+                date = _random_date(now, months)
+                batch.append(Candidature(
+                    candidat_id=candidat_ids[c],
+                    job_id=job_ids[(c + t * step) % len(job_ids)],
+                    cv=BENCH_CV,
+                    statut=random.choice(STATUTS),
+                    date_candidature=date,
+                    date_modification=date,
+                ))
+            Candidature.objects.bulk_create(batch, batch_size=batch_size, ignore_conflicts=True)
+            if (start // batch_size) % 100 == 0:
+                log(f'  candidatures: {start + size}/{candidatures}')
+    log(f'{candidatures} candidatures ({time.perf_counter() - started:.1f}s)')
+
+    if analyses:
+        candidature_ids = (
+            Candidature.objects.filter(cv=BENCH_CV)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:analyses]
+            .iterator(chunk_size=batch_size)
+        )
+        batch = []
+        for pk in candidature_ids:
+            batch.append(CVAnalysis(
+                candidature_id=pk,
+                overall_score=random.random(),
+                skill_score=random.random(),
+                experience_score=random.random(),
+                education_score=random.random(),
+            ))
+            if len(batch) >= batch_size:
+                CVAnalysis.objects.bulk_create(batch, batch_size=batch_size, ignore_conflicts=True)
+                batch = []
+        if batch:
+            CVAnalysis.objects.bulk_create(batch, batch_size=batch_size, ignore_conflicts=True)
+        log(f'{analyses} analyses ({time.perf_counter() - started:.1f}s)')
+
+    # bulk_create ne déclenche pas les signaux : agrégats recalculés en une passe
+    days = rollup.reconcile(rollup.first_day(), rollup.local_day())
+    rollup.sync_job_counters()
+    log(f'{days} jours de statistiques recalculés ({time.perf_counter() - started:.1f}s)')
+
+
+def throttle_worker(path, keys, hits, limit, duration):
+    """
+    Processus de charge : `hits` appels au store partagé, répartis sur `keys`
+    clés. Renvoie (requêtes autorisées, erreurs, latences en µs).
+    """
+    store = SharedThrottleStore(path)
+    allowed = errors = 0
+    timings = []
+    for i in range(hits):
+        started = time.perf_counter()
+        try:
+            ok, _ = store.hit(f'bench:{i % keys}', limit, duration)
+        except sqlite3.Error:
+            # Comportement du throttle en production : la requête passe
+            ok = False
+            errors += 1
+        timings.append((time.perf_counter() - started) * 1e6)
+        allowed += ok
+    return allowed, errors, timings
+
+
+class _LockedLogCounter(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 'locked' in record.getMessage()
+
+
+def db_write_worker(candidat_ids, job_ids, atomic):
+    """
+    Processus de charge : une candidature par candidat, via le chemin complet
+    de l'application (signaux compris). Renvoie (créées, erreurs de verrou,
+    latences en ms).
+    """
+    # Verrous absorbés par les signaux (analyse IA...) : seulement journalisés
+    absorbed = _LockedLogCounter()
+    for logger in (logging.getLogger(), logging.getLogger('api')):
+        logger.handlers = [absorbed]
+    created = locked = 0
+    timings = []
+    for i, candidat_id in enumerate(candidat_ids):
+        started = time.perf_counter()
+        try:
+            if atomic:
+                with transaction.atomic():
+                    Candidature.objects.create(candidat_id=candidat_id, job_id=job_ids[i % len(job_ids)], cv=BENCH_CV)
+            else:
+                Candidature.objects.create(candidat_id=candidat_id, job_id=job_ids[i % len(job_ids)], cv=BENCH_CV)
+        except OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            locked += 1
+            continue
+        finally:
+            timings.append((time.perf_counter() - started) * 1000)
+        created += 1
+    # Analyses IA en arrière-plan terminées avant le nettoyage des données
+    analysis_queue.wait_idle()
+    connection.close()
+    return created, locked + absorbed.count, timings
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, -(-len(values) * p // 100) - 1))]
+
+
+def measure(fn, runs=5):
+    """
+    Exécute `fn` plusieurs fois et renvoie les temps (ms) et le nombre de requêtes SQL
+    """
+    timings = []
+    queries = 0
+    for _ in range(runs):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = len(ctx.captured_queries)
+    return {
+        'runs': runs,
+        'queries': queries,
+        'min_ms': round(min(timings), 2),
+        'median_ms': round(statistics.median(timings), 2),
+        'max_ms': round(max(timings), 2),
+    }
@@ -0,0 +1,99 @@
+"""
+Cache stale-while-revalidate pour les vues d'agrégats coûteuses
+"""
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.db import connections
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Recalculs en arrière-plan : peu de threads, les vues concernées sont lourdes
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='swr-refresh')
+
+LOCK_POLL_INTERVAL = 0.1
+
+
+def _store(key, response, hard_ttl):
+    if response.status_code == status.HTTP_200_OK:
+        cache.set(key, {'data': response.data, 'computed_at': time.time()}, hard_ttl)
+
+
+def _refresh(view, request, args, kwargs, key, lock_key, hard_ttl):
+    try:
+        _store(key, view(request, *args, **kwargs), hard_ttl)
+    except Exception as e:
+        logger.error("Échec du recalcul en arrière-plan de %s: %s", key, e)
+    finally:
+        cache.delete(lock_key)
+        connections.close_all()
+
+
+def _cached_response(entry, cache_status):
+    age = int(time.time() - entry['computed_at'])
+    response = Response(entry['data'], status=status.HTTP_200_OK)
+    response['Age'] = str(age)
+    response['X-Cache'] = cache_status
+    metrics.cache_result('swr', cache_status.lower())
+    return response
+
+
+def stale_while_revalidate(key, soft_ttl=60, hard_ttl=900, lock_ttl=30):
+    """
+    Décorateur de vue (sous @api_view, donc après les permissions).
+
+    - entrée fraîche (< soft_ttl) : servie telle quelle ;
+    - entrée périmée : servie immédiatement, recalcul lancé en arrière-plan ;
+    - absente : une seule requête recalcule (verrou cache.add), les autres
+      attendent son résultat jusqu'à lock_ttl secondes.
+
+    `key` est une chaîne ou une fonction de la requête (clé par utilisateur...).
+    L'âge du contenu est exposé dans l'en-tête Age.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            cache_key = f'swr:{key(request) if callable(key) else key}'
+            lock_key = f'{cache_key}:lock'
+
+            entry = cache.get(cache_key)
+            if entry is not None:
+                if time.time() - entry['computed_at'] < soft_ttl:
+                    return _cached_response(entry, 'HIT')
+                if cache.add(lock_key, 1, lock_ttl):
+                    _refresh_executor.submit(
+                        _refresh, view, request, args, kwargs, cache_key, lock_key, hard_ttl
+                    )
+                return _cached_response(entry, 'STALE')
+
+            owns_lock = cache.add(lock_key, 1, lock_ttl)
+            if not owns_lock:
+                # Calcul déjà en cours ailleurs : on attend son résultat
+                deadline = time.monotonic() + lock_ttl
+                while time.monotonic() < deadline:
+                    time.sleep(LOCK_POLL_INTERVAL)
+                    entry = cache.get(cache_key)
+                    if entry is not None:
+                        return _cached_response(entry, 'HIT')
+                    if cache.get(lock_key) is None:
+                        break
+
+            try:
+                response = view(request, *args, **kwargs)
+                _store(cache_key, response, hard_ttl)
+            finally:
+                if owns_lock:
+                    cache.delete(lock_key)
+            response['Age'] = '0'
+            response['X-Cache'] = 'MISS'
+            metrics.cache_result('swr', 'miss')
+            return response
+        return wrapper
+    return decorator
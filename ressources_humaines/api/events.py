@@ -0,0 +1,101 @@
+"""
+Canal d'événements temps réel par recruteur (Server-Sent Events)
+
+Les événements sont journalisés en base : chaque worker ASGI lit le même
+journal, et un client qui se reconnecte reprend après son Last-Event-ID.
+"""
+import asyncio
+import json
+import logging
+from collections import deque
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import RecruteurEvent
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 1.0  # secondes entre deux lectures du journal
+HEARTBEAT_INTERVAL = 15.0
+STREAM_MAX_DURATION = 300.0  # le client se reconnecte ensuite avec Last-Event-ID
+BATCH_SIZE = 100
+RETRY_MS = 3000
+# Durée maximale supposée d'une transaction qui publie : un identifiant attribué
+# avant un autre peut être validé après lui (PostgreSQL)
+LATE_COMMIT_WINDOW = 5.0
+
+
+def publish(recruteur_id, event_type, payload):
+    if recruteur_id is None:
+        return None
+    return RecruteurEvent.objects.create(
+        recruteur_id=recruteur_id,
+        type=event_type,
+        payload=payload,
+    )
+
+
+def format_sse(event):
+    data = json.dumps(event.payload, cls=DjangoJSONEncoder)
+    return f"id: {event.id}\nevent: {event.type}\ndata: {data}\n\n"
+
+
+def parse_last_event_id(request):
+    raw = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        return int(raw) if raw else None
+    except ValueError:
+        return None
+
+
+async def stream_events(recruteur_id, last_event_id=None):
+    """
+    Générateur asynchrone SSE : lit le journal par lots indexés (recruteur, id).
+    Sans curseur, seuls les nouveaux événements sont transmis. Les identifiants
+    derrière le curseur sont relus pendant LATE_COMMIT_WINDOW secondes, les
+    événements déjà transmis étant écartés.
+    """
+    if last_event_id is None:
+        latest = await (
+            RecruteurEvent.objects
+            .filter(recruteur_id=recruteur_id)
+            .order_by('-id')
+            .values_list('id', flat=True)
+            .afirst()
+        )
+        last_event_id = latest or 0
+
+    yield f"retry: {RETRY_MS}\n\n"
+
+    loop = asyncio.get_running_loop()
+    started = last_sent = loop.time()
+    sent = set()
+    checkpoints = deque()  # (instant, curseur avant le lot)
+    while loop.time() - started < STREAM_MAX_DURATION:
+        now = loop.time()
+        while checkpoints and now - checkpoints[0][0] > LATE_COMMIT_WINDOW:
+            checkpoints.popleft()
+        floor = checkpoints[0][1] if checkpoints else last_event_id
+        sent = {event_id for event_id in sent if event_id > floor}
+        events = [
+            event async for event in
+            RecruteurEvent.objects
+            .filter(recruteur_id=recruteur_id, id__gt=floor)
+            .exclude(id__in=sent)
+            .order_by('id')[:BATCH_SIZE]
+        ]
+        if events:
+            checkpoints.append((now, last_event_id))
+        for event in events:
+            sent.add(event.id)
+            last_event_id = max(last_event_id, event.id)
+            yield format_sse(event)
+        if events:
+            last_sent = loop.time()
+            if len(events) == BATCH_SIZE:
+                continue
+        elif loop.time() - last_sent >= HEARTBEAT_INTERVAL:
+            last_sent = loop.time()
+            yield f": ping {timezone.now().isoformat()}\n\n"
+        await asyncio.sleep(POLL_INTERVAL)
@@ -0,0 +1,82 @@
+"""
+Pools de threads bornés pour le travail bloquant
+
+- blocking_pool : appels synchrones depuis les vues asynchrones (sérialisation,
+  throttling...). La taille du pool borne le nombre de threads occupés,
+  quel que soit le nombre de connexions ouvertes.
+- analysis_queue : analyses IA (appel HTTP lent), lancées après la validation
+  de la candidature, hors du thread de la requête.
+"""
+import contextvars
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+logger = logging.getLogger(__name__)
+
+ASYNC_BLOCKING_WORKERS = getattr(settings, 'ASYNC_BLOCKING_WORKERS', 8)
+AI_ANALYSIS_WORKERS = getattr(settings, 'AI_ANALYSIS_WORKERS', 2)
+
+blocking_pool = ThreadPoolExecutor(max_workers=ASYNC_BLOCKING_WORKERS, thread_name_prefix='blocking')
+
+
+def _call_blocking(func, args, kwargs):
+    try:
+        return func(*args, **kwargs)
+    finally:
+        # Connexions des threads du pool : même politique que les requêtes
+        close_old_connections()
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Exécute `func` dans blocking_pool ; attend un thread libre si le pool est plein
+    """
+    return await sync_to_async(_call_blocking, thread_sensitive=False, executor=blocking_pool)(func, args, kwargs)
+
+
+class AnalysisQueue:
+    """
+    File d'analyses IA traitée par `workers` threads, avec sa profondeur
+    (analyses en attente ou en cours)
+    """
+
+    def __init__(self, workers):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ai-analysis')
+        self._pending = 0
+        self._idle = threading.Condition()
+
+    def submit(self, func, *args):
+        with self._idle:
+            self._pending += 1
+        # Contexte de l'appelant (identifiant de requête des logs)
+        context = contextvars.copy_context()
+        return self._executor.submit(context.run, self._run, func, args)
+
+    def _run(self, func, args):
+        try:
+            func(*args)
+        except Exception as e:
+            logger.error("Échec de l'analyse IA en arrière-plan: %s", e)
+        finally:
+            connection.close()
+            with self._idle:
+                self._pending -= 1
+                self._idle.notify_all()
+
+    def depth(self):
+        return self._pending
+
+    def wait_idle(self, timeout=None):
+        """
+        Attend que la file soit vide ; renvoie False si le délai expire avant
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+
+analysis_queue = AnalysisQueue(AI_ANALYSIS_WORKERS)
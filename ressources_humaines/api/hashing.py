@@ -0,0 +1,38 @@
+"""
+Hachage de mots de passe dans des processus séparés
+
+Module sans import de modèles : il doit rester importable dans un processus
+fils avant l'initialisation de Django (méthode de démarrage spawn).
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def init_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def _hash(password):
+    from django.contrib.auth.hashers import make_password
+    # None -> mot de passe inutilisable (réinitialisation requise)
+    return make_password(password)
+
+
+def password_pool(workers=None):
+    """
+    Pool de processus prêts à hacher (PBKDF2 est lié au CPU : les threads
+    seraient sérialisés par le GIL).
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'ressources_humaines.settings'),),
+    )
+
+
+def hash_passwords(pool, passwords, workers):
+    passwords = list(passwords)
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(pool.map(_hash, passwords, chunksize=chunksize))
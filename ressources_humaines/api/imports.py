@@ -0,0 +1,237 @@
+"""
+Import en masse de comptes candidats et recruteurs (CSV ou NDJSON)
+
+Les mots de passe sont hachés dans un pool de processus, les comptes insérés
+par lots (bulk_create pour CustomUser, executemany pour les lignes enfants de
+l'héritage multi-table). Les doublons sont détectés sur des ensembles chargés
+une fois au démarrage, sans requête par ligne.
+"""
+import csv
+import json
+import os
+import time
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction, DatabaseError
+
+from .hashing import password_pool, hash_passwords
+from .models import CustomUser, Candidat, Recruteur
+from .sirene import clean_siret, siret_valide
+from . import rollup
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+ROLE_MODELS = {'candidat': Candidat, 'recruteur': Recruteur}
+ROLE_FIELDS = {
+    'candidat': [
+        'email', 'first_name', 'last_name',
+        'date_naissance', 'poste_actuel', 'entreprise_actuelle', 'linkedin',
+    ],
+    'recruteur': [
+        'email', 'first_name', 'last_name',
+        'nom_entreprise', 'siret', 'nom_gerant', 'email_professionnel', 'localisation', 'site_web',
+    ],
+}
+MAX_REPORTED_ERRORS = 20
+
+
+def detect_format(path):
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    return 'ndjson' if extension in ('ndjson', 'jsonl') else 'csv'
+
+
+class InvalidRow:
+    """
+    Ligne illisible (NDJSON malformé) : comptée parmi les lignes invalides
+    """
+
+    def __init__(self, message):
+        self.message = message
+
+
+def read_rows(path, output):
+    """
+    Itère sur (numéro de ligne, dict ou InvalidRow) sans charger le fichier en mémoire
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        if output == 'csv':
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_num, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_num, InvalidRow(f'JSON invalide ({e.msg}, colonne {e.colno})')
+                    continue
+                if not isinstance(row, dict):
+                    yield line_num, InvalidRow('Objet JSON attendu.')
+                    continue
+                yield line_num, row
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ExistingAccounts:
+    """
+    Identifiants déjà pris (base + lignes déjà importées), en minuscules
+    """
+
+    def __init__(self):
+        self.emails = {e.lower() for e in CustomUser.objects.values_list('email', flat=True).iterator()}
+        self.sirets = set(Recruteur.objects.values_list('siret', flat=True).iterator())
+        self.emails_pro = {
+            e.lower() for e in Recruteur.objects.values_list('email_professionnel', flat=True).iterator()
+        }
+
+    def is_duplicate(self, obj):
+        if obj.email.lower() in self.emails:
+            return True
+        if isinstance(obj, Recruteur):
+            return obj.siret in self.sirets or obj.email_professionnel.lower() in self.emails_pro
+        return False
+
+    def add(self, obj):
+        self.emails.add(obj.email.lower())
+        if isinstance(obj, Recruteur):
+            self.sirets.add(obj.siret)
+            self.emails_pro.add(obj.email_professionnel.lower())
+
+
+def build_account(row, default_role=None):
+    """
+    Construit l'instance Candidat/Recruteur (non sauvegardée) et renvoie
+    (instance, mot de passe en clair ou None). Lève ValidationError.
+    """
+    role = (row.get('role') or default_role or '').strip()
+    if role not in ROLE_MODELS:
+        raise ValidationError(f"Rôle invalide: {role or '(vide)'} (candidat ou recruteur)")
+    model = ROLE_MODELS[role]
+
+    values = {}
+    errors = {}
+    for name in ROLE_FIELDS[role]:
+        field = model._meta.get_field(name)
+        raw = row.get(name)
+        raw = str(raw).strip() if raw is not None else ''
+        if name == 'email':
+            raw = CustomUser.objects.normalize_email(raw)
+        elif name == 'siret':
+            raw = clean_siret(raw)
+            if not siret_valide(raw):
+                errors[name] = 'SIRET invalide (14 chiffres et clé de contrôle attendus).'
+                continue
+        if not raw and field.null:
+            values[name] = None
+            continue
+        try:
+            values[name] = field.clean(raw, None)
+        except ValidationError as e:
+            errors[name] = ' '.join(e.messages)
+    if errors:
+        raise ValidationError('; '.join(f'{name}: {message}' for name, message in errors.items()))
+
+    password = row.get('password') or None
+    return model(role=role, **values), password
+
+
+def bulk_insert_accounts(model, instances, batch_size):
+    """
+    bulk_create ne gère pas l'héritage multi-table : lignes CustomUser en
+    masse, puis lignes enfants via executemany.
+    """
+    parent_fields = [f for f in CustomUser._meta.concrete_fields if not f.primary_key]
+    parents = CustomUser.objects.bulk_create(
+        [CustomUser(**{f.attname: getattr(obj, f.attname) for f in parent_fields}) for obj in instances],
+        batch_size=batch_size,
+    )
+    for obj, parent in zip(instances, parents):
+        obj.pk = parent.pk
+        obj.id = parent.pk
+
+    child_fields = model._meta.local_concrete_fields
+    columns = ', '.join(connection.ops.quote_name(f.column) for f in child_fields)
+    placeholders = ', '.join(['%s'] * len(child_fields))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({columns}) VALUES ({placeholders})',
+            [
+                [f.get_db_prep_save(f.pre_save(obj, True), connection) for f in child_fields]
+                for obj in instances
+            ]
+        )
+
+
+def import_accounts(rows, default_role=None, batch_size=1000, workers=None, log=print):
+    """
+    Importe les lignes et renvoie le rapport (compteurs, erreurs, débit).
+    Chaque lot est inséré dans sa propre transaction.
+    """
+    workers = workers or os.cpu_count() or 1
+    report = {'read': 0, 'created': 0, 'duplicates': 0, 'invalid': 0, 'failed': 0, 'errors': []}
+    started = time.perf_counter()
+    existing = ExistingAccounts()
+
+    def error(line_num, message):
+        report['invalid'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append(f'ligne {line_num}: {message}')
+
+    with password_pool(workers) as pool:
+        for batch in _chunks(rows, batch_size):
+            accounts = []
+            for line_num, row in batch:
+                report['read'] += 1
+                if isinstance(row, InvalidRow):
+                    error(line_num, row.message)
+                    continue
+                try:
+                    obj, password = build_account(row, default_role)
+                except ValidationError as e:
+                    error(line_num, ' '.join(e.messages))
+                    continue
+                if existing.is_duplicate(obj):
+                    report['duplicates'] += 1
+                    continue
+                existing.add(obj)
+                accounts.append((obj, password))
+            if not accounts:
+                continue
+
+            hashes = hash_passwords(pool, [password for _, password in accounts], workers)
+            by_model = {}
+            for (obj, _), hashed in zip(accounts, hashes):
+                obj.password = hashed
+                by_model.setdefault(type(obj), []).append(obj)
+            try:
+                with transaction.atomic():
+                    for model, instances in by_model.items():
+                        bulk_insert_accounts(model, instances, batch_size)
+            except DatabaseError as e:
+                # Conflit avec une inscription concurrente : le lot entier est ignoré
+                report['failed'] += len(accounts)
+                if len(report['errors']) < MAX_REPORTED_ERRORS:
+                    report['errors'].append(f'lot ignoré ({len(accounts)} lignes): {e}')
+                continue
+            report['created'] += len(accounts)
+            log(f"  {report['read']} lignes lues, {report['created']} comptes créés")
+
+    # bulk_create ne déclenche pas les signaux : inscriptions du jour recalculées
+    if report['created']:
+        today = rollup.local_day()
+        rollup.reconcile(today, today)
+
+    report['seconds'] = round(time.perf_counter() - started, 2)
+    report['rows_per_second'] = round(report['read'] / report['seconds']) if report['seconds'] else 0
+    return report
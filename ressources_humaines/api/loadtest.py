@@ -0,0 +1,271 @@
+"""
+Tests de charge HTTP
+
+Le serveur (WSGI à threads bornés ou ASGI via uvicorn) tourne dans un
+processus séparé ; le client asyncio ouvre une connexion par requête et
+peut maintenir des clients lents (en-têtes envoyés octet par octet).
+Les parcours (run_journeys) enchaînent plusieurs appels par client et
+sont résumés par endpoint.
+"""
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler
+
+from django.conf import settings
+
+from .bench import percentile
+
+SERVER_KINDS = ('wsgi', 'asgi')
+HOST = '127.0.0.1'
+STARTUP_TIMEOUT = 30  # secondes
+
+
+class Call(NamedTuple):
+    """
+    Requête d'un parcours ; `name` regroupe les mesures (endpoint)
+    """
+    name: str
+    method: str
+    path: str
+    headers: dict = {}
+    body: bytes = b''
+
+
+def multipart_body(fields, files):
+    """
+    Corps multipart/form-data : renvoie (corps, en-tête Content-Type).
+    `files` : {champ: (nom du fichier, contenu)}
+    """
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'.encode() + content + b'\r\n'
+        )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class PooledWSGIServer(WSGIServer):
+    """
+    Serveur WSGI à `threads` threads (comme un worker gunicorn gthread) : une
+    connexion occupe un thread du début de la lecture de la requête jusqu'à
+    la fin de la réponse.
+    """
+    request_queue_size = 1024
+
+    def __init__(self, address, threads):
+        super().__init__(address, _QuietHandler)
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def _disable_throttling():
+    from rest_framework.throttling import SimpleRateThrottle
+    for scope in SimpleRateThrottle.THROTTLE_RATES:
+        SimpleRateThrottle.THROTTLE_RATES[scope] = None
+
+
+def serve(kind, port, threads, throttle=False):
+    """
+    Point d'entrée du processus serveur (Django déjà initialisé)
+    """
+    if not throttle:
+        _disable_throttling()
+
+    if kind == 'wsgi':
+        from ressources_humaines.wsgi import application
+        server = PooledWSGIServer((HOST, port), threads)
+        server.set_app(application)
+        server.serve_forever()
+    else:
+        import uvicorn
+        from ressources_humaines.asgi import application
+        uvicorn.run(application, host=HOST, port=port, log_level='warning', access_log=False, lifespan='off')
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+class Server:
+    """
+    Processus serveur, prêt à la sortie du `with`
+    """
+
+    def __init__(self, kind, threads, throttle=False, env=None):
+        self.kind = kind
+        self.port = _free_port()
+        self._args = [
+            sys.executable, '-c',
+            'import django; django.setup(); from api.loadtest import serve; '
+            f'serve({kind!r}, {self.port}, {threads}, {throttle})'
+        ]
+        # `threads` : threads WSGI, ou taille du pool des appels bloquants sous ASGI
+        self._env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'ressources_humaines.settings'),
+            'ASYNC_BLOCKING_WORKERS': str(threads),
+            **(env or {}),
+        }
+
+    def __enter__(self):
+        self._log = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(
+            self._args, cwd=settings.BASE_DIR, env=self._env, stdout=subprocess.DEVNULL, stderr=self._log
+        )
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline and self._process.poll() is None:
+            try:
+                socket.create_connection((HOST, self.port), timeout=1).close()
+                return self
+            except OSError:
+                time.sleep(0.1)
+        output = self._output()
+        self.__exit__(None, None, None)
+        raise RuntimeError(f"Le serveur {self.kind} n'a pas démarré:\n{output}")
+
+    def _output(self):
+        self._log.seek(0)
+        return self._log.read().decode(errors='replace')[-2000:]
+
+    def __exit__(self, *exc_info):
+        self._process.terminate()
+        try:
+            self._process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+        self._log.close()
+
+
+async def _send(port, call, timeout):
+    started = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(HOST, port), timeout)
+        lines = [f'{call.method} {call.path} HTTP/1.1', f'Host: {HOST}:{port}', 'Connection: close']
+        lines += [f'{name}: {value}' for name, value in call.headers.items()]
+        if call.body or call.method not in ('GET', 'HEAD'):
+            lines.append(f'Content-Length: {len(call.body)}')
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + call.body)
+        data = await asyncio.wait_for(reader.read(), timeout)
+        writer.close()
+        status = int(data.split(b' ', 2)[1]) if data else 0
+    except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+        status = 0
+    return status, (time.perf_counter() - started) * 1000
+
+
+async def _slow_client(port, stop):
+    """
+    Envoie sa requête octet par octet tant que la mesure n'est pas terminée
+    """
+    try:
+        reader, writer = await asyncio.open_connection(HOST, port)
+        writer.write(f'GET /api/jobs/publiques/ HTTP/1.1\r\nHost: {HOST}\r\nX-Slow: '.encode())
+        while not stop.is_set():
+            writer.write(b'x')
+            await writer.drain()
+            await asyncio.sleep(1)
+        writer.close()
+    except OSError:
+        pass
+
+
+async def run_load(port, targets, concurrency, total, slow_clients=0, timeout=10.0):
+    """
+    Envoie `total` requêtes GET avec `concurrency` clients, en parcourant
+    `targets` [(chemin, en-têtes)]. Renvoie le résumé (débit, latences en ms,
+    codes HTTP ; 0 = délai dépassé ou connexion refusée).
+    """
+    stop = asyncio.Event()
+    slow = [asyncio.create_task(_slow_client(port, stop)) for _ in range(slow_clients)]
+    if slow:
+        # Laisse le serveur accepter les connexions lentes avant la mesure
+        await asyncio.sleep(1)
+
+    results = []
+    counter = iter(range(total))
+
+    async def client():
+        for i in counter:
+            path, headers = targets[i % len(targets)]
+            results.append(await _send(port, Call(path, 'GET', path, headers), timeout))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(*slow)
+    return summarize(results, elapsed)
+
+
+async def run_journeys(port, journeys, concurrency, total, timeout=10.0):
+    """
+    Exécute `total` parcours avec `concurrency` clients. `journeys` :
+    [(poids, fabrique)], la fabrique reçoit le numéro du parcours et renvoie
+    ses appels [Call], envoyés l'un après l'autre. Renvoie le résumé global
+    et un résumé par nom d'appel ('endpoints').
+    """
+    weights = [weight for weight, _ in journeys]
+    # Suite des parcours tirée d'avance : même mélange d'une exécution à l'autre
+    plan = iter(enumerate(random.Random(42).choices([factory for _, factory in journeys], weights, k=total)))
+    results = defaultdict(list)
+
+    async def client():
+        for i, factory in plan:
+            for call in factory(i):
+                results[call.name].append(await _send(port, call, timeout))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    summary = summarize([result for calls in results.values() for result in calls], elapsed)
+    summary['endpoints'] = {name: summarize(calls, elapsed) for name, calls in sorted(results.items())}
+    return summary
+
+
+def summarize(results, elapsed):
+    statuses = Counter(status for status, _ in results)
+    timings = [ms for status, ms in results if 0 < status < 500]
+    summary = {
+        'requests': len(results),
+        'ok': sum(count for status, count in statuses.items() if 200 <= status < 400),
+        'errors': sum(count for status, count in statuses.items() if status == 0 or status >= 500),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'seconds': round(elapsed, 2),
+        'rps': round(len(results) / elapsed, 1) if elapsed else 0,
+    }
+    for p in (50, 95, 99):
+        summary[f'p{p}_ms'] = round(percentile(timings, p), 1) if timings else None
+    summary['max_ms'] = round(max(timings), 1) if timings else None
+    return summary
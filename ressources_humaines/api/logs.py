@@ -0,0 +1,180 @@
+"""
+Journalisation non bloquante au format JSON
+
+Le thread appelant formate le message et l'ajoute à une file bornée ; la
+sérialisation JSON et l'écriture sont faites par un thread dédié.
+Chaque ligne porte l'identifiant de la requête en cours.
+Les messages INFO/DEBUG des loggers listés dans `sampling` ne sont conservés
+qu'en proportion ; les avertissements et erreurs sont toujours écrits.
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler
+
+QUEUE_SIZE = 10000
+BATCH_SIZE = 500
+REQUEST_ID_HEADER = 'X-Request-ID'
+_VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+request_id_var = contextvars.ContextVar('request_id', default=None)
+
+# Attributs standard d'un LogRecord : le reste vient de `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id', 'taskName'}
+
+
+def new_request_id(incoming=None):
+    """
+    Identifiant transmis par le client (proxy, frontend) s'il est valide, sinon généré
+    """
+    if incoming and _VALID_REQUEST_ID.match(incoming):
+        return incoming
+    return uuid.uuid4().hex
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        elif record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Ne garde qu'une fraction des messages INFO/DEBUG de certains loggers
+    (et de leurs enfants) : {'django.server': 0.1}
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = rates or {}
+
+    def _rate(self, name):
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition('.')[0]
+        return 1.0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        return random.random() < self._rate(record.name)
+
+
+class QueueJsonHandler(QueueHandler):
+    """
+    Handler utilisable dans settings.LOGGING : file bornée vers un thread qui
+    écrit en JSON sur `stream`, par lots (un flush par lot et non par ligne).
+    File pleine : l'enregistrement est abandonné (compté dans `dropped`)
+    plutôt que de bloquer la requête.
+    """
+    _STOP = object()
+
+    def __init__(self, stream=None, sampling=None, queue_size=QUEUE_SIZE):
+        super().__init__(queue.Queue(queue_size))
+        self.queue_size = queue_size
+        self.stream = stream or sys.stderr
+        self.setFormatter(JsonFormatter())
+        self.addFilter(SamplingFilter(sampling))
+        self.dropped = 0
+        self._writer = None
+        self._pid = None
+        self._writer_lock = threading.Lock()
+        atexit.register(self.stop)
+
+    def _ensure_writer(self):
+        # Le thread d'écriture ne survit pas à un fork (workers, pools de processus)
+        if self._pid == os.getpid():
+            return
+        with self._writer_lock:
+            if self._pid != os.getpid():
+                self.queue = queue.Queue(self.queue_size)
+                self._writer = threading.Thread(target=self._write_loop, name='log-writer', daemon=True)
+                self._writer.start()
+                self._pid = os.getpid()
+
+    def _write_loop(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = []
+            for record in batch:
+                if record is self._STOP:
+                    continue
+                try:
+                    lines.append(self.format(record) + '\n')
+                except Exception:
+                    self.handleError(record)
+            if lines:
+                try:
+                    self.stream.write(''.join(lines))
+                    self.stream.flush()
+                except Exception:
+                    pass
+            if self._STOP in batch:
+                return
+
+    def prepare(self, record):
+        """
+        Comme QueueHandler : copie de l'enregistrement (les autres handlers
+        gardent arguments et exception), message formaté dans le thread
+        appelant avec l'identifiant de requête et la trace d'exception. Le
+        JSON reste fait par le thread d'écriture.
+        """
+        record = copy.copy(record)
+        record.request_id = request_id_var.get()
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self.formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        self._ensure_writer()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """
+        Écrit les enregistrements en attente et arrête le thread
+        """
+        if self._writer is not None and self._pid == os.getpid():
+            self.queue.put(self._STOP)
+            self._writer.join()
+            self._writer = None
+            self._pid = None
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from api.bench import has_bench_data, seed_dataset, measure
+from api.models import CustomUser, Candidature
+from api.stats import compute_admin_dashboard
+
+class Command(BaseCommand):
+    help = 'Mesure le temps et le nombre de requêtes du calcul des statistiques du dashboard admin'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help='Génère le jeu de données s\'il est absent')
+        parser.add_argument('--users', type=int, default=1_000_000, help='Nombre d\'utilisateurs (défaut: 1M)')
+        parser.add_argument('--jobs', type=int, default=100_000, help='Nombre d\'offres (défaut: 100k)')
+        parser.add_argument('--candidatures', type=int, default=10_000_000, help='Nombre de candidatures (défaut: 10M)')
+        parser.add_argument('--runs', type=int, default=5, help='Nombre d\'exécutions mesurées (défaut: 5)')
+
+    def handle(self, *args, **options):
+        if options['seed'] and not has_bench_data():
+            self.stdout.write('Génération du jeu de données...')
+            seed_dataset(
+                users=options['users'],
+                jobs=options['jobs'],
+                candidatures=options['candidatures'],
+                log=self.stdout.write,
+            )
+
+        self.stdout.write(
+            f"Volume: {CustomUser.objects.count()} utilisateurs, "
+            f"{Candidature.objects.count()} candidatures"
+        )
+
+        result = measure(compute_admin_dashboard, runs=options['runs'])
+        self.stdout.write(self.style.SUCCESS(
+            f"admin_dashboard_stats: {result['queries']} requêtes, "
+            f"médiane {result['median_ms']} ms (min {result['min_ms']}, max {result['max_ms']})"
+        ))
@@ -0,0 +1,54 @@
+import asyncio
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from api.bench import _insert_users
+from api.loadtest import Server, run_load, SERVER_KINDS
+from api.models import CustomUser, Job
+
+class Command(BaseCommand):
+    help = (
+        "Test de charge des lectures fréquentes (offres publiques, détail d'une offre, profil) "
+        "sous WSGI (threads bornés) et ASGI (vues asynchrones)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--server', choices=SERVER_KINDS + ('both',), default='both', help='Serveur testé (défaut: both)')
+        parser.add_argument('--concurrency', type=int, default=50, help='Clients simultanés (défaut: 50)')
+        parser.add_argument('--requests', type=int, default=2000, help='Requêtes envoyées (défaut: 2000)')
+        parser.add_argument('--threads', type=int, default=8, help='Threads WSGI / pool bloquant ASGI (défaut: 8)')
+        parser.add_argument('--slow-clients', type=int, default=0, help='Connexions lentes maintenues pendant la mesure (défaut: 0)')
+        parser.add_argument('--timeout', type=float, default=10.0, help='Délai maximal par requête en secondes (défaut: 10)')
+        parser.add_argument('--throttle', action='store_true', help='Conserve le throttling (désactivé par défaut)')
+
+    def handle(self, *args, **options):
+        job = Job.objects.filter(active=True).order_by('-date_creation').first()
+        if job is None:
+            raise CommandError('Aucune offre active : générer des données avant le test (bench_admin_stats --seed, create_test_jobs)')
+
+        # Candidat dédié pour les routes authentifiées, supprimé à la fin
+        user_id = _insert_users(1, 'candidat', int(time.time()), timezone.now(), 1, 1)[0]
+        token = Token.objects.create(user_id=user_id)
+        auth = {'Authorization': f'Token {token.key}'}
+        targets = [
+            ('/api/jobs/publiques/', {}),
+            (f'/api/jobs/{job.pk}/', auth),
+            ('/api/auth/me/', auth),
+        ]
+        kinds = SERVER_KINDS if options['server'] == 'both' else (options['server'],)
+        try:
+            for kind in kinds:
+                with Server(kind, options['threads'], options['throttle']) as server:
+                    result = asyncio.run(run_load(
+                        server.port, targets, options['concurrency'], options['requests'],
+                        options['slow_clients'], options['timeout'],
+                    ))
+                style = self.style.SUCCESS if not result['errors'] else self.style.ERROR
+                self.stdout.write(style(
+                    f"{kind.upper()}: {result['rps']} requêtes/s, p50 {result['p50_ms']} ms, "
+                    f"p95 {result['p95_ms']} ms, p99 {result['p99_ms']} ms, "
+                    f"{result['errors']} erreur(s)/délai(s) dépassé(s) sur {result['requests']} ({result['statuses']})"
+                ))
+        finally:
+            CustomUser.objects.filter(pk=user_id).delete()
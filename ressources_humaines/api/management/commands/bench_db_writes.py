@@ -0,0 +1,94 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from api.bench import _insert_users, db_write_worker, percentile
+from api.hashing import init_worker
+from api.models import CustomUser, Job
+from api import rollup
+
+class Command(BaseCommand):
+    help = (
+        "Test de charge en écriture : candidatures soumises en parallèle (signaux compris). "
+        "Comparer les profils avec DB_PROFILE=sqlite, sqlite-basic ou postgres."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8, help='Processus concurrents (défaut: 8)')
+        parser.add_argument('--submissions', type=int, default=200, help='Candidatures par processus (défaut: 200)')
+        parser.add_argument('--jobs', type=int, default=20, help='Offres ciblées (défaut: 20)')
+        parser.add_argument('--atomic', action='store_true', help='Une transaction par candidature')
+
+    def handle(self, *args, **options):
+        processes, submissions = options['processes'], options['submissions']
+        database = settings.DATABASES['default']
+        self.stdout.write(
+            f"Profil {settings.DB_PROFILE} ({database['ENGINE'].rsplit('.', 1)[-1]}, "
+            f"options: {', '.join(database.get('OPTIONS', {})) or 'aucune'})"
+        )
+
+        # Comptes et offres dédiés, supprimés à la fin
+        now = timezone.now()
+        offset = CustomUser.objects.count() + int(time.time())
+        # Inscrits aujourd'hui : seule la ligne DailyStat du jour est à recalculer
+        recruteur_id = _insert_users(1, 'recruteur', offset, now, 0, 1000)[0]
+        candidat_ids = _insert_users(processes * submissions, 'candidat', offset, now, 0, 1000)
+        job_ids = [job.pk for job in Job.objects.bulk_create([
+            Job(
+                recruteur_id=recruteur_id, titre=f'Offre bench {i}', description='Benchmark écritures',
+                exigences='-', type_contrat='CDI', localisation='Paris',
+                date_expiration=now + timedelta(days=30),
+            )
+            for i in range(options['jobs'])
+        ])]
+        # Les connexions ne doivent pas être héritées par les processus fils
+        connections.close_all()
+
+        results, failures = [], []
+        try:
+            started = time.perf_counter()
+            with ProcessPoolExecutor(
+                max_workers=processes,
+                initializer=init_worker,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'ressources_humaines.settings'),),
+            ) as pool:
+                futures = [
+                    pool.submit(
+                        db_write_worker, candidat_ids[i * submissions:(i + 1) * submissions],
+                        job_ids, options['atomic']
+                    )
+                    for i in range(processes)
+                ]
+                for future in futures:
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        failures.append(e)
+            elapsed = time.perf_counter() - started
+        finally:
+            deleted = CustomUser.objects.filter(pk__in=[recruteur_id] + candidat_ids).delete()[0]
+            today = rollup.local_day()
+            rollup.reconcile(today, today)
+            self.stdout.write(f"Nettoyage: {deleted} lignes supprimées")
+
+        for e in failures:
+            self.stderr.write(f"Processus en échec: {e!r}")
+        if not results:
+            raise CommandError('Aucun processus de charge n\'a abouti')
+
+        created = sum(result[0] for result in results)
+        locked = sum(result[1] for result in results)
+        timings = [t for result in results for t in result[2]]
+        self.stdout.write(
+            f"{processes} processus x {submissions} candidatures: {created} créées, "
+            f"{locked} erreur(s) 'database is locked', {created / elapsed:.0f} candidatures/s"
+        )
+        style = self.style.SUCCESS if not locked else self.style.ERROR
+        self.stdout.write(style(
+            f"Latence par candidature: p50 {percentile(timings, 50):.1f} ms, p95 {percentile(timings, 95):.1f} ms, "
+            f"p99 {percentile(timings, 99):.1f} ms, max {max(timings):.1f} ms"
+        ))
@@ -0,0 +1,234 @@
+import asyncio
+import itertools
+import json
+import random
+import subprocess
+import time
+from pathlib import Path
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from api import rollup
+from api.bench import BENCH_CV, BENCH_EMAIL_DOMAIN, has_bench_data, seed_dataset, _insert_users
+from api.loadtest import Call, Server, SERVER_KINDS, multipart_body, run_journeys
+from api.models import CustomUser, Recruteur, Job, Candidature, CVAnalysis, RecruteurEvent
+
+JOURNEYS = ('browse', 'apply', 'triage', 'admin')
+DEFAULT_MIX = 'browse=70,apply=10,triage=15,admin=5'
+RESULTS_DIR = settings.BASE_DIR / 'bench_results'
+CV_CONTENT = b'%PDF-1.4\n% CV de benchmark\n' + b'0' * 20_000
+# Candidatures créées pour le tri : 20 candidats x 50 offres du recruteur
+TRIAGE_CANDIDATS = 20
+TRIAGE_JOBS = 50
+
+
+def _parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name.strip() not in JOURNEYS or not weight.strip().isdigit():
+            raise CommandError(f"Mélange invalide: {item!r} (parcours: {', '.join(JOURNEYS)})")
+        mix[name.strip()] = int(weight)
+    return mix
+
+
+def _git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=settings.BASE_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+    return commit, bool(dirty)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de bout en bout : parcours concurrents (consultation des offres publiques, "
+        "candidature, tri par un recruteur, dashboard admin) contre un serveur local, "
+        "latences et débit par endpoint enregistrés en JSON. Le jeu de données n'est pas modifié : "
+        "le tri porte sur des candidatures créées pour le test."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help='Génère le jeu de données s\'il est absent')
+        parser.add_argument('--users', type=int, default=200_000, help='Nombre d\'utilisateurs (défaut: 200k)')
+        parser.add_argument('--jobs', type=int, default=100_000, help='Nombre d\'offres (défaut: 100k)')
+        parser.add_argument('--candidatures', type=int, default=1_000_000, help='Nombre de candidatures (défaut: 1M)')
+        parser.add_argument('--analyses', type=int, default=500_000, help='Nombre d\'analyses IA (défaut: 500k)')
+        parser.add_argument('--server', choices=SERVER_KINDS, default='wsgi', help='Serveur testé (défaut: wsgi)')
+        parser.add_argument('--threads', type=int, default=8, help='Threads WSGI / pool bloquant ASGI (défaut: 8)')
+        parser.add_argument('--concurrency', type=int, default=20, help='Clients simultanés (défaut: 20)')
+        parser.add_argument('--journeys', type=int, default=500, help='Parcours exécutés (défaut: 500)')
+        parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Poids des parcours (défaut: {DEFAULT_MIX})')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Délai maximal par requête en secondes (défaut: 30)')
+        parser.add_argument('--output', help='Fichier JSON des résultats (défaut: bench_results/e2e-<commit>-<date>.json)')
+        parser.add_argument('--compare', help='Résultats précédents (JSON) à comparer')
+
+    def handle(self, *args, **options):
+        mix = _parse_mix(options['mix'])
+        if options['seed'] and not has_bench_data():
+            self.stdout.write('Génération du jeu de données...')
+            seed_dataset(
+                users=options['users'],
+                jobs=options['jobs'],
+                candidatures=options['candidatures'],
+                analyses=options['analyses'],
+                log=self.stdout.write,
+            )
+
+        job_ids = list(
+            Job.objects.filter(active=True, date_expiration__gt=timezone.now())
+            .order_by('-date_creation').values_list('pk', flat=True)[:10_000]
+        )
+        recruteur = (
+            Recruteur.objects.filter(email__endswith='@' + BENCH_EMAIL_DOMAIN)
+            .annotate(total=Count('jobs__candidatures')).order_by('-total').first()
+        )
+        if not job_ids or recruteur is None:
+            raise CommandError('Aucune donnée de benchmark : relancer avec --seed')
+        dataset = {
+            'users': CustomUser.objects.count(),
+            'jobs': Job.objects.count(),
+            'candidatures': Candidature.objects.count(),
+            'analyses': CVAnalysis.objects.count(),
+        }
+        self.stdout.write(', '.join(f'{count} {name}' for name, count in dataset.items()))
+
+        # Comptes dédiés (candidats, candidatures à trier, admin) et tokens créés
+        # pour le test, supprimés à la fin
+        now, offset = timezone.now(), int(time.time())
+        candidat_ids = _insert_users(options['concurrency'], 'candidat', offset, now, 0, 1000)
+        triage_candidat_ids = _insert_users(TRIAGE_CANDIDATS, 'candidat', offset + options['concurrency'], now, 0, 1000)
+        admin = CustomUser.objects.create(email=f'admin-{offset}@{BENCH_EMAIL_DOMAIN}', password='!', role='admin')
+        bench_user_ids = candidat_ids + triage_candidat_ids + [admin.pk]
+        last_event_id = RecruteurEvent.objects.order_by('-id').values_list('pk', flat=True).first() or 0
+        had_token = Token.objects.filter(user_id=recruteur.pk).exists()
+        tokens = {user_id: Token.objects.get_or_create(user_id=user_id)[0].key
+                  for user_id in candidat_ids + [admin.pk, recruteur.pk]}
+        try:
+            triage_jobs = list(Job.objects.filter(recruteur=recruteur).values_list('pk', flat=True)[:TRIAGE_JOBS])
+            Candidature.objects.bulk_create([
+                Candidature(candidat_id=candidat_id, job_id=job_id, cv=BENCH_CV)
+                for candidat_id in triage_candidat_ids for job_id in triage_jobs
+            ], batch_size=1000)
+            result = self._run(options, mix, job_ids, recruteur, candidat_ids, admin, tokens, triage_candidat_ids)
+        finally:
+            created = Candidature.objects.filter(candidat_id__in=bench_user_ids)
+            RecruteurEvent.objects.filter(
+                id__gt=last_event_id, payload__candidature_id__in=list(created.values_list('pk', flat=True))
+            ).delete()
+            cvs = list(created.exclude(cv=BENCH_CV).values_list('cv', flat=True))
+            # Suppression en cascade des candidatures et de leurs transitions de statut
+            CustomUser.objects.filter(pk__in=bench_user_ids).delete()
+            for name in cvs:
+                default_storage.delete(name)
+            if not had_token:
+                Token.objects.filter(user_id=recruteur.pk).delete()
+            # Lignes insérées sans signaux : agrégats du jour et compteurs recalculés
+            today = rollup.local_day()
+            rollup.reconcile(today, today)
+            rollup.sync_job_counters()
+
+        commit, dirty = _git_revision()
+        report = {
+            'commit': commit,
+            'dirty': dirty,
+            'date': timezone.now().isoformat(timespec='seconds'),
+            'dataset': dataset,
+            'config': {key: options[key] for key in ('server', 'threads', 'concurrency', 'journeys', 'timeout')} | {'mix': mix},
+            'result': result,
+        }
+        self._print(result)
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as f:
+                self._print_comparison(json.load(f), report)
+
+        output = Path(options['output'] or RESULTS_DIR / f"e2e-{commit or 'nogit'}-{timezone.now():%Y%m%d-%H%M%S}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        self.stdout.write(f'Résultats enregistrés dans {output}')
+
+    def _run(self, options, mix, job_ids, recruteur, candidat_ids, admin, tokens, triage_candidat_ids):
+        def auth(user_id):
+            return {'Authorization': f'Token {tokens[user_id]}'}
+
+        rng = random.Random(42)
+        triage_ids = list(
+            Candidature.objects.filter(candidat_id__in=triage_candidat_ids).values_list('pk', flat=True)
+        )
+        applies = itertools.count()
+
+        def browse(i):
+            # Liste publique anonyme, détail réservé aux comptes connectés
+            page = rng.randint(1, 5)
+            return [
+                Call('jobs/publiques', 'GET', f'/api/jobs/publiques/?page={page}'),
+                Call('jobs/detail', 'GET', f'/api/jobs/{rng.choice(job_ids)}/', auth(candidat_ids[i % len(candidat_ids)])),
+            ]
+
+        def apply(i):
+            # Couple (candidat, offre) jamais utilisé : chaque candidat parcourt les offres
+            k = next(applies)
+            candidat_id = candidat_ids[k % len(candidat_ids)]
+            job_id = job_ids[(k // len(candidat_ids)) % len(job_ids)]
+            body, content_type = multipart_body({'job': job_id}, {'cv': ('cv.pdf', CV_CONTENT)})
+            return [
+                Call('jobs/detail', 'GET', f'/api/jobs/{job_id}/', auth(candidat_id)),
+                Call('candidatures/create', 'POST', '/api/candidatures/', {**auth(candidat_id), 'Content-Type': content_type}, body),
+                Call('candidatures/my', 'GET', '/api/candidatures/my_candidatures/', auth(candidat_id)),
+            ]
+
+        def triage(i):
+            calls = [
+                Call('candidatures/list', 'GET', '/api/candidatures/', auth(recruteur.pk)),
+                Call('candidatures/with_ai_scores', 'GET', '/api/candidatures/with_ai_scores/', auth(recruteur.pk)),
+            ]
+            if triage_ids:
+                body = json.dumps({'statut': rng.choice(['en_attente', 'acceptee', 'refusee'])}).encode()
+                calls.append(Call(
+                    'candidatures/update', 'PATCH', f'/api/candidatures/{rng.choice(triage_ids)}/',
+                    {**auth(recruteur.pk), 'Content-Type': 'application/json'}, body,
+                ))
+            return calls
+
+        def admin_dashboard(i):
+            return [
+                Call('admin/dashboard', 'GET', '/api/admin/dashboard/stats/', auth(admin.pk)),
+                Call('users/list', 'GET', '/api/users/', auth(admin.pk)),
+            ]
+
+        factories = {'browse': browse, 'apply': apply, 'triage': triage, 'admin': admin_dashboard}
+        journeys = [(weight, factories[name]) for name, weight in mix.items() if weight]
+        # Pas d'appel réel au modèle de langage : l'analyse échoue immédiatement
+        with Server(options['server'], options['threads'], env={'MISTRAL_API_KEY': ''}) as server:
+            return asyncio.run(run_journeys(
+                server.port, journeys, options['concurrency'], options['journeys'], options['timeout'],
+            ))
+
+    def _print(self, result):
+        for name, endpoint in [('total', result)] + list(result['endpoints'].items()):
+            style = self.style.SUCCESS if not endpoint['errors'] else self.style.ERROR
+            self.stdout.write(style(
+                f"{name:<28} {endpoint['requests']:>6} req  {endpoint['rps']:>7} req/s  "
+                f"p50 {endpoint['p50_ms']} ms  p95 {endpoint['p95_ms']} ms  p99 {endpoint['p99_ms']} ms  "
+                f"{endpoint['errors']} erreur(s) {endpoint['statuses']}"
+            ))
+
+    def _print_comparison(self, previous, current):
+        self.stdout.write(f"Comparaison avec {previous.get('commit')} ({previous.get('date')}) :")
+        before = {'total': previous['result'], **previous['result'].get('endpoints', {})}
+        after = {'total': current['result'], **current['result']['endpoints']}
+        for name, endpoint in after.items():
+            old = before.get(name)
+            if old is None or not old.get('p95_ms') or not endpoint.get('p95_ms') or not old.get('rps'):
+                continue
+            p95 = (endpoint['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100
+            rps = (endpoint['rps'] - old['rps']) / old['rps'] * 100
+            self.stdout.write(f"{name:<28} p95 {old['p95_ms']} -> {endpoint['p95_ms']} ms ({p95:+.0f}%)  "
+                              f"débit {old['rps']} -> {endpoint['rps']} req/s ({rps:+.0f}%)")
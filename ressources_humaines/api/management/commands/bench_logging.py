@@ -0,0 +1,72 @@
+import logging
+import tempfile
+import time
+from django.core.management.base import BaseCommand
+from api.bench import percentile
+from api.logs import QueueJsonHandler, request_id_var, new_request_id
+
+VERBOSE_FORMAT = '{levelname} {asctime} {module} {process:d} {thread:d} {message}'
+
+class Command(BaseCommand):
+    help = "Surcoût des logs par requête : StreamHandler synchrone (f-strings) contre file JSON non bloquante"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000, help='Requêtes simulées (défaut: 20000)')
+        parser.add_argument('--sampling', type=float, default=0.1, help='Part des messages INFO conservée (défaut: 0.1)')
+
+    def _before(self, stream):
+        logger = logging.getLogger('bench.logging.before')
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter(VERBOSE_FORMAT, style='{'))
+        logger.handlers, logger.propagate = [handler], False
+        logger.setLevel(logging.DEBUG)
+
+        def request(i, payload):
+            # Ancienne configuration : niveau DEBUG, messages formatés à l'appel
+            logger.debug(f"Données reçues: {payload}")
+            logger.info(f"Déclenchement automatique de l'analyse IA pour candidature {i}")
+            logger.info(f"Début de l'analyse IA pour candidature {i}")
+            logger.info(f"Analyse IA terminée pour candidature {i}")
+        return request, handler
+
+    def _after(self, stream, rate):
+        logger = logging.getLogger('bench.logging.after')
+        handler = QueueJsonHandler(stream, sampling={'bench.logging.after': rate})
+        logger.handlers, logger.propagate = [handler], False
+        logger.setLevel(logging.INFO)
+
+        def request(i, payload):
+            token = request_id_var.set(new_request_id())
+            logger.debug("Données reçues: %s", payload)
+            logger.info("Déclenchement automatique de l'analyse IA pour candidature %s", i)
+            logger.info("Début de l'analyse IA pour candidature %s", i)
+            logger.info("Analyse IA terminée pour candidature %s", i)
+            request_id_var.reset(token)
+        return request, handler
+
+    def handle(self, *args, **options):
+        payload = {'titre': 'Développeur Django', 'keywords': ['python', 'django'] * 10, 'salaire_min': 42000}
+        variants = (
+            ('avant', self._before),
+            ('après, sans échantillonnage', lambda stream: self._after(stream, 1.0)),
+            (f"après, échantillonnage {options['sampling']}", lambda stream: self._after(stream, options['sampling'])),
+        )
+        for name, build in variants:
+            with tempfile.TemporaryFile('w+') as stream:
+                request, handler = build(stream)
+                timings = []
+                started = time.perf_counter()
+                for i in range(options['requests']):
+                    t = time.perf_counter()
+                    request(i, payload)
+                    timings.append((time.perf_counter() - t) * 1e6)
+                caller = time.perf_counter() - started
+                if isinstance(handler, QueueJsonHandler):
+                    handler.stop()  # attend l'écriture des lignes en file
+                total = time.perf_counter() - started
+                stream.seek(0)
+                lines = sum(1 for _ in stream)
+            self.stdout.write(
+                f"{name}: p50 {percentile(timings, 50):.1f} µs, p99 {percentile(timings, 99):.1f} µs par requête, "
+                f"{caller:.2f} s dans les requêtes, {total:.2f} s avec l'écriture, {lines} lignes"
+            )
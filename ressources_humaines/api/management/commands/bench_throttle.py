@@ -0,0 +1,53 @@
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand
+from api.bench import throttle_worker, percentile
+from api.throttling import SharedThrottleStore
+from api.hashing import init_worker
+
+class Command(BaseCommand):
+    help = 'Test de charge du throttling partagé : exactitude de la limite entre processus et surcoût par requête'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8, help='Processus concurrents (défaut: 8)')
+        parser.add_argument('--hits', type=int, default=5000, help='Requêtes par processus (défaut: 5000)')
+        parser.add_argument('--keys', type=int, default=1, help='Clés distinctes (défaut: 1, contention maximale)')
+        parser.add_argument('--limit', type=int, default=1000, help='Limite par clé et par fenêtre (défaut: 1000)')
+        parser.add_argument('--window', type=int, default=3600, help='Durée de la fenêtre en secondes (défaut: 3600)')
+
+    def handle(self, *args, **options):
+        processes, hits, keys = options['processes'], options['hits'], options['keys']
+        # Fichier dédié : les compteurs de production ne sont pas touchés
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'throttle.sqlite3')
+            # Schéma et mode WAL créés avant le démarrage des processus
+            SharedThrottleStore(path).clear()
+            started = time.perf_counter()
+            with ProcessPoolExecutor(
+                max_workers=processes,
+                initializer=init_worker,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'ressources_humaines.settings'),),
+            ) as pool:
+                futures = [
+                    pool.submit(throttle_worker, path, keys, hits, options['limit'], options['window'])
+                    for _ in range(processes)
+                ]
+                results = [future.result() for future in futures]
+            elapsed = time.perf_counter() - started
+
+        allowed = sum(result[0] for result in results)
+        errors = sum(result[1] for result in results)
+        timings = [t for result in results for t in result[2]]
+        expected = min(keys * options['limit'], processes * hits)
+        self.stdout.write(
+            f"{processes} processus x {hits} requêtes sur {keys} clé(s): "
+            f"{allowed} autorisées (attendu {expected}), {errors} erreur(s) de verrou, "
+            f"{len(timings) / elapsed:.0f} requêtes/s"
+        )
+        style = self.style.SUCCESS if allowed == expected and not errors else self.style.ERROR
+        self.stdout.write(style(
+            f"Latence par requête: p50 {percentile(timings, 50):.0f} µs, "
+            f"p99 {percentile(timings, 99):.0f} µs, max {max(timings):.0f} µs"
+        ))
@@ -0,0 +1,22 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.sirene import build_index, read_csv
+
+class Command(BaseCommand):
+    help = 'Construit l\'index binaire des établissements à partir d\'un extrait SIRENE (CSV)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Extrait CSV (StockEtablissement INSEE ou colonnes siret,nom,commune,code_postal,activite)')
+        parser.add_argument('--output', default=str(settings.SIRENE_INDEX_PATH), help='Fichier d\'index (défaut: SIRENE_INDEX_PATH)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            count = build_index(read_csv(options['path']), options['output'])
+        except OSError as e:
+            raise CommandError(f"Construction impossible: {e}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{count} établissement(s) indexé(s) dans {options['output']} "
+            f"en {time.perf_counter() - started:.1f}s"
+        ))
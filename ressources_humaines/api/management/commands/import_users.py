@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from api.imports import IMPORT_FORMATS, ROLE_MODELS, detect_format, read_rows, import_accounts
+
+class Command(BaseCommand):
+    help = 'Importe en masse des comptes candidats/recruteurs depuis un fichier CSV ou NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Fichier à importer (en-têtes CSV ou clés JSON = noms des champs)')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='Format du fichier (défaut: selon l\'extension)')
+        parser.add_argument('--role', choices=list(ROLE_MODELS), help='Rôle des lignes sans colonne role')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Taille des lots insérés (défaut: 1000)')
+        parser.add_argument('--workers', type=int, help='Processus de hachage des mots de passe (défaut: nombre de CPU)')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            rows = read_rows(path, options['format'] or detect_format(path))
+            report = import_accounts(
+                rows,
+                default_role=options['role'],
+                batch_size=max(options['batch_size'], 1),
+                workers=options['workers'],
+                log=self.stdout.write,
+            )
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Import impossible: {e}")
+
+        for message in report['errors']:
+            self.stderr.write(message)
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['created']} compte(s) créé(s), {report['duplicates']} doublon(s) ignoré(s), "
+            f"{report['invalid']} ligne(s) invalide(s), {report['failed']} en échec "
+            f"en {report['seconds']}s ({report['rows_per_second']} lignes/s)"
+        ))
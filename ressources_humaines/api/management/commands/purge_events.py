@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from datetime import timedelta
+from api.models import RecruteurEvent
+
+class Command(BaseCommand):
+    help = 'Supprime les anciens événements du flux temps réel des recruteurs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=7,
+            help='Nombre de jours d\'événements à conserver (défaut: 7)',
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(days=options['days'])
+        count, _ = RecruteurEvent.objects.filter(date_creation__lt=limite).delete()
+        self.stdout.write(self.style.SUCCESS(f"{count} événement(s) supprimé(s)"))
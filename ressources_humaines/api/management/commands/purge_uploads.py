@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from datetime import timedelta
+from api.models import UploadSession
+from api import uploads
+
+class Command(BaseCommand):
+    help = 'Supprime les sessions d\'upload abandonnées et leurs fichiers partiels'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=24,
+            help='Âge minimum (en heures) depuis la dernière activité (défaut: 24)',
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(hours=options['hours'])
+        sessions = UploadSession.objects.filter(date_modification__lt=limite)
+
+        count = 0
+        for session in sessions.iterator():
+            uploads.discard_upload(session)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{count} session(s) d'upload supprimée(s)"))
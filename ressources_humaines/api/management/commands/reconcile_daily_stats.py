@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from datetime import timedelta
+from api import rollup
+
+class Command(BaseCommand):
+    help = 'Recalcule la table des statistiques journalières à partir des données sources'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=2,
+            help='Nombre de jours à recalculer, aujourd\'hui inclus (défaut: 2)',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recalcule tout l\'historique',
+        )
+
+    def handle(self, *args, **options):
+        end = rollup.local_day()
+        if options['all']:
+            start = rollup.first_day()
+        else:
+            start = end - timedelta(days=max(options['days'], 1) - 1)
+
+        count = rollup.reconcile(start, end)
+        self.stdout.write(self.style.SUCCESS(f"{count} jour(s) recalculé(s) du {start} au {end}"))
+        jobs = rollup.sync_job_counters()
+        self.stdout.write(self.style.SUCCESS(f"Compteurs de candidatures corrigés pour {jobs} offre(s)"))
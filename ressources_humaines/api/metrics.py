@@ -0,0 +1,388 @@
+"""
+Métriques au format texte Prometheus (/metrics)
+
+Chaque processus cumule ses incréments en mémoire (le chemin des requêtes ne
+fait qu'incrémenter un dictionnaire) ; un thread les ajoute toutes les
+METRICS_FLUSH_INTERVAL secondes dans un fichier SQLite local partagé par les
+workers. Compteurs et histogrammes y tiennent une ligne par série, tous
+processus confondus : le fichier ne grossit pas avec les redémarrages. Les
+jauges gardent une ligne par processus, supprimée après 3 intervalles muets.
+
+Séries :
+- http_request_duration_seconds{view, method, status} : histogramme ;
+- db_queries_total{view} : requêtes SQL (view="-" hors requête HTTP) ;
+- cache_requests_total{cache, result} et cache_hit_ratio{cache} ;
+- analysis_queue_depth : analyses IA en attente ou en cours ;
+- llm_request_duration_seconds{status} : appels à l'API Mistral.
+"""
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .executors import analysis_queue
+
+logger = logging.getLogger(__name__)
+
+METRICS_DB_PATH = getattr(settings, 'METRICS_DB_PATH', settings.BASE_DIR / 'metrics.sqlite3')
+METRICS_FLUSH_INTERVAL = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)  # secondes
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+BUSY_TIMEOUT_MS = 1000
+STALE_GAUGE_INTERVALS = 3
+
+COUNTER, GAUGE, HISTOGRAM = 'counter', 'gauge', 'histogram'
+
+# nom -> (type, aide, bornes des histogrammes)
+METRICS = {
+    'http_request_duration_seconds': (
+        HISTOGRAM, 'Durée des requêtes HTTP par vue',
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    ),
+    'db_queries_total': (COUNTER, 'Requêtes SQL exécutées, par vue', None),
+    'cache_requests_total': (COUNTER, 'Lectures de cache, par cache et résultat (hit, miss, stale)', None),
+    'analysis_queue_depth': (GAUGE, 'Analyses IA en attente ou en cours', None),
+    'llm_request_duration_seconds': (
+        HISTOGRAM, "Durée des appels à l'API du modèle de langage",
+        (0.5, 1, 2.5, 5, 10, 20, 30, 60),
+    ),
+}
+
+# Jauges lues à chaque recopie
+GAUGE_CALLBACKS = {
+    'analysis_queue_depth': analysis_queue.depth,
+}
+
+_request_view = ContextVar('metrics_request', default=None)
+
+
+class _RequestQueries:
+    def __init__(self):
+        self.count = 0
+
+
+def _add(current, delta):
+    # Histogrammes : addition borne par borne
+    if isinstance(current, list):
+        return [a + b for a, b in zip(current, delta)]
+    return current + delta
+
+
+class Registry:
+    """
+    Incréments du processus depuis la dernière recopie : compteur -> valeur,
+    histogramme -> [compte par borne..., +Inf, somme, nombre]
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._pending[key] = self._pending.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, labels)
+        with self._lock:
+            series = self._pending.get(key)
+            if series is None:
+                series = self._pending[key] = [0] * (len(buckets) + 3)
+            index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def take(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return list(pending.items())
+
+    def restore(self, samples):
+        with self._lock:
+            for key, delta in samples:
+                current = self._pending.get(key)
+                self._pending[key] = delta if current is None else _add(current, delta)
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+
+
+class SharedMetricsStore:
+    """
+    Fichier SQLite commun aux processus : série -> valeur cumulée de tous
+    les processus, (processus, jauge) -> dernière valeur. Une connexion par
+    thread et par processus.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS series ('
+            ' name TEXT NOT NULL, labels TEXT NOT NULL, value TEXT NOT NULL,'
+            ' PRIMARY KEY (name, labels)) WITHOUT ROWID'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS gauges ('
+            ' process TEXT NOT NULL, name TEXT NOT NULL, labels TEXT NOT NULL, value TEXT NOT NULL,'
+            ' updated REAL NOT NULL, PRIMARY KEY (process, name, labels)) WITHOUT ROWID'
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def write(self, process, deltas, gauges, now=None):
+        """
+        Ajoute les incréments aux séries et remplace les jauges du processus ;
+        BEGIN IMMEDIATE sérialise la lecture-écriture entre processus
+        """
+        now = time.time() if now is None else now
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for (name, labels), delta in deltas:
+                labels = json.dumps(labels)
+                row = conn.execute('SELECT value FROM series WHERE name = ? AND labels = ?', (name, labels)).fetchone()
+                value = _add(json.loads(row[0]), delta) if row else delta
+                conn.execute(
+                    'INSERT INTO series (name, labels, value) VALUES (?, ?, ?) '
+                    'ON CONFLICT (name, labels) DO UPDATE SET value = excluded.value',
+                    (name, labels, json.dumps(value))
+                )
+            conn.executemany(
+                'INSERT INTO gauges (process, name, labels, value, updated) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (process, name, labels) DO UPDATE SET value = excluded.value, updated = excluded.updated',
+                [(process, name, json.dumps(labels), json.dumps(value), now) for (name, labels), value in gauges]
+            )
+            # Jauges des processus arrêtés
+            conn.execute('DELETE FROM gauges WHERE updated < ?', (now - STALE_GAUGE_INTERVALS * METRICS_FLUSH_INTERVAL,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def read(self, stale_before):
+        conn = self._connection()
+        return conn.execute('SELECT name, labels, value FROM series').fetchall() + conn.execute(
+            'SELECT name, labels, value FROM gauges WHERE updated >= ?', (stale_before,)
+        ).fetchall()
+
+    def clear(self):
+        conn = self._connection()
+        conn.execute('DELETE FROM series')
+        conn.execute('DELETE FROM gauges')
+
+
+registry = Registry()
+_store = None
+_state_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_process = None
+_flusher_pid = None
+_installed = False
+
+
+def get_store():
+    global _store
+    with _state_lock:
+        if _store is None:
+            _store = SharedMetricsStore(METRICS_DB_PATH)
+        return _store
+
+
+def _labels(**labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _ensure_flusher():
+    # Le thread ne survit pas à un fork (workers gunicorn) : un par processus
+    global _process, _flusher_pid
+    if _flusher_pid == os.getpid():
+        return
+    with _state_lock:
+        if _flusher_pid == os.getpid():
+            return
+        if _flusher_pid is not None:
+            # Incréments hérités du parent : c'est lui qui les recopie
+            registry.reset()
+        _process = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        _flusher_pid = os.getpid()
+        threading.Thread(target=_flush_loop, name='metrics-flush', daemon=True).start()
+
+
+def _flush_loop():
+    while True:
+        time.sleep(METRICS_FLUSH_INTERVAL)
+        flush()
+
+
+def flush():
+    """
+    Ajoute les incréments et les jauges du processus au fichier partagé
+    """
+    if _flusher_pid != os.getpid():
+        return
+    # Un seul passage à la fois (thread, /metrics, atexit)
+    with _flush_lock:
+        deltas = registry.take()
+        gauges = [((name, ()), callback()) for name, callback in GAUGE_CALLBACKS.items()]
+        try:
+            get_store().write(_process, deltas, gauges)
+        except sqlite3.Error as e:
+            # Incréments remis à ajouter au prochain passage
+            registry.restore(deltas)
+            logger.warning("Métriques non enregistrées: %s", e)
+
+
+atexit.register(flush)
+
+
+def inc(name, amount=1, **labels):
+    _ensure_flusher()
+    registry.inc(name, _labels(**labels), amount)
+
+
+def observe(name, value, **labels):
+    _ensure_flusher()
+    registry.observe(name, _labels(**labels), value)
+
+
+def cache_result(cache_name, result, count=1):
+    if count:
+        inc('cache_requests_total', count, cache=cache_name, result=result)
+
+
+def _count_query(execute, sql, params, many, context):
+    queries = _request_view.get()
+    if queries is not None:
+        queries.count += 1
+    else:
+        inc('db_queries_total', view='-')
+    return execute(sql, params, many, context)
+
+
+def _add_wrapper(connection, **kwargs):
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+def install():
+    """
+    Compte les requêtes SQL de toutes les connexions (une fois par processus)
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    connection_created.connect(_add_wrapper, dispatch_uid='api.metrics')
+    for connection in connections.all(initialized_only=True):
+        _add_wrapper(connection)
+
+
+def start_request():
+    return time.perf_counter(), _request_view.set(_RequestQueries())
+
+
+def finish_request(request, response, started, token):
+    queries = _request_view.get()
+    _request_view.reset(token)
+    match = getattr(request, 'resolver_match', None)
+    # Nom de route et non chemin : cardinalité bornée
+    view = match.view_name if match else 'unmatched'
+    status = response.status_code if response is not None else 500
+    observe('http_request_duration_seconds', time.perf_counter() - started,
+            view=view, method=request.method, status=status)
+    if queries.count:
+        inc('db_queries_total', queries.count, view=view)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _format_number(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def collect():
+    """
+    Séries de tous les processus, additionnées : {(nom, labels): valeur}
+    """
+    _ensure_flusher()
+    flush()
+    stale_before = time.time() - STALE_GAUGE_INTERVALS * METRICS_FLUSH_INTERVAL
+    totals = {}
+    for name, labels, value in get_store().read(stale_before):
+        if name not in METRICS:
+            continue
+        key = (name, tuple(tuple(pair) for pair in json.loads(labels)))
+        value = json.loads(value)
+        current = totals.get(key)
+        totals[key] = value if current is None else _add(current, value)
+    return totals
+
+
+def render():
+    """
+    Texte d'exposition Prometheus (version 0.0.4)
+    """
+    totals = collect()
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series = sorted((labels, value) for (series_name, labels), value in totals.items() if series_name == name)
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in series:
+            if kind != HISTOGRAM:
+                lines.append(f'{name}{_format_labels(labels)} {_format_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(list(buckets) + ['+Inf'], value):
+                cumulative += count
+                le = bound if bound == '+Inf' else _format_number(float(bound))
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", le),))} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_number(round(value[-2], 6))}')
+            lines.append(f'{name}_count{_format_labels(labels)} {value[-1]}')
+
+    # Ratio calculé ici pour les tableaux de bord sans PromQL
+    hits, reads = {}, {}
+    for (name, labels), value in totals.items():
+        if name == 'cache_requests_total':
+            labels = dict(labels)
+            reads[labels['cache']] = reads.get(labels['cache'], 0) + value
+            if labels['result'] == 'hit':
+                hits[labels['cache']] = hits.get(labels['cache'], 0) + value
+    lines.append('# HELP cache_hit_ratio Part des lectures de cache servies par le cache')
+    lines.append('# TYPE cache_hit_ratio gauge')
+    for cache_name in sorted(reads):
+        ratio = hits.get(cache_name, 0) / reads[cache_name]
+        lines.append(f'cache_hit_ratio{_format_labels((("cache", cache_name),))} {round(ratio, 4)}')
+    return '\n'.join(lines) + '\n'
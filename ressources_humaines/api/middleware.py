@@ -0,0 +1,186 @@
+"""
+Middlewares de l'API
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework import exceptions
+from rest_framework.request import Request
+
+from . import logs, metrics, profiling, routers
+from .authentication import CachedTokenAuthentication
+
+
+class AsgiRoutesMiddleware(MiddlewareMixin):
+    """
+    Requêtes reçues par l'application ASGI : résolution avec ASGI_URLCONF
+    (vues asynchrones en priorité, puis les routes habituelles)
+    """
+
+    def process_request(self, request):
+        if isinstance(request, ASGIRequest):
+            request.urlconf = settings.ASGI_URLCONF
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Délimite la requête pour api.routers.ReplicaRouter (lectures sur les
+    réplicas, maintien sur la base principale après une écriture)
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = routers.start_request(request)
+        response = None
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.finish_request(request, response, token)
+        return response
+
+    async def __acall__(self, request):
+        token = routers.start_request(request)
+        response = None
+        try:
+            response = await self.get_response(request)
+        finally:
+            routers.finish_request(request, response, token)
+        return response
+
+
+class RequestIdMiddleware:
+    """
+    Identifiant de requête (en-tête X-Request-ID reçu ou généré) : repris
+    dans chaque ligne de log et renvoyé dans la réponse
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _start(self, request):
+        request.id = logs.new_request_id(request.headers.get(logs.REQUEST_ID_HEADER))
+        return logs.request_id_var.set(request.id)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = self._start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            logs.request_id_var.reset(token)
+        response[logs.REQUEST_ID_HEADER] = request.id
+        return response
+
+    async def __acall__(self, request):
+        token = self._start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            logs.request_id_var.reset(token)
+        response[logs.REQUEST_ID_HEADER] = request.id
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Mesures par requête (api.profiling), si PROFILING_ENABLED
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        profiling.install()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _wants_cprofile(self, request):
+        # Authentification faite plus tard par DRF : token vérifié ici (cache)
+        if request.headers.get(profiling.PROFILE_HEADER) != '1':
+            return False
+        try:
+            result = CachedTokenAuthentication().authenticate(Request(request))
+        except exceptions.AuthenticationFailed:
+            return False
+        return result is not None and getattr(result[0], 'role', None) == 'admin'
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        profiler = profiling.start_cprofile() if self._wants_cprofile(request) else None
+        profile, token = profiling.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiling.stop(profile, token)
+        if profiler is not None:
+            response['X-Profile-Dump'] = profiling.dump_cprofile(profiler, request)
+        profiling.report(request, response, profile)
+        return response
+
+    async def __acall__(self, request):
+        # Pas de cProfile : il mesurerait toutes les tâches de la boucle
+        profile, token = profiling.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiling.stop(profile, token)
+        profiling.report(request, response, profile)
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Durée et nombre de requêtes SQL de chaque requête (api.metrics), si METRICS_ENABLED
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        metrics.install()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started, token = metrics.start_request()
+        response = None
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.finish_request(request, response, started, token)
+        return response
+
+    async def __acall__(self, request):
+        started, token = metrics.start_request()
+        response = None
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.finish_request(request, response, started, token)
+        return response
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:02
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_uploadsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecruteurEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('candidature.created', 'Nouvelle candidature'), ('candidature.updated', 'Candidature modifiée'), ('analysis.completed', 'Analyse IA terminée')], max_length=50)),
+                ('payload', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('recruteur', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='api.recruteur')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['recruteur', 'id'], name='api_recrute_recrute_cc6871_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:07
+
+from django.db import migrations, models
+
+
+def backfill_daily_stats(apps, schema_editor):
+    # Historique complet, comme reconcile_daily_stats --all
+    from api import rollup
+    rollup.reconcile(rollup.first_day(apps), rollup.local_day(), apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_recruteurevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('inscriptions_candidats', models.IntegerField(default=0)),
+                ('inscriptions_recruteurs', models.IntegerField(default=0)),
+                ('inscriptions_admins', models.IntegerField(default=0)),
+                ('jobs_crees', models.IntegerField(default=0)),
+                ('candidatures', models.IntegerField(default=0)),
+                ('candidatures_en_attente', models.IntegerField(default=0)),
+                ('candidatures_acceptees', models.IntegerField(default=0)),
+                ('candidatures_refusees', models.IntegerField(default=0)),
+                ('acceptations', models.IntegerField(default=0)),
+                ('refus', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Statistique journalière',
+                'verbose_name_plural': 'Statistiques journalières',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
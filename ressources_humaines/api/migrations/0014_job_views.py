@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_dailystat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='impressions',
+            field=models.PositiveIntegerField(default=0, help_text='Affichages dans les listes'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='vues',
+            field=models.PositiveIntegerField(default=0, help_text='Consultations de la fiche détaillée'),
+        ),
+        migrations.CreateModel(
+            name='DailyJobViews',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('vues', models.PositiveIntegerField(default=0)),
+                ('impressions', models.PositiveIntegerField(default=0)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_views', to='api.job')),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('job', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_job_views'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatutTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ancien_statut', models.CharField(blank=True, choices=[('en_attente', 'En Attente'), ('acceptee', 'Acceptée'), ('refusee', 'Refusée')], max_length=20, null=True)),
+                ('nouveau_statut', models.CharField(choices=[('en_attente', 'En Attente'), ('acceptee', 'Acceptée'), ('refusee', 'Refusée')], max_length=20)),
+                ('date', models.DateTimeField(auto_now_add=True)),
+                ('delai', models.PositiveIntegerField(blank=True, help_text='Secondes écoulées depuis le dépôt de la candidature', null=True)),
+                ('candidature', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transitions', to='api.candidature')),
+            ],
+            options={
+                'ordering': ['date'],
+                'indexes': [models.Index(fields=['nouveau_statut', 'delai'], name='api_statutt_nouveau_3b54d0_idx')],
+            },
+        ),
+    ]
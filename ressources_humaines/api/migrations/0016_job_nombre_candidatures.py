@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:13
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_nombre_candidatures(apps, schema_editor):
+    Job = apps.get_model('api', 'Job')
+    Candidature = apps.get_model('api', 'Candidature')
+    count = (
+        Candidature.objects
+        .filter(job=OuterRef('pk'))
+        .order_by()
+        .values('job')
+        .annotate(n=Count('id'))
+        .values('n')
+    )
+    Job.objects.update(nombre_candidatures=Coalesce(Subquery(count), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_statuttransition'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='nombre_candidatures',
+            field=models.PositiveIntegerField(default=0, help_text='Compteur maintenu par les signaux (voir reconcile_daily_stats)'),
+        ),
+        migrations.RunPython(backfill_nombre_candidatures, migrations.RunPython.noop),
+    ]
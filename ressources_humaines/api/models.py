@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser, UserManager
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+import uuid
 
 class CustomUserManager(UserManager):
     use_in_migrations = True
@@ -119,6 +121,14 @@ class Job(models.Model):
         help_text='Date limite pour postuler'
     )
     active = models.BooleanField(default=True)
+    # Colonnes incrémentées hors des formulaires, jamais réécrites par une modification
+    COUNTER_FIELDS = ('vues', 'impressions', 'nombre_candidatures')
+    vues = models.PositiveIntegerField(default=0, help_text='Consultations de la fiche détaillée')
+    impressions = models.PositiveIntegerField(default=0, help_text='Affichages dans les listes')
+    nombre_candidatures = models.PositiveIntegerField(
+        default=0,
+        help_text='Compteur maintenu par les signaux (voir reconcile_daily_stats)'
+    )
     
     class Meta:
         ordering = ['-date_creation']
@@ -165,6 +175,13 @@ class Candidature(models.Model):
     class Meta:
         ordering = ['-date_candidature']
         unique_together = ['candidat', 'job']
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Statut lu en base, pour détecter les changements au prochain save
+        instance._statut_initial = instance.__dict__.get('statut')
+        return instance
     
     def __str__(self):
         return f"{self.candidat.email} - {self.job.titre} - {self.get_statut_display()}"
@@ -236,4 +253,145 @@ class CVAnalysis(models.Model):
     def __str__(self):
         if self.overall_score is not None:
             return f"Analyse {self.candidature} - Score: {self.overall_score:.2f}"
-        return f"Analyse {self.candidature} - En cours"
\ No newline at end of file
+        return f"Analyse {self.candidature} - En cours"
+
+
+class UploadSession(models.Model):
+    KIND_CHOICES = [
+        ('cv', 'CV'),
+        ('lettre_motivation', 'Lettre de motivation'),
+    ]
+    STATUT_CHOICES = [
+        ('en_cours', 'En cours'),
+        ('terminee', 'Terminée'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveIntegerField(help_text='Taille totale annoncée en octets')
+    offset = models.PositiveIntegerField(default=0, help_text='Nombre d\'octets déjà reçus')
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='en_cours')
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_modification = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date_creation']
+
+    @property
+    def part_name(self):
+        return f'uploads/partial/{self.id}.part'
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.total_size}) - {self.get_statut_display()}"
+
+
+class RecruteurEvent(models.Model):
+    TYPE_CHOICES = [
+        ('candidature.created', 'Nouvelle candidature'),
+        ('candidature.updated', 'Candidature modifiée'),
+        ('analysis.completed', 'Analyse IA terminée'),
+    ]
+
+    recruteur = models.ForeignKey(
+        Recruteur,
+        on_delete=models.CASCADE,
+        related_name='events'
+    )
+    type = models.CharField(max_length=50, choices=TYPE_CHOICES)
+    payload = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    date_creation = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['recruteur', 'id']),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.type} ({self.recruteur_id})"
+
+
+class DailyStat(models.Model):
+    """
+    Agrégats journaliers (jour local Europe/Paris), tenus à jour par les
+    signaux et recalculés chaque nuit par reconcile_daily_stats.
+    """
+    date = models.DateField(unique=True)
+
+    inscriptions_candidats = models.IntegerField(default=0)
+    inscriptions_recruteurs = models.IntegerField(default=0)
+    inscriptions_admins = models.IntegerField(default=0)
+
+    jobs_crees = models.IntegerField(default=0)
+
+    # Candidatures déposées ce jour, ventilées par statut actuel
+    candidatures = models.IntegerField(default=0)
+    candidatures_en_attente = models.IntegerField(default=0)
+    candidatures_acceptees = models.IntegerField(default=0)
+    candidatures_refusees = models.IntegerField(default=0)
+
+    # Décisions prises ce jour
+    acceptations = models.IntegerField(default=0)
+    refus = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['date']
+        verbose_name = 'Statistique journalière'
+        verbose_name_plural = 'Statistiques journalières'
+
+    def __str__(self):
+        return f"Statistiques du {self.date}"
+
+
+class DailyJobViews(models.Model):
+    job = models.ForeignKey(
+        Job,
+        on_delete=models.CASCADE,
+        related_name='daily_views'
+    )
+    date = models.DateField()
+    vues = models.PositiveIntegerField(default=0)
+    impressions = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['date']
+        unique_together = ['job', 'date']
+
+    def __str__(self):
+        return f"{self.job_id} - {self.date}: {self.vues} vues"
+
+
+class StatutTransition(models.Model):
+    candidature = models.ForeignKey(
+        Candidature,
+        on_delete=models.CASCADE,
+        related_name='transitions'
+    )
+    ancien_statut = models.CharField(
+        max_length=20,
+        choices=Candidature.STATUT_CHOICES,
+        null=True,
+        blank=True
+    )
+    nouveau_statut = models.CharField(max_length=20, choices=Candidature.STATUT_CHOICES)
+    date = models.DateTimeField(auto_now_add=True)
+    delai = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text='Secondes écoulées depuis le dépôt de la candidature'
+    )
+
+    class Meta:
+        ordering = ['date']
+        indexes = [
+            models.Index(fields=['nouveau_statut', 'delai']),
+        ]
+
+    def __str__(self):
+        return f"{self.candidature_id}: {self.ancien_statut} → {self.nouveau_statut}"
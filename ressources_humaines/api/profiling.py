@@ -0,0 +1,183 @@
+"""
+Profilage par requête (activé par PROFILING_ENABLED)
+
+Pour chaque requête : nombre et durée des requêtes SQL (avec les requêtes
+répétées, signe d'un N+1), temps de sérialisation, temps des vérifications de
+permissions et temps total. Le résultat part dans l'en-tête Server-Timing ;
+une fraction des requêtes (et toutes celles qui répètent des requêtes SQL)
+est gardée dans un tampon circulaire en mémoire, consultable par les admins
+(/api/admin/profiling/). Un admin peut demander un profil cProfile complet
+avec l'en-tête X-Profile: 1 (sous WSGI).
+
+Les mesures passent par une ContextVar : elles suivent la requête dans les
+threads de l'ORM asynchrone. Le SQL inclus dans la sérialisation est compté
+dans les deux durées.
+"""
+import cProfile
+import random
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework.serializers import BaseSerializer
+from rest_framework.views import APIView
+
+PROFILING_SAMPLE_RATE = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.1)
+PROFILING_BUFFER_SIZE = getattr(settings, 'PROFILING_BUFFER_SIZE', 200)
+PROFILING_DUMP_DIR = Path(getattr(settings, 'PROFILING_DUMP_DIR', settings.BASE_DIR / 'profiles'))
+PROFILE_HEADER = 'X-Profile'
+MAX_REPORTED_DUPLICATES = 5
+
+_current = ContextVar('request_profile', default=None)
+_recent = deque(maxlen=PROFILING_BUFFER_SIZE)
+_recent_lock = threading.Lock()
+_installed = False
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []  # (sql, durée en secondes)
+        self.timings = Counter()
+        self._depth = Counter()
+
+    @property
+    def sql_time(self):
+        return sum(duration for _, duration in self.queries)
+
+    def duplicates(self):
+        """
+        Requêtes SQL exécutées plusieurs fois (même texte, paramètres quelconques)
+        """
+        counts = Counter(sql for sql, _ in self.queries)
+        return [(sql, count) for sql, count in counts.most_common() if count > 1]
+
+
+def _record_query(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.queries.append((sql, time.perf_counter() - started))
+
+
+def _add_wrapper(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _timed(name, func):
+    """
+    Cumule la durée de `func` sous `name` (appels imbriqués comptés une fois)
+    """
+    def wrapper(*args, **kwargs):
+        profile = _current.get()
+        if profile is None:
+            return func(*args, **kwargs)
+        profile._depth[name] += 1
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile._depth[name] -= 1
+            if not profile._depth[name]:
+                profile.timings[name] += time.perf_counter() - started
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+def install():
+    """
+    Installe les points de mesure (une fois par processus)
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    connection_created.connect(_add_wrapper, dispatch_uid='api.profiling')
+    for connection in connections.all(initialized_only=True):
+        _add_wrapper(connection)
+    BaseSerializer.data = property(_timed('serializer', BaseSerializer.data.fget))
+    APIView.check_permissions = _timed('permissions', APIView.check_permissions)
+    APIView.check_object_permissions = _timed('permissions', APIView.check_object_permissions)
+
+
+def start():
+    profile = RequestProfile()
+    return profile, _current.set(profile)
+
+
+def stop(profile, token):
+    profile.total = time.perf_counter() - profile.started
+    _current.reset(token)
+
+
+def report(request, response, profile):
+    """
+    En-tête Server-Timing, et ajout au tampon si la requête est échantillonnée
+    ou répète des requêtes SQL
+    """
+    duplicates = profile.duplicates()
+    metrics = [
+        # Valeur d'en-tête en ASCII
+        ('sql', profile.sql_time, f'{len(profile.queries)} queries, {sum(c - 1 for _, c in duplicates)} dup'),
+        ('serializer', profile.timings['serializer'], None),
+        ('permissions', profile.timings['permissions'], None),
+        ('total', profile.total, None),
+    ]
+    response['Server-Timing'] = ', '.join(
+        f'{name};dur={duration * 1000:.1f}' + (f';desc="{desc}"' if desc else '')
+        for name, duration, desc in metrics
+    )
+    if duplicates or random.random() < PROFILING_SAMPLE_RATE:
+        match = getattr(request, 'resolver_match', None)
+        entry = {
+            'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'request_id': getattr(request, 'id', None),
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(profile.total * 1000, 1),
+            'sql_count': len(profile.queries),
+            'sql_ms': round(profile.sql_time * 1000, 1),
+            'serializer_ms': round(profile.timings['serializer'] * 1000, 1),
+            'permissions_ms': round(profile.timings['permissions'] * 1000, 1),
+            'duplicates': [{'sql': sql, 'count': count} for sql, count in duplicates[:MAX_REPORTED_DUPLICATES]],
+        }
+        with _recent_lock:
+            _recent.append(entry)
+
+
+def recent():
+    """
+    Requêtes profilées de ce processus, de la plus récente à la plus ancienne
+    """
+    with _recent_lock:
+        return list(reversed(_recent))
+
+
+def start_cprofile():
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def dump_cprofile(profiler, request):
+    """
+    Écrit le profil (à lire avec pstats ou snakeviz) et renvoie le nom du fichier
+    """
+    profiler.disable()
+    PROFILING_DUMP_DIR.mkdir(parents=True, exist_ok=True)
+    name = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{getattr(request, 'id', None) or id(request)}.prof"
+    profiler.dump_stats(PROFILING_DUMP_DIR / name)
+    return name
@@ -0,0 +1,152 @@
+"""
+Table d'agrégats journaliers (DailyStat)
+
+Les signaux appliquent des incréments atomiques (UPDATE ... SET n = n + 1),
+la commande reconcile_daily_stats recalcule les jours depuis les tables
+sources pour corriger toute dérive.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import CustomUser, Job, Candidature, DailyStat
+
+ROLE_FIELDS = {
+    'candidat': 'inscriptions_candidats',
+    'recruteur': 'inscriptions_recruteurs',
+    'admin': 'inscriptions_admins',
+}
+STATUT_FIELDS = {
+    'en_attente': 'candidatures_en_attente',
+    'acceptee': 'candidatures_acceptees',
+    'refusee': 'candidatures_refusees',
+}
+DECISION_FIELDS = {
+    'acceptee': 'acceptations',
+    'refusee': 'refus',
+}
+COUNTER_FIELDS = [
+    field.name for field in DailyStat._meta.get_fields()
+    if field.name not in ('id', 'date')
+]
+
+
+def local_day(value=None):
+    return timezone.localdate(value or timezone.now())
+
+
+def increment(day, **deltas):
+    """
+    Incrément atomique des compteurs du jour, création de la ligne si absente
+    """
+    deltas = {field: n for field, n in deltas.items() if field and n}
+    if not deltas:
+        return
+    updates = {field: F(field) + n for field, n in deltas.items()}
+    if DailyStat.objects.filter(date=day).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            DailyStat.objects.create(date=day, **deltas)
+    except IntegrityError:
+        # Ligne créée entre-temps par une requête concurrente
+        DailyStat.objects.filter(date=day).update(**updates)
+
+
+def _daily_counts(queryset, date_field, start, end, **aggregates):
+    tz = timezone.get_current_timezone()
+    rows = (
+        queryset
+        .annotate(day=TruncDate(date_field, tzinfo=tz))
+        .filter(day__gte=start, day__lte=end)
+        .values('day')
+        .annotate(**aggregates)
+        .order_by()
+    )
+    return {row.pop('day'): row for row in rows}
+
+
+def _models(apps=None):
+    # Modèles historiques quand la fonction est appelée depuis une migration
+    if apps is None:
+        return CustomUser, Job, Candidature, DailyStat
+    return tuple(apps.get_model('api', name) for name in ('CustomUser', 'Job', 'Candidature', 'DailyStat'))
+
+
+def first_day(apps=None):
+    CustomUser, Job, Candidature, _ = _models(apps)
+    dates = [
+        CustomUser.objects.order_by('date_joined').values_list('date_joined', flat=True).first(),
+        Job.objects.order_by('date_creation').values_list('date_creation', flat=True).first(),
+        Candidature.objects.order_by('date_candidature').values_list('date_candidature', flat=True).first(),
+    ]
+    dates = [local_day(d) for d in dates if d]
+    return min(dates) if dates else local_day()
+
+
+def reconcile(start, end, apps=None):
+    """
+    Recalcule les lignes DailyStat de `start` à `end` (inclus) en une requête
+    groupée par table source. Renvoie le nombre de jours écrits.
+    """
+    CustomUser, Job, Candidature, DailyStat = _models(apps)
+    users = _daily_counts(
+        CustomUser.objects, 'date_joined', start, end,
+        **{field: Count('id', filter=Q(role=role)) for role, field in ROLE_FIELDS.items()}
+    )
+    jobs = _daily_counts(Job.objects, 'date_creation', start, end, jobs_crees=Count('id'))
+    candidatures = _daily_counts(
+        Candidature.objects, 'date_candidature', start, end,
+        candidatures=Count('id'),
+        **{field: Count('id', filter=Q(statut=statut)) for statut, field in STATUT_FIELDS.items()}
+    )
+    # Sans historique des transitions, la date de modification sert de date de décision
+    decisions = _daily_counts(
+        Candidature.objects.filter(statut__in=DECISION_FIELDS), 'date_modification', start, end,
+        **{field: Count('id', filter=Q(statut=statut)) for statut, field in DECISION_FIELDS.items()}
+    )
+
+    existing = {stat.date: stat for stat in DailyStat.objects.filter(date__gte=start, date__lte=end)}
+    to_create, to_update = [], []
+    day = start
+    while day <= end:
+        values = dict.fromkeys(COUNTER_FIELDS, 0)
+        for source in (users, jobs, candidatures, decisions):
+            values.update(source.get(day, {}))
+        stat = existing.get(day)
+        if stat is None:
+            to_create.append(DailyStat(date=day, **values))
+        else:
+            for field, value in values.items():
+                setattr(stat, field, value)
+            to_update.append(stat)
+        day += timedelta(days=1)
+
+    with transaction.atomic():
+        DailyStat.objects.bulk_create(to_create, batch_size=500)
+        DailyStat.objects.bulk_update(to_update, COUNTER_FIELDS, batch_size=500)
+    return len(to_create) + len(to_update)
+
+
+def sync_job_counters():
+    """
+    Recalcule Job.nombre_candidatures en un UPDATE corrélé limité aux offres
+    dont le compteur a dérivé. Renvoie le nombre d'offres corrigées.
+    """
+    count = (
+        Candidature.objects
+        .filter(job=OuterRef('pk'))
+        .order_by()
+        .values('job')
+        .annotate(n=Count('id'))
+        .values('n')
+    )
+    actual = Coalesce(Subquery(count), 0)
+    return (
+        Job.objects.annotate(actual=actual)
+        .exclude(nombre_candidatures=F('actual'))
+        .update(nombre_candidatures=actual)
+    )
@@ -0,0 +1,116 @@
+"""
+Routage des lectures vers les réplicas (DATABASE_REPLICAS)
+
+Seules les lectures des requêtes HTTP sûres (GET, HEAD, OPTIONS) vont sur un
+réplica tiré au hasard. Tout le reste reste sur la base principale :
+écritures, transactions, commandes, threads d'arrière-plan. Dès qu'une
+requête écrit, ses lectures suivantes passent sur la principale, et le client
+y reste REPLICA_STICKY_SECONDS secondes pour relire ses propres modifications
+malgré le retard de réplication.
+
+Le client est identifié par son token (en-tête Authorization) ou son cookie
+de session ; une connexion ou une inscription qui écrit marque aussi le token
+ou la session renvoyés dans la réponse. Les clients anonymes ne sont pas
+maintenus (l'adresse IP regrouperait tous les clients d'un même NAT). Le
+marqueur est stocké dans le cache par défaut, partagé entre les workers
+(REDIS_URL, exigé par les settings dès qu'un réplica est configuré).
+"""
+import hashlib
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICAS = list(getattr(settings, 'DATABASE_REPLICAS', []))
+REPLICA_STICKY_SECONDS = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingState:
+    """
+    État d'une requête, partagé par les threads qui la servent (ORM asynchrone)
+    """
+
+    def __init__(self, use_replicas):
+        self.use_replicas = use_replicas
+        self.wrote = False
+
+
+_state = ContextVar('replica_routing', default=None)
+
+
+def _sticky_key(kind, credential):
+    return f"db_primary:{kind}:{hashlib.sha256(credential.encode()).hexdigest()}"
+
+
+def _request_keys(request):
+    keys = []
+    auth = request.headers.get('Authorization', '').split()
+    if auth:
+        # "Token <clé>" : la clé seule, comme celle renvoyée à la connexion
+        keys.append(_sticky_key('auth', auth[-1]))
+    session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session:
+        keys.append(_sticky_key('session', session))
+    return keys
+
+
+def _response_keys(response):
+    """
+    Identifiants que le client enverra ensuite (connexion, inscription)
+    """
+    keys = []
+    data = getattr(response, 'data', None)
+    if isinstance(data, dict) and isinstance(data.get('token'), str):
+        keys.append(_sticky_key('auth', data['token']))
+    cookie = response.cookies.get(settings.SESSION_COOKIE_NAME)
+    if cookie is not None and cookie.value:
+        keys.append(_sticky_key('session', cookie.value))
+    return keys
+
+
+def start_request(request):
+    if not REPLICAS:
+        return None
+    keys = _request_keys(request)
+    use_replicas = request.method in SAFE_METHODS and not (keys and cache.get_many(keys))
+    return _state.set(RoutingState(use_replicas))
+
+
+def finish_request(request, response, token):
+    if token is None:
+        return
+    state = _state.get()
+    _state.reset(token)
+    if state.wrote:
+        keys = _request_keys(request) + (_response_keys(response) if response is not None else [])
+        if keys:
+            cache.set_many({key: True for key in keys}, REPLICA_STICKY_SECONDS)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # Objet lié : même base que l'instance d'origine
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        state = _state.get()
+        if state is None or not state.use_replicas or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.use_replicas = False
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Les réplicas reçoivent le schéma par réplication
+        return db not in REPLICAS
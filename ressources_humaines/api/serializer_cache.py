@@ -0,0 +1,132 @@
+"""
+Cache des représentations sérialisées
+
+Chaque objet est mis en cache sous (classe de serializer et ses champs
+lisibles, modèle, pk, versions, hôte de la requête). Les versions sont incrémentées par les
+signaux de sauvegarde/suppression : une modification change la clé, les
+anciens fragments expirent d'eux-mêmes. Une liste fait deux allers-retours
+au cache (versions puis fragments) et ne sérialise que les objets modifiés.
+
+Actif seulement avec un cache partagé (SERIALIZER_CACHE_ENABLED, vrai avec
+REDIS_URL) : dans la mémoire locale d'un worker, l'incrément de version
+n'atteindrait pas les autres, qui serviraient l'ancienne représentation.
+"""
+import time
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import serializers
+
+from . import metrics
+
+SERIALIZER_CACHE_ENABLED = getattr(settings, 'SERIALIZER_CACHE_ENABLED', False)
+SERIALIZER_CACHE_TTL = getattr(settings, 'SERIALIZER_CACHE_TTL', 300)  # secondes
+VERSION_TTL = None  # les versions ne doivent pas expirer avant les fragments
+
+
+def _version_key(label, pk):
+    return f'serial_version:{label}:{pk}'
+
+
+def bump(label, pk):
+    """
+    Invalide les fragments qui dépendent de (modèle, pk)
+    """
+    if not SERIALIZER_CACHE_ENABLED:
+        return
+    key = _version_key(label, pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Version absente : nouvelle valeur jamais utilisée auparavant
+        cache.set(key, time.time_ns(), VERSION_TTL)
+
+
+def _versions(keys):
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    for key, value in missing.items():
+        if not cache.add(key, value, VERSION_TTL):
+            value = cache.get(key, value)
+        versions[key] = value
+    return versions
+
+
+def _variant(serializer):
+    # Les URL absolues (logos...) dépendent de l'hôte de la requête
+    request = serializer.context.get('request')
+    return request.build_absolute_uri('/') if request is not None else ''
+
+
+def _shape(serializer):
+    # Champs exposés : un champ ajouté ou masqué n'est pas servi depuis d'anciens fragments
+    readable = ','.join(name for name, field in serializer.fields.items() if not field.write_only)
+    return format(zlib.crc32(readable.encode()), 'x')
+
+
+def represent(serializer, instances):
+    """
+    Représentations de `instances` par `serializer`, depuis le cache quand
+    aucune dépendance n'a changé
+    """
+    cls = type(serializer)
+    prefix = f'serial:{cls.__module__}.{cls.__qualname__}:{_shape(serializer)}:{_variant(serializer)}'
+    dependencies = [
+        [_version_key(label, pk) for label, pk in serializer.cache_dependencies(instance)]
+        for instance in instances
+    ]
+    versions = _versions({key for keys in dependencies for key in keys})
+    keys = [
+        f'{prefix}:{instance._meta.label_lower}:{instance.pk}:' + '.'.join(str(versions[k]) for k in deps)
+        for instance, deps in zip(instances, dependencies)
+    ]
+
+    cached = cache.get_many(keys)
+    fresh = {}
+    result = []
+    for instance, key in zip(instances, keys):
+        data = cached.get(key)
+        if data is None:
+            data = fresh[key] = dict(serializer.fresh_representation(instance))
+        data = dict(data)
+        for name in serializer.cache_volatile_fields:
+            field = serializer.fields[name]
+            data[name] = field.to_representation(field.get_attribute(instance))
+        result.append(data)
+    if fresh:
+        cache.set_many(fresh, SERIALIZER_CACHE_TTL)
+    metrics.cache_result('serializer', 'hit', len(instances) - len(fresh))
+    metrics.cache_result('serializer', 'miss', len(fresh))
+    return result
+
+
+class CachedListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        if not SERIALIZER_CACHE_ENABLED:
+            return super().to_representation(data)
+        instances = list(data.all() if hasattr(data, 'all') else data)
+        return represent(self.child, instances)
+
+
+class CachedRepresentationMixin:
+    """
+    À placer avant ModelSerializer, avec Meta.list_serializer_class =
+    CachedListSerializer.
+
+    - cache_dependencies : (modèle, pk) dont les versions forment la clé ;
+    - cache_volatile_fields : champs relus sur l'instance à chaque fois
+      (compteurs mis à jour par UPDATE, sans signal).
+    """
+    cache_volatile_fields = ()
+
+    def cache_dependencies(self, instance):
+        return [(instance._meta.label_lower, instance.pk)]
+
+    def to_representation(self, instance):
+        if not SERIALIZER_CACHE_ENABLED or instance.pk is None:
+            return self.fresh_representation(instance)
+        return represent(self, [instance])[0]
+
+    def fresh_representation(self, instance):
+        return super().to_representation(instance)
@@ -1,35 +1,50 @@
 from rest_framework import serializers
+from django.contrib.auth.hashers import make_password
 from django.core.validators import RegexValidator, FileExtensionValidator
-from .models import CustomUser, Candidat, Recruteur, Candidature, Job
+from .models import CustomUser, Candidat, Recruteur, Candidature, Job, UploadSession
+from . import uploads
+from .sirene import siret_valide
+from .serializer_cache import CachedRepresentationMixin, CachedListSerializer
 import re
 import logging
 
+PASSWORD_KWARGS = {'write_only': True}
+
+
 class PasswordMixin:
+    # Le mixin n'étant pas un Serializer, ce champ déclaré est ignoré par DRF :
+    # chaque Meta déclare aussi PASSWORD_KWARGS (le hash ne sort jamais)
     password = serializers.CharField(write_only=True, required=False)
 
-    def handle_password(self, instance, password):
-        if password:
-            instance.set_password(password)
-            instance.save()
-        return instance
 
     def create(self, validated_data):
         password = validated_data.pop('password', None)
         if not password:
             raise serializers.ValidationError({'password': 'Ce champ est requis.'})
-        instance = super().create(validated_data)
-        return self.handle_password(instance, password)
+        # Haché avant l'insertion : une seule écriture au lieu de create + save
+        validated_data['password'] = make_password(password)
+        return super().create(validated_data)
 
     def update(self, instance, validated_data):
+        # Seules les colonnes reçues sont écrites : le mot de passe ou un champ
+        # modifié ailleurs entre la lecture et l'écriture n'est pas écrasé
         password = validated_data.pop('password', None)
-        instance = super().update(instance, validated_data)
-        return self.handle_password(instance, password)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        update_fields = list(validated_data)
+        if password:
+            instance.set_password(password)
+            update_fields.append('password')
+        if update_fields:
+            instance.save(update_fields=update_fields)
+        return instance
 
 
 class UserSerializer(PasswordMixin, serializers.ModelSerializer):
     class Meta:
         model = CustomUser
         fields = ['id', 'email', 'password', 'role']
+        extra_kwargs = {'password': PASSWORD_KWARGS}
 
 
 class CandidatSerializer(PasswordMixin, serializers.ModelSerializer):
@@ -41,13 +56,14 @@ class CandidatSerializer(PasswordMixin, serializers.ModelSerializer):
             'date_naissance', 'poste_actuel', 'entreprise_actuelle', 'linkedin',
         ]
         read_only_fields = ['role']
+        extra_kwargs = {'password': PASSWORD_KWARGS}
 
     def create(self, validated_data):
         validated_data['role'] = 'candidat'
         return super().create(validated_data)
 
 
-class RecruteurSerializer(PasswordMixin, serializers.ModelSerializer):
+class RecruteurSerializer(CachedRepresentationMixin, PasswordMixin, serializers.ModelSerializer):
     siret = serializers.CharField(
         validators=[RegexValidator(
             regex=r'^\d{14}$',
@@ -71,7 +87,9 @@ class RecruteurSerializer(PasswordMixin, serializers.ModelSerializer):
             'localisation', 'logo', 'site_web',
         ]
         read_only_fields = ['role']
+        list_serializer_class = CachedListSerializer
         extra_kwargs = {
+            'password': PASSWORD_KWARGS,
             'nom_gerant': {'required': True},
             'localisation': {'required': True},
         }
@@ -88,6 +106,9 @@ class RecruteurSerializer(PasswordMixin, serializers.ModelSerializer):
         if len(cleaned_siret) != 14:
             raise serializers.ValidationError(f"Le SIRET doit contenir exactement 14 chiffres (reçu: {len(cleaned_siret)} chiffres).")
         
+        if not siret_valide(cleaned_siret):
+            raise serializers.ValidationError("Le SIRET est invalide (clé de contrôle incorrecte).")
+        
         if Recruteur.objects.filter(siret=cleaned_siret).exists():
             raise serializers.ValidationError("Ce SIRET est déjà utilisé.")
         
@@ -115,7 +136,7 @@ class LoginSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True)
 
 
-class JobSerializer(serializers.ModelSerializer):
+class JobSerializer(CachedRepresentationMixin, serializers.ModelSerializer):
     recruteur_nom = serializers.CharField(source='recruteur.nom_entreprise', read_only=True)
     recruteur_logo = serializers.ImageField(source='recruteur.logo', read_only=True)
     nombre_candidatures = serializers.SerializerMethodField()
@@ -125,12 +146,20 @@ class JobSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'recruteur', 'recruteur_nom', 'titre', 'description', 'exigences', 'experience',
             'type_contrat', 'salaire_min', 'salaire_max', 'localisation', 'keywords','recruteur_logo',
-            'date_creation', 'date_expiration', 'active', 'nombre_candidatures'
+            'date_creation', 'date_expiration', 'active', 'nombre_candidatures',
+            'vues', 'impressions'
         ]
-        read_only_fields = ['recruteur', 'date_creation']
+        read_only_fields = ['recruteur', 'date_creation', 'vues', 'impressions']
+        list_serializer_class = CachedListSerializer
+
+    # Compteurs mis à jour par UPDATE (sans signal) : relus à chaque fois
+    cache_volatile_fields = ('nombre_candidatures', 'vues', 'impressions')
+
+    def cache_dependencies(self, instance):
+        return [('api.job', instance.pk), ('api.recruteur', instance.recruteur_id)]
 
     def get_nombre_candidatures(self, obj):
-        return obj.candidatures.count()
+        return obj.nombre_candidatures
 
     def create(self, validated_data):
         return super().create(validated_data)
@@ -144,6 +173,7 @@ class CandidatureSerializer(serializers.ModelSerializer):
     entreprise = serializers.CharField(source='job.recruteur.nom_entreprise', read_only=True)
     
     cv = serializers.FileField(
+        required=False,
         validators=[FileExtensionValidator(
             allowed_extensions=['pdf'],
             message='Seuls les fichiers PDF sont autorisés pour le CV.'
@@ -158,32 +188,52 @@ class CandidatureSerializer(serializers.ModelSerializer):
         )]
     )
 
+    # Alternative aux fichiers multipart : référence à un upload fractionné terminé
+    cv_upload_id = serializers.UUIDField(write_only=True, required=False)
+    lettre_motivation_upload_id = serializers.UUIDField(write_only=True, required=False)
+
     class Meta:
         model = Candidature
         fields = [
             'id', 'candidat', 'candidat_nom', 'candidat_prenom', 'candidat_email',
             'job', 'job_titre', 'entreprise', 'cv', 'lettre_motivation', 
+            'cv_upload_id', 'lettre_motivation_upload_id',
             'statut', 'date_candidature', 'date_modification'
         ]
         read_only_fields = ['candidat', 'date_candidature', 'date_modification']
 
+    def _save_with_uploads(self, save, validated_data):
+        # Fichiers des uploads fractionnés fermés, sessions supprimées une fois copiées
+        sessions = getattr(self, '_upload_sessions', [])
+        try:
+            instance = save()
+        finally:
+            for field in ('cv', 'lettre_motivation'):
+                value = validated_data.get(field)
+                if value is not None and hasattr(value, 'close'):
+                    value.close()
+        for session in sessions:
+            uploads.discard_upload(session)
+        return instance
+
     def create(self, validated_data):
-        return super().create(validated_data)
+        return self._save_with_uploads(lambda: super(CandidatureSerializer, self).create(validated_data), validated_data)
 
     def update(self, instance, validated_data):
+        data = validated_data
         request = self.context.get('request')
         if request and hasattr(request, 'user'):
             user_role = getattr(request.user, 'role', None)
             
             if user_role == 'candidat':
                 allowed_fields = {'cv', 'lettre_motivation'}
-                validated_data = {k: v for k, v in validated_data.items() if k in allowed_fields}
+                data = {k: v for k, v in validated_data.items() if k in allowed_fields}
             
             elif user_role == 'recruteur':
                 allowed_fields = {'statut'}
-                validated_data = {k: v for k, v in validated_data.items() if k in allowed_fields}
+                data = {k: v for k, v in validated_data.items() if k in allowed_fields}
         
-        return super().update(instance, validated_data)
+        return self._save_with_uploads(lambda: super(CandidatureSerializer, self).update(instance, data), validated_data)
 
     def validate_cv(self, value):
         if value.size > 5 * 1024 * 1024:
@@ -195,7 +245,23 @@ class CandidatureSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('La lettre de motivation ne doit pas dépasser 5MB.')
         return value
 
+    def _resolve_upload(self, upload_id, kind):
+        request = self.context.get('request')
+        session = UploadSession.objects.filter(
+            pk=upload_id, owner__pk=getattr(request.user, 'pk', None), kind=kind
+        ).first() if request else None
+        if not session:
+            raise serializers.ValidationError({f'{kind}_upload_id': 'Upload introuvable.'})
+        if session.statut != 'terminee':
+            raise serializers.ValidationError({f'{kind}_upload_id': 'Upload incomplet.'})
+        return session
+
     def validate(self, data):
+        upload_ids = {
+            field: data.pop(f'{field}_upload_id', None)
+            for field in ('cv', 'lettre_motivation')
+        }
+
         if self.instance is None:
             candidat = self.context['request'].user if self.context.get('request') else None
             job = data.get('job')
@@ -204,10 +270,43 @@ class CandidatureSerializer(serializers.ModelSerializer):
                     raise serializers.ValidationError(
                         "Vous avez déjà postulé pour ce job."
                     )
+
+            if not data.get('cv') and not upload_ids['cv']:
+                raise serializers.ValidationError({'cv': 'Ce champ est requis.'})
+
+        # Création comme modification (remplacement du CV ou de la lettre)
+        sessions = {
+            field: self._resolve_upload(upload_id, field)
+            for field, upload_id in upload_ids.items()
+            if upload_id and not data.get(field)
+        }
+        self._upload_sessions = list(sessions.values())
+        for field, session in sessions.items():
+            data[field] = uploads.open_completed_upload(session)
         return data
 
 
 class CandidatureUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Candidature
-        fields = ['statut']
\ No newline at end of file
+        fields = ['statut']
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'kind', 'filename', 'total_size', 'offset', 'statut', 'date_creation']
+        read_only_fields = ['offset', 'statut', 'date_creation']
+
+    def validate_filename(self, value):
+        extension = value.rsplit('.', 1)[-1].lower() if '.' in value else ''
+        if extension not in uploads.ALLOWED_EXTENSIONS:
+            raise serializers.ValidationError('Seuls les fichiers PDF sont autorisés.')
+        return value
+
+    def validate_total_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError('Le fichier est vide.')
+        if value > uploads.MAX_UPLOAD_SIZE:
+            raise serializers.ValidationError('Le fichier ne doit pas dépasser 5MB.')
+        return value
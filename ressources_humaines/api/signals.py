@@ -1,29 +1,76 @@
 """
 Signaux Django pour déclencher automatiquement l'analyse IA
 """
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.core.files.storage import default_storage
+from django.utils import timezone
 import logging
 import os
 import requests
 import json
-from .models import Candidature, CVAnalysis
+import time
+from rest_framework.authtoken.models import Token
+from .models import CustomUser, Candidat, Recruteur, Candidature, CVAnalysis, Job, StatutTransition
+from .authentication import token_cache
+from .executors import analysis_queue
+from .stats import invalidate_recruteur_stats
+from . import events, metrics, rollup, serializer_cache
 
 logger = logging.getLogger(__name__)
 
 
+def _recruteur_id(candidature):
+    try:
+        return candidature.job.recruteur_id
+    except Job.DoesNotExist:
+        return None  # Job supprimé en cascade
+
+
+@receiver(post_save, sender=Candidature)
+def publish_candidature_event(sender, instance, created, **kwargs):
+    # Enregistré avant trigger_ai_analysis : la création précède l'analyse dans le flux
+    events.publish(
+        _recruteur_id(instance),
+        'candidature.created' if created else 'candidature.updated',
+        {
+            'candidature_id': instance.pk,
+            'job_id': instance.job_id,
+            'statut': instance.statut,
+            'date_modification': instance.date_modification,
+        }
+    )
+
+
+@receiver(post_save, sender=CVAnalysis)
+def publish_analysis_event(sender, instance, created, **kwargs):
+    if created or instance.overall_score is None:
+        return
+    candidature = instance.candidature
+    events.publish(
+        _recruteur_id(candidature),
+        'analysis.completed',
+        {
+            'candidature_id': candidature.pk,
+            'job_id': candidature.job_id,
+            'overall_score': instance.overall_score,
+        }
+    )
+
+
 @receiver(post_save, sender=Candidature)
 def trigger_ai_analysis(sender, instance, created, **kwargs):
     if not created:
         return  # Seulement pour les nouvelles candidatures
     
     try:
-        logger.info(f"Déclenchement automatique de l'analyse IA pour candidature {instance.id}")
+        logger.info("Déclenchement automatique de l'analyse IA pour candidature %s", instance.id)
         
         # Vérifier qu'on a un CV et un job
         if not instance.cv or not instance.job:
-            logger.warning(f"Candidature {instance.id} sans CV ou job, analyse impossible")
+            logger.warning("Candidature %s sans CV ou job, analyse impossible", instance.id)
             return
         
         # Créer l'analyse
@@ -31,11 +78,11 @@ def trigger_ai_analysis(sender, instance, created, **kwargs):
             candidature=instance
         )
         
-        # Lancer l'analyse en arrière-plan (pour l'instant synchrone)
-        _run_ai_analysis(cv_analysis, instance)
+        # Analyse en arrière-plan, une fois la candidature validée en base
+        transaction.on_commit(lambda: analysis_queue.submit(_run_ai_analysis, cv_analysis, instance))
         
     except Exception as e:
-        logger.error(f"Erreur lors du déclenchement de l'analyse IA: {e}")
+        logger.error("Erreur lors du déclenchement de l'analyse IA: %s", e)
         
         # Marquer l'analyse comme échouée
         try:
@@ -47,7 +94,7 @@ def trigger_ai_analysis(sender, instance, created, **kwargs):
 
 def _run_ai_analysis(cv_analysis: CVAnalysis, candidature: Candidature):
     try:
-        logger.info(f"Début de l'analyse IA pour candidature {candidature.id}")
+        logger.info("Début de l'analyse IA pour candidature %s", candidature.id)
         
         # Récupérer le fichier CV et extraire le texte
         cv_file_path = candidature.cv.path
@@ -94,12 +141,18 @@ def _run_ai_analysis(cv_analysis: CVAnalysis, candidature: Candidature):
             'temperature': 0.3
         }
         
-        response = requests.post(
-            'https://api.mistral.ai/v1/chat/completions',
-            headers=headers,
-            json=data,
-            timeout=30
-        )
+        started = time.perf_counter()
+        try:
+            response = requests.post(
+                'https://api.mistral.ai/v1/chat/completions',
+                headers=headers,
+                json=data,
+                timeout=30
+            )
+        except requests.RequestException:
+            metrics.observe('llm_request_duration_seconds', time.perf_counter() - started, status='error')
+            raise
+        metrics.observe('llm_request_duration_seconds', time.perf_counter() - started, status=response.status_code)
         
         if response.status_code == 200:
             result = response.json()
@@ -120,7 +173,7 @@ def _run_ai_analysis(cv_analysis: CVAnalysis, candidature: Candidature):
                 cv_analysis.experience = "[]"
                 cv_analysis.education = "[]"
                 
-                logger.info(f"Analyse IA réussie: {scores}")
+                logger.info("Analyse IA réussie: %s", scores)
                 
             except json.JSONDecodeError:
                 # Fallback si JSON invalide
@@ -131,14 +184,128 @@ def _run_ai_analysis(cv_analysis: CVAnalysis, candidature: Candidature):
             # Erreur API
             cv_analysis.overall_score = 0.5
             cv_analysis.raw_analysis = f"Erreur API: {response.status_code}"
-            logger.error(f"Erreur Mistral API: {response.status_code}")
+            logger.error("Erreur Mistral API: %s", response.status_code)
         
         # Sauvegarder
         cv_analysis.save()
-        logger.info(f"Analyse IA terminée pour candidature {candidature.id}")
+        logger.info("Analyse IA terminée pour candidature %s", candidature.id)
         
     except Exception as e:
-        logger.error(f"Erreur lors de l'analyse IA: {e}")
+        logger.error("Erreur lors de l'analyse IA: %s", e)
         cv_analysis.overall_score = 0.5
         cv_analysis.raw_analysis = f"Erreur: {str(e)}"
         cv_analysis.save()
+
+
+@receiver([post_save, post_delete], sender=Job)
+def invalidate_stats_on_job_change(sender, instance, **kwargs):
+    invalidate_recruteur_stats(instance.recruteur_id)
+
+
+@receiver([post_save, post_delete], sender=Candidature)
+def invalidate_stats_on_candidature_change(sender, instance, **kwargs):
+    invalidate_recruteur_stats(_recruteur_id(instance))
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token_cache_on_logout(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+@receiver([post_save, post_delete], sender=Candidat)
+@receiver([post_save, post_delete], sender=Recruteur)
+def invalidate_token_cache_on_user_change(sender, instance, **kwargs):
+    # Profil modifié, compte désactivé... : l'utilisateur en cache est rechargé
+    token_cache.invalidate_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Job)
+def bump_job_serialization(sender, instance, **kwargs):
+    serializer_cache.bump('api.job', instance.pk)
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+@receiver([post_save, post_delete], sender=Recruteur)
+def bump_recruteur_serialization(sender, instance, **kwargs):
+    # Les fiches d'offres incluent le nom et le logo de l'entreprise
+    if instance.role == 'recruteur':
+        serializer_cache.bump('api.recruteur', instance.pk)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_save, sender=Candidat)
+@receiver(post_save, sender=Recruteur)
+def rollup_user_created(sender, instance, created, **kwargs):
+    field = rollup.ROLE_FIELDS.get(instance.role)
+    if created and field:
+        rollup.increment(rollup.local_day(instance.date_joined), **{field: 1})
+
+
+@receiver(post_delete, sender=CustomUser)
+def rollup_user_deleted(sender, instance, **kwargs):
+    # La ligne parente CustomUser est toujours supprimée : les signaux des
+    # sous-classes sont ignorés pour ne pas décompter deux fois
+    field = rollup.ROLE_FIELDS.get(instance.role)
+    if field:
+        rollup.increment(rollup.local_day(instance.date_joined), **{field: -1})
+
+
+@receiver(post_save, sender=Job)
+def rollup_job_created(sender, instance, created, **kwargs):
+    if created:
+        rollup.increment(rollup.local_day(instance.date_creation), jobs_crees=1)
+
+
+@receiver(post_delete, sender=Job)
+def rollup_job_deleted(sender, instance, **kwargs):
+    rollup.increment(rollup.local_day(instance.date_creation), jobs_crees=-1)
+
+
+@receiver(post_save, sender=Candidature)
+def rollup_candidature_saved(sender, instance, created, **kwargs):
+    jour_depot = rollup.local_day(instance.date_candidature)
+    if created:
+        rollup.increment(jour_depot, candidatures=1, **{rollup.STATUT_FIELDS[instance.statut]: 1})
+        Job.objects.filter(pk=instance.job_id).update(nombre_candidatures=F('nombre_candidatures') + 1)
+    else:
+        ancien = getattr(instance, '_statut_initial', None)
+        if ancien and ancien != instance.statut:
+            rollup.increment(jour_depot, **{
+                rollup.STATUT_FIELDS[ancien]: -1,
+                rollup.STATUT_FIELDS[instance.statut]: 1,
+            })
+            decision = rollup.DECISION_FIELDS.get(instance.statut)
+            if decision:
+                rollup.increment(rollup.local_day(), **{decision: 1})
+
+
+@receiver(post_delete, sender=Candidature)
+def rollup_candidature_deleted(sender, instance, **kwargs):
+    rollup.increment(
+        rollup.local_day(instance.date_candidature),
+        candidatures=-1,
+        **{rollup.STATUT_FIELDS[instance.statut]: -1}
+    )
+    Job.objects.filter(pk=instance.job_id, nombre_candidatures__gt=0).update(
+        nombre_candidatures=F('nombre_candidatures') - 1
+    )
+
+
+@receiver(post_save, sender=Candidature)
+def record_statut_transition(sender, instance, created, **kwargs):
+    ancien = None if created else getattr(instance, '_statut_initial', None)
+    if not created and (ancien is None or ancien == instance.statut):
+        return
+    StatutTransition.objects.create(
+        candidature=instance,
+        ancien_statut=ancien,
+        nouveau_statut=instance.statut,
+        delai=max(0, int((timezone.now() - instance.date_candidature).total_seconds())),
+    )
+
+
+@receiver(post_save, sender=Candidature)
+def remember_statut(sender, instance, **kwargs):
+    # Dernier receveur enregistré : les précédents comparent encore à l'ancien statut
+    instance._statut_initial = instance.statut
@@ -0,0 +1,224 @@
+"""
+Validation des SIRET et index local d'établissements (extrait SIRENE)
+
+L'index est un fichier binaire projeté en mémoire (mmap) :
+
+    en-tête   : magic, nombre d'établissements, offsets des sections
+    sirets    : (siret uint64, offset uint64) triés par SIRET
+    noms      : offset uint64 trié par nom normalisé
+    chaînes   : "clé\\x1fsiret\\x1fnom\\x1fcommune\\x1fcode postal\\x1factivité\\n"
+
+Les recherches sont des dichotomies sur les tables à taille fixe : seules
+les pages lues sont chargées par le système, rien n'est parsé au démarrage.
+"""
+import csv
+import mmap
+import os
+import re
+import struct
+import threading
+import unicodedata
+
+from django.conf import settings
+
+LA_POSTE_SIREN = '356000000'
+LA_POSTE_SIEGE = '35600000000048'
+
+MAGIC = b'SIRIDX1\0'
+HEADER = struct.Struct('<8sIQQQ')
+SIRET_RECORD = struct.Struct('<QQ')
+NAME_RECORD = struct.Struct('<Q')
+SEPARATOR = '\x1f'
+FIELDS = ('siret', 'nom', 'commune', 'code_postal', 'activite')
+
+# Colonnes acceptées : extrait simplifié ou fichier StockEtablissement de l'INSEE
+COLUMN_ALIASES = {
+    'siret': ['siret'],
+    'nom': ['nom', 'denominationUniteLegale', 'denominationUsuelleEtablissement', 'enseigne1Etablissement'],
+    'commune': ['commune', 'libelleCommuneEtablissement'],
+    'code_postal': ['code_postal', 'codePostalEtablissement'],
+    'activite': ['activite', 'activitePrincipaleEtablissement'],
+}
+SEARCH_LIMIT = 10
+
+
+def clean_siret(value):
+    return re.sub(r'[^\d]', '', value or '')
+
+
+def siret_valide(siret):
+    """
+    Clé de Luhn du SIRET. Exception : les établissements de La Poste
+    (hors siège) ont une somme des chiffres multiple de 5.
+    """
+    if len(siret) != 14 or not siret.isdigit():
+        return False
+    if siret.startswith(LA_POSTE_SIREN) and siret != LA_POSTE_SIEGE:
+        return sum(int(c) for c in siret) % 5 == 0
+    total = 0
+    for position, c in enumerate(reversed(siret)):
+        digit = int(c)
+        if position % 2:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return total % 10 == 0
+
+
+def normalize_name(value):
+    """
+    Clé de tri et de recherche : majuscules sans accents ni ponctuation
+    """
+    value = unicodedata.normalize('NFKD', value or '')
+    value = value.encode('ascii', 'ignore').decode('ascii').upper()
+    return ' '.join(re.sub(r'[^A-Z0-9]+', ' ', value).split())
+
+
+def _column(row, name):
+    for alias in COLUMN_ALIASES[name]:
+        value = row.get(alias)
+        if value:
+            return value.replace(SEPARATOR, ' ').replace('\n', ' ').strip()
+    return ''
+
+
+def build_index(rows, path):
+    """
+    Écrit l'index à partir de dicts (colonnes de COLUMN_ALIASES). Les
+    établissements fermés et les SIRET invalides sont ignorés. Écriture
+    atomique : les processus qui lisent l'ancien fichier ne sont pas gênés.
+    Renvoie le nombre d'établissements indexés.
+    """
+    entries = {}
+    for row in rows:
+        if row.get('etatAdministratifEtablissement') == 'F':
+            continue
+        siret = clean_siret(row.get('siret'))
+        key = normalize_name(_column(row, 'nom'))
+        if not siret_valide(siret) or not key:
+            continue
+        entries[int(siret)] = (key, siret) + tuple(_column(row, name) for name in FIELDS[1:])
+
+    strings = bytearray()
+    offsets = {}
+    for siret, values in entries.items():
+        offsets[siret] = len(strings)
+        strings += (SEPARATOR.join(values) + '\n').encode('utf-8')
+
+    sirets = sorted(entries)
+    by_name = sorted(sirets, key=lambda siret: (entries[siret][0], siret))
+
+    siret_table_offset = HEADER.size
+    name_table_offset = siret_table_offset + len(sirets) * SIRET_RECORD.size
+    strings_offset = name_table_offset + len(sirets) * NAME_RECORD.size
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(sirets), siret_table_offset, name_table_offset, strings_offset))
+        for siret in sirets:
+            f.write(SIRET_RECORD.pack(siret, offsets[siret]))
+        for siret in by_name:
+            f.write(NAME_RECORD.pack(offsets[siret]))
+        f.write(strings)
+    os.replace(tmp_path, path)
+    return len(sirets)
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        yield from csv.DictReader(f)
+
+
+class SireneIndex:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mtime = os.fstat(f.fileno()).st_mtime
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self._sirets, self._names, self._strings = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} n'est pas un index SIRENE")
+
+    def _siret_at(self, i):
+        return SIRET_RECORD.unpack_from(self._mm, self._sirets + i * SIRET_RECORD.size)
+
+    def _name_offset_at(self, i):
+        return NAME_RECORD.unpack_from(self._mm, self._names + i * NAME_RECORD.size)[0]
+
+    def _key_at(self, offset):
+        start = self._strings + offset
+        return self._mm[start:self._mm.find(SEPARATOR.encode(), start)].decode('ascii')
+
+    def _entry(self, offset):
+        start = self._strings + offset
+        line = self._mm[start:self._mm.find(b'\n', start)].decode('utf-8')
+        return dict(zip(FIELDS, line.split(SEPARATOR)[1:]))
+
+    def lookup(self, siret):
+        """
+        Établissement correspondant au SIRET, ou None
+        """
+        target = int(siret)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._siret_at(mid)[0] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count:
+            found, offset = self._siret_at(lo)
+            if found == target:
+                return self._entry(offset)
+        return None
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """
+        Établissements dont le nom normalisé commence par `query`
+        """
+        prefix = normalize_name(query)
+        if not prefix:
+            return []
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(self._name_offset_at(mid)) < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        results = []
+        for i in range(lo, min(self.count, lo + limit)):
+            offset = self._name_offset_at(i)
+            if not self._key_at(offset).startswith(prefix):
+                break
+            results.append(self._entry(offset))
+        return results
+
+    def close(self):
+        self._mm.close()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """
+    Index partagé du processus, rouvert si le fichier a été reconstruit.
+    None si aucun index n'est installé.
+    """
+    global _index
+    path = str(getattr(settings, 'SIRENE_INDEX_PATH', ''))
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    with _index_lock:
+        if _index is None or _index.path != path or _index.mtime != mtime:
+            previous, _index = _index, SireneIndex(path)
+            if previous is not None:
+                # Sinon l'ancien fichier reste projeté jusqu'au ramasse-miettes
+                previous.close()
+        return _index
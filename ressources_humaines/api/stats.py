@@ -0,0 +1,308 @@
+"""
+Statistiques agrégées côté serveur (dashboards recruteur et admin)
+"""
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .models import Candidature, Job, DailyStat, DailyJobViews
+
+RECRUTEUR_STATS_TTL = 300  # secondes
+TOP_COMPANIES_LIMIT = 5
+TOP_COMPANIES_MAX = 50
+# Critère de classement -> annotation de top_companies
+TOP_COMPANY_METRICS = {
+    'applications': 'applications_received',
+    'jobs': 'jobs_count',
+    'active_jobs': 'active_jobs',
+    'views': 'total_views',
+}
+RECENT_ACTIVITY_LIMIT = 10
+VIEWS_HISTORY_DAYS = 30
+
+STATUTS = [statut for statut, _ in Candidature.STATUT_CHOICES]
+
+
+def recruteur_stats_cache_key(recruteur_id):
+    return f'recruteur_stats:{recruteur_id}'
+
+
+def invalidate_recruteur_stats(recruteur_id):
+    if recruteur_id is not None:
+        cache.delete(recruteur_stats_cache_key(recruteur_id))
+
+
+def compute_recruteur_stats(recruteur_id):
+    """
+    Une seule requête agrégée (Count conditionnels groupés par job) pour les
+    compteurs, plus une requête bornée pour l'activité récente.
+    """
+    per_job = list(
+        Job.objects
+        .filter(recruteur__pk=recruteur_id)
+        .values('id', 'titre', 'active', 'vues', 'impressions')
+        .annotate(
+            total=Count('candidatures'),
+            **{
+                statut: Count('candidatures', filter=Q(candidatures__statut=statut))
+                for statut in STATUTS
+            }
+        )
+        .order_by('-date_creation')
+    )
+
+    par_statut = {statut: sum(job[statut] for job in per_job) for statut in STATUTS}
+    total_applications = sum(job['total'] for job in per_job)
+
+    recent = (
+        Candidature.objects
+        .filter(job__recruteur__pk=recruteur_id)
+        .order_by('-date_modification')
+        .values(
+            'id', 'statut', 'date_candidature', 'date_modification',
+            'job_id', 'job__titre', 'candidat__first_name', 'candidat__last_name',
+        )[:RECENT_ACTIVITY_LIMIT]
+    )
+
+    since = timezone.localdate() - timedelta(days=VIEWS_HISTORY_DAYS - 1)
+    views_history = (
+        DailyJobViews.objects
+        .filter(job__recruteur__pk=recruteur_id, date__gte=since)
+        .values('date')
+        .annotate(vues=Sum('vues'), impressions=Sum('impressions'))
+        .order_by('date')
+    )
+
+    return {
+        'totalJobs': len(per_job),
+        'totalViews': sum(job['vues'] for job in per_job),
+        'totalImpressions': sum(job['impressions'] for job in per_job),
+        'activeJobs': sum(1 for job in per_job if job['active']),
+        'totalApplications': total_applications,
+        'pendingApplications': par_statut['en_attente'],
+        'acceptedApplications': par_statut['acceptee'],
+        'rejectedApplications': par_statut['refusee'],
+        'applicationsByStatut': par_statut,
+        'jobs': [
+            {
+                'id': job['id'],
+                'titre': job['titre'],
+                'active': job['active'],
+                'applications': job['total'],
+                'views': job['vues'],
+                'impressions': job['impressions'],
+                'byStatut': {statut: job[statut] for statut in STATUTS},
+            }
+            for job in per_job
+        ],
+        'viewsHistory': [
+            {'date': item['date'], 'views': item['vues'], 'impressions': item['impressions']}
+            for item in views_history
+        ],
+        'recentActivity': [
+            {
+                'candidatureId': item['id'],
+                'jobId': item['job_id'],
+                'jobTitre': item['job__titre'],
+                'candidat': f"{item['candidat__first_name']} {item['candidat__last_name']}".strip(),
+                'statut': item['statut'],
+                'dateCandidature': item['date_candidature'],
+                'dateModification': item['date_modification'],
+            }
+            for item in recent
+        ],
+    }
+
+
+def get_recruteur_stats(recruteur_id):
+    key = recruteur_stats_cache_key(recruteur_id)
+    data = cache.get(key)
+    if data is None:
+        data = compute_recruteur_stats(recruteur_id)
+        cache.set(key, data, RECRUTEUR_STATS_TTL)
+    return data
+
+
+MONTHS = ["Jan", "Fév", "Mar", "Avr", "Mai", "Jun", "Jul", "Aoû", "Sep", "Oct", "Nov", "Déc"]
+USER_GROWTH_MONTHS = 12
+ACTIVITY_MONTHS = 6
+
+
+def month_starts(count, now=None):
+    """
+    Les `count` derniers mois calendaires (mois courant inclus), du plus
+    ancien au plus récent, sous forme de tuples (année, mois) locaux.
+    """
+    now = timezone.localtime(now)
+    year, month = now.year, now.month
+    starts = []
+    for _ in range(count):
+        starts.append((year, month))
+        month -= 1
+        if month == 0:
+            year, month = year - 1, 12
+    starts.reverse()
+    return starts
+
+
+def month_start_datetime(year, month):
+    return timezone.make_aware(datetime(year, month, 1))
+
+
+def _sum(field):
+    return Coalesce(Sum(field), 0)
+
+
+def top_companies(metric='applications', limit=TOP_COMPANIES_LIMIT):
+    """
+    Classement des entreprises par critère. Un seul GROUP BY sur la table des
+    offres, à partir des compteurs stockés (candidatures, vues) : le coût
+    dépend du nombre d'offres, pas du nombre de candidatures.
+    """
+    if metric not in TOP_COMPANY_METRICS:
+        raise ValueError(f"Critère inconnu: {metric} (choix: {', '.join(TOP_COMPANY_METRICS)})")
+    if not 1 <= limit <= TOP_COMPANIES_MAX:
+        raise ValueError(f"Le nombre d'entreprises doit être compris entre 1 et {TOP_COMPANIES_MAX}.")
+
+    rows = (
+        Job.objects
+        .values('recruteur', 'recruteur__nom_entreprise')
+        .annotate(
+            jobs_count=Count('id'),
+            active_jobs=Count('id', filter=Q(active=True)),
+            applications_received=_sum('nombre_candidatures'),
+            total_views=_sum('vues'),
+            average_views=Avg('vues'),
+        )
+        .order_by(f'-{TOP_COMPANY_METRICS[metric]}', 'recruteur')[:limit]
+    )
+    return [
+        {
+            'rank': rank,
+            'company': row['recruteur__nom_entreprise'],
+            'jobsCount': row['jobs_count'],
+            'activeJobs': row['active_jobs'],
+            'applicationsReceived': row['applications_received'],
+            'totalViews': row['total_views'],
+            'averageViews': round(row['average_views'] or 0)
+        }
+        for rank, row in enumerate(rows, start=1)
+    ]
+
+
+def compute_admin_dashboard(now=None, top_metric='applications', top_limit=TOP_COMPANIES_LIMIT):
+    """
+    Payload du dashboard admin : utilisateurs et candidatures sont lus dans
+    la table DailyStat (O(jours)), les offres directement (table réduite).
+    """
+    growth_months = month_starts(USER_GROWTH_MONTHS, now)
+    activity_months = growth_months[-ACTIVITY_MONTHS:]
+    since = timezone.localdate(month_start_datetime(*growth_months[0]))
+
+    totals = DailyStat.objects.aggregate(
+        candidats=_sum('inscriptions_candidats'),
+        entreprises=_sum('inscriptions_recruteurs'),
+        admins=_sum('inscriptions_admins'),
+        total_applications=_sum('candidatures'),
+        pending_applications=_sum('candidatures_en_attente'),
+        accepted_applications=_sum('candidatures_acceptees'),
+        rejected_applications=_sum('candidatures_refusees'),
+    )
+    total_applications = totals['total_applications']
+    accepted_applications = totals['accepted_applications']
+    rejected_applications = totals['rejected_applications']
+    pending_applications = totals['pending_applications']
+
+    by_month = {
+        (row['month'].year, row['month'].month): row
+        for row in (
+            DailyStat.objects
+            .filter(date__gte=since)
+            .annotate(month=TruncMonth('date'))
+            .values('month')
+            .annotate(
+                candidats=_sum('inscriptions_candidats'),
+                entreprises=_sum('inscriptions_recruteurs'),
+                admins=_sum('inscriptions_admins'),
+                applications=_sum('candidatures'),
+                jobs_created=_sum('jobs_crees'),
+            )
+            .order_by()
+        )
+    }
+    empty_month = dict.fromkeys(['candidats', 'entreprises', 'admins', 'applications', 'jobs_created'], 0)
+
+    contracts = list(
+        Job.objects
+        .values('type_contrat')
+        .annotate(count=Count('id'), active=Count('id', filter=Q(active=True)), vues=_sum('vues'))
+        .order_by('-count')
+    )
+    total_jobs = sum(item['count'] for item in contracts)
+    active_jobs = sum(item['active'] for item in contracts)
+    total_views = sum(item['vues'] for item in contracts)
+
+    stats = {
+        'totalUsers': totals['candidats'] + totals['entreprises'] + totals['admins'],
+        'totalCandidats': totals['candidats'],
+        'totalEntreprises': totals['entreprises'],
+        'totalJobs': total_jobs,
+        'totalApplications': total_applications,
+        'acceptedApplications': accepted_applications,
+        'rejectedApplications': rejected_applications,
+        'pendingApplications': pending_applications,
+        'activeJobs': active_jobs,
+        'inactiveJobs': total_jobs - active_jobs,
+        'totalViews': total_views
+    }
+
+    user_growth = []
+    for key in growth_months:
+        row = by_month.get(key, empty_month)
+        candidats = row['candidats']
+        entreprises = row['entreprises']
+        user_growth.append({
+            'month': MONTHS[key[1] - 1],
+            'candidats': candidats,
+            'entreprises': entreprises,
+            'total': candidats + entreprises
+        })
+
+    application_status = [
+        {'name': 'En attente', 'value': pending_applications, 'color': '#f59e0b'},
+        {'name': 'Refusées', 'value': rejected_applications, 'color': '#ef4444'},
+        {'name': 'Acceptées', 'value': accepted_applications, 'color': '#10b981'}
+    ]
+
+    jobs_by_contract = [
+        {
+            'contract': contract['type_contrat'],
+            'count': contract['count'],
+            'percentage': round((contract['count'] / total_jobs) * 100) if total_jobs > 0 else 0
+        }
+        for contract in contracts
+    ]
+
+    monthly_activity = []
+    for key in activity_months:
+        row = by_month.get(key, empty_month)
+        monthly_activity.append({
+            'month': MONTHS[key[1] - 1],
+            'applications': row['applications'],
+            'jobsCreated': row['jobs_created'],
+            'newUsers': row['candidats'] + row['entreprises'] + row['admins']
+        })
+
+    top = top_companies(top_metric, top_limit)
+
+    return {
+        'stats': stats,
+        'userGrowth': user_growth,
+        'applicationStatus': application_status,
+        'jobsByContract': jobs_by_contract,
+        'monthlyActivity': monthly_activity,
+        'topCompanies': top
+    }
@@ -0,0 +1,135 @@
+"""
+Utilitaires de réponses en streaming (archives ZIP, exports CSV/NDJSON)
+"""
+import csv
+import logging
+import zipfile
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+logger = logging.getLogger(__name__)
+
+# Taille des blocs lus depuis le stockage (64 Ko)
+CHUNK_SIZE = 64 * 1024
+
+
+class _ZipStreamBuffer:
+    """
+    Flux d'écriture non seekable : zipfile y écrit, le générateur le vide
+    après chaque bloc. La mémoire reste bornée à un bloc compressé.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(entries, chunk_size=CHUNK_SIZE):
+    """
+    Génère une archive ZIP bloc par bloc.
+
+    `entries` est un itérable de tuples (nom_dans_archive, field_file).
+    Aucun fichier temporaire ni archive complète en mémoire : chaque fichier
+    est lu par blocs et compressé directement vers le flux de sortie.
+    """
+    buffer = _ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for arcname, field_file in entries:
+            try:
+                field_file.open('rb')
+            except (FileNotFoundError, OSError) as e:
+                logger.warning("Fichier introuvable pour l'archive (%s): %s", arcname, e)
+                continue
+
+            info = zipfile.ZipInfo(arcname, date_time=timezone.localtime().timetuple()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            try:
+                with archive.open(info, mode='w') as dest:
+                    for chunk in field_file.chunks(chunk_size):
+                        dest.write(chunk)
+                        data = buffer.drain()
+                        if data:
+                            yield data
+            finally:
+                field_file.close()
+
+            data = buffer.drain()
+            if data:
+                yield data
+
+    # Répertoire central écrit à la fermeture de l'archive
+    data = buffer.drain()
+    if data:
+        yield data
+
+
+def candidature_cv_arcname(candidature):
+    """
+    Nom d'entrée dans l'archive : nom_prenom_id.pdf (l'id garantit l'unicité)
+    """
+    parts = [candidature.candidat.last_name, candidature.candidat.first_name]
+    label = '_'.join(p for p in parts if p) or candidature.candidat.email.split('@')[0]
+    return get_valid_filename(f"{label}_{candidature.pk}.pdf")
+
+
+# Nombre de lignes lues par aller-retour base de données lors des exports
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class _Echo:
+    """
+    Pseudo-fichier pour csv.writer : renvoie la ligne au lieu de la stocker
+    """
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(columns, rows):
+    writer = csv.writer(_Echo())
+    # BOM pour qu'Excel détecte l'UTF-8 (noms accentués)
+    yield '\ufeff' + writer.writerow([label for label, _ in columns])
+    for row in rows:
+        yield writer.writerow([row[lookup] for _, lookup in columns])
+
+
+def stream_ndjson(columns, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode({label: row[lookup] for label, lookup in columns}) + '\n'
+
+
+def export_response(queryset, columns, output, filename):
+    """
+    Réponse en streaming d'un queryset parcouru par lots avec `.values()` et
+    `.iterator()` : la mémoire reste constante quel que soit le volume.
+
+    `columns` est une liste de tuples (intitulé, lookup ORM ou annotation).
+    """
+    rows = queryset.values(*[lookup for _, lookup in columns]).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    if output == 'ndjson':
+        content = stream_ndjson(columns, rows)
+    else:
+        content = stream_csv(columns, rows)
+    response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[output])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{output}"'
+    return response
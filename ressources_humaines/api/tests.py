@@ -1,3 +1,402 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from . import metrics, routers, rollup, throttling, uploads
+from .authentication import STREAM_TICKET_MAX_AGE, TokenCache, token_cache
+from .imports import InvalidRow, import_accounts, read_rows
+from .models import Candidat, Candidature, CustomUser, DailyStat, Job, Recruteur, UploadSession
+from .sirene import LA_POSTE_SIEGE, siret_valide
+
+PDF = b'%PDF-1.4\n' + b'0' * 100
+SIRET = '73282932000074'
+
+_tmp_dir = None
+
+
+def setUpModule():
+    # Fichiers, métriques et compteurs de throttling hors du projet
+    global _tmp_dir
+    _tmp_dir = tempfile.mkdtemp()
+    metrics.METRICS_DB_PATH = os.path.join(_tmp_dir, 'metrics.sqlite3')
+    throttling._store = throttling.SharedThrottleStore(os.path.join(_tmp_dir, 'throttle.sqlite3'))
+
+
+def tearDownModule():
+    throttling._store = None
+    shutil.rmtree(_tmp_dir, ignore_errors=True)
+
+
+def create_recruteur(email='rh@acme.fr', siret=SIRET):
+    return Recruteur.objects.create_user(
+        email=email, password='motdepasse', nom_entreprise='ACME', siret=siret,
+        nom_gerant='Gérant', email_professionnel=f'pro.{email}', localisation='Paris',
+    )
+
+
+def create_candidat(email='jean@exemple.fr'):
+    return Candidat.objects.create_user(email=email, password='motdepasse', first_name='Jean', last_name='Dupont')
+
+
+def create_job(recruteur):
+    return Job.objects.create(
+        recruteur=recruteur, titre='Développeur', description='Django', exigences='Python',
+        type_contrat='CDI', localisation='Paris', date_expiration=timezone.now() + timedelta(days=30),
+    )
+
+
+def create_candidature(candidat, job):
+    candidature = Candidature(candidat=candidat, job=job)
+    candidature.cv.save('cv.pdf', ContentFile(PDF), save=False)
+    candidature.save()
+    return candidature
+
+
+def client_for(user):
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+class MediaTestCase(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        token_cache.clear()
+
+
+class RollupTests(MediaTestCase):
+    """
+    Les incréments des signaux doivent donner les mêmes compteurs qu'un recalcul
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.recruteur = create_recruteur()
+        self.job = create_job(self.recruteur)
+        self.candidats = [create_candidat(f'c{i}@exemple.fr') for i in range(3)]
+
+    def assertConsistent(self):
+        today = rollup.local_day()
+        incremental = DailyStat.objects.values().get(date=today)
+        rollup.reconcile(today, today)
+        self.assertEqual(incremental, DailyStat.objects.values().get(date=today))
+        self.assertEqual(rollup.sync_job_counters(), 0)
+
+    def test_create(self):
+        for candidat in self.candidats:
+            create_candidature(candidat, self.job)
+        stat = DailyStat.objects.get(date=rollup.local_day())
+        self.assertEqual(stat.candidatures, 3)
+        self.assertEqual(stat.candidatures_en_attente, 3)
+        self.assertEqual(stat.inscriptions_candidats, 3)
+        self.assertEqual(stat.inscriptions_recruteurs, 1)
+        self.assertEqual(stat.jobs_crees, 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.nombre_candidatures, 3)
+        self.assertConsistent()
+
+    def test_statut_change(self):
+        candidatures = [create_candidature(candidat, self.job) for candidat in self.candidats]
+        client = client_for(self.recruteur)
+        response = client.patch(f'/api/candidatures/{candidatures[0].pk}/', {'statut': 'acceptee'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        candidature = Candidature.objects.get(pk=candidatures[1].pk)
+        candidature.statut = 'refusee'
+        candidature.save()
+        # Même statut : pas de nouvelle décision
+        candidature.save()
+
+        stat = DailyStat.objects.get(date=rollup.local_day())
+        self.assertEqual(stat.candidatures_en_attente, 1)
+        self.assertEqual(stat.candidatures_acceptees, 1)
+        self.assertEqual(stat.candidatures_refusees, 1)
+        self.assertEqual((stat.acceptations, stat.refus), (1, 1))
+        self.assertConsistent()
+
+    def test_delete(self):
+        candidatures = [create_candidature(candidat, self.job) for candidat in self.candidats]
+        candidatures[0].delete()
+        Candidature.objects.get(pk=candidatures[1].pk).delete()
+        self.candidats[2].delete()  # candidature supprimée en cascade
+
+        stat = DailyStat.objects.get(date=rollup.local_day())
+        self.assertEqual(stat.candidatures, 0)
+        self.assertEqual(stat.inscriptions_candidats, 2)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.nombre_candidatures, 0)
+        self.assertConsistent()
+
+    def test_sync_job_counters_fixes_drift(self):
+        create_candidature(self.candidats[0], self.job)
+        Job.objects.filter(pk=self.job.pk).update(nombre_candidatures=7)
+        self.assertEqual(rollup.sync_job_counters(), 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.nombre_candidatures, 1)
+
+
+class ImportTests(TestCase):
+    def write(self, name, content):
+        path = os.path.join(self.tmp, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def test_ndjson_invalid_lines(self):
+        path = self.write('comptes.ndjson', '\n'.join([
+            '{"role": "candidat", "email": "a@exemple.fr", "first_name": "A", "last_name": "B"}',
+            '{"role": "candidat", "email": ',
+            '',
+            '["pas", "un", "objet"]',
+        ]))
+        rows = list(read_rows(path, 'ndjson'))
+        self.assertEqual([line for line, _ in rows], [1, 2, 4])
+        self.assertIsInstance(rows[1][1], InvalidRow)
+        self.assertEqual(rows[2][1].message, 'Objet JSON attendu.')
+
+        report = import_accounts(iter(rows), workers=1, log=lambda message: None)
+        self.assertEqual((report['read'], report['created'], report['invalid']), (3, 1, 2))
+        self.assertTrue(report['errors'][0].startswith('ligne 2: JSON invalide'))
+        self.assertEqual(report['errors'][1], 'ligne 4: Objet JSON attendu.')
+
+    def test_csv_invalid_rows_and_duplicates(self):
+        create_recruteur()
+        path = self.write('comptes.csv', '\n'.join([
+            'role,email,first_name,last_name,nom_entreprise,siret,nom_gerant,email_professionnel,localisation',
+            'recruteur,r1@exemple.fr,A,B,Alpha,73282932000075,G,p1@exemple.fr,Lyon',
+            'stagiaire,s@exemple.fr,A,B,,,,,',
+            f'recruteur,r2@exemple.fr,A,B,Beta,{SIRET},G,p2@exemple.fr,Lyon',
+            'recruteur,r3@exemple.fr,A,B,Poste,35600000000015,G,p3@exemple.fr,Paris',
+            'candidat,c@exemple.fr,A,B,,,,,',
+            'candidat,C@exemple.fr,A,B,,,,,',
+        ]))
+        report = import_accounts(read_rows(path, 'csv'), workers=1, log=lambda message: None)
+
+        self.assertEqual(report['read'], 6)
+        self.assertEqual(report['invalid'], 2)
+        self.assertEqual(report['duplicates'], 2)
+        self.assertEqual(report['created'], 2)
+        self.assertIn('ligne 2: siret: SIRET invalide', report['errors'][0])
+        self.assertIn('ligne 3: Rôle invalide: stagiaire', report['errors'][1])
+        self.assertTrue(Recruteur.objects.filter(siret='35600000000015').exists())
+        self.assertEqual(Candidat.objects.filter(email__iexact='c@exemple.fr').count(), 1)
+        # Les inscriptions importées sont recalculées dans DailyStat
+        stat = DailyStat.objects.get(date=rollup.local_day())
+        self.assertEqual((stat.inscriptions_recruteurs, stat.inscriptions_candidats), (2, 1))
+
+
+class SiretTests(TestCase):
+    def test_luhn(self):
+        self.assertTrue(siret_valide(SIRET))
+        self.assertFalse(siret_valide('73282932000075'))
+        self.assertFalse(siret_valide('7328293200007'))
+        self.assertFalse(siret_valide('7328293200007a'))
+
+    def test_la_poste(self):
+        # Établissements : somme des chiffres multiple de 5, pas de clé de Luhn
+        self.assertTrue(siret_valide('35600000000015'))
+        self.assertFalse(siret_valide('35600000000016'))
+        # Le siège suit la règle générale
+        self.assertTrue(siret_valide(LA_POSTE_SIEGE))
+
+
+class ChunkedUploadTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.candidat = create_candidat()
+        self.client = client_for(self.candidat)
+
+    def create_session(self, total_size):
+        response = self.client.post(
+            '/api/uploads/', {'kind': 'cv', 'filename': 'cv.pdf', 'total_size': total_size}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def send(self, session_id, data, offset=0):
+        return self.client.generic(
+            'PATCH', f'/api/uploads/{session_id}/', data,
+            content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_complete_upload(self):
+        session_id = self.create_session(len(PDF))
+        response = self.send(session_id, PDF[:50])
+        self.assertEqual(response['Upload-Offset'], '50')
+        response = self.send(session_id, PDF[50:], offset=50)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['statut'], 'terminee')
+
+        job = create_job(create_recruteur())
+        response = self.client.post('/api/candidatures/', {'job': job.pk, 'cv_upload_id': session_id}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(UploadSession.objects.filter(pk=session_id).exists())
+        with Candidature.objects.get(pk=response.data['id']).cv.open('rb') as f:
+            self.assertEqual(f.read(), PDF)
+
+    def test_rejected_content_discards_session(self):
+        session_id = self.create_session(len(PDF))
+        response = self.send(session_id, b'MZ' + PDF[2:])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UploadSession.objects.filter(pk=session_id).exists())
+
+    def test_upload_error_keeps_session(self):
+        session_id = self.create_session(len(PDF))
+        self.send(session_id, PDF[:50])
+
+        response = self.send(session_id, PDF[50:], offset=10)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['offset'], 50)
+        response = self.send(session_id, PDF[50:] + b'0', offset=50)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response['Upload-Offset'], '50')
+        self.assertEqual(UploadSession.objects.get(pk=session_id).offset, 50)
+
+    def test_oversized_and_empty_chunks(self):
+        session_id = self.create_session(uploads.MAX_UPLOAD_SIZE)
+        with self.assertRaises(uploads.UploadError) as ctx:
+            uploads.append_chunk(session_id, io.BytesIO(), 0, uploads.MAX_CHUNK_SIZE + 1)
+        self.assertEqual(ctx.exception.status_code, 413)
+        self.assertNotIsInstance(ctx.exception, uploads.UploadRejected)
+        with self.assertRaises(uploads.UploadError):
+            uploads.append_chunk(session_id, io.BytesIO(), 0, 0)
+        self.assertTrue(UploadSession.objects.filter(pk=session_id).exists())
+
+
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.candidat = create_candidat()
+
+    def test_logout_revokes_cached_token(self):
+        client = client_for(self.candidat)
+        self.assertEqual(client.get('/api/auth/me/').status_code, 200)
+        self.assertEqual(len(token_cache), 1)
+        self.assertEqual(client.post('/api/auth/logout/').status_code, 204)
+        self.assertEqual(len(token_cache), 0)
+        self.assertEqual(client.get('/api/auth/me/').status_code, 401)
+
+    def test_deactivated_user_is_reloaded(self):
+        client = client_for(self.candidat)
+        self.assertEqual(client.get('/api/auth/me/').status_code, 200)
+        user = CustomUser.objects.get(pk=self.candidat.pk)
+        user.is_active = False
+        user.save()
+        self.assertEqual(client.get('/api/auth/me/').status_code, 401)
+
+    def test_shared_revocation(self):
+        # Deux workers : la révocation posée par l'un est vue par l'autre
+        token = Token.objects.create(user=self.candidat)
+        worker_a = TokenCache(shared=True)
+        worker_b = TokenCache(shared=True)
+        loaded = timezone.now().timestamp()
+        worker_b.set(token.key, self.candidat, token, loaded - 10)
+        self.assertIsNotNone(worker_b.get(token.key))
+        worker_a.invalidate_user(self.candidat.pk)
+        self.assertIsNone(worker_b.get(token.key))
+
+    def test_ttl(self):
+        token = Token.objects.create(user=self.candidat)
+        cache = TokenCache(ttl=0)
+        cache.set(token.key, self.candidat, token, 0)
+        self.assertIsNone(cache.get(token.key))
+
+
+class EventStreamTicketTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.recruteur = create_recruteur()
+
+    def test_ticket_requires_recruteur_token(self):
+        self.assertEqual(client_for(create_candidat()).post('/api/events/ticket/').status_code, 403)
+        response = client_for(self.recruteur).post('/api/events/ticket/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['expires_in'], STREAM_TICKET_MAX_AGE)
+
+    def test_token_in_query_string_is_refused(self):
+        key = Token.objects.create(user=self.recruteur).key
+        response = APIClient().get(f'/api/events/stream/?token={key}')
+        self.assertEqual(response.status_code, 401)
+
+
+class ThrottleTests(TestCase):
+    def setUp(self):
+        self.store = throttling.SharedThrottleStore(os.path.join(_tmp_dir, 'throttle-tests.sqlite3'))
+        self.store.clear()
+
+    def test_limit_and_wait(self):
+        for _ in range(3):
+            self.assertEqual(self.store.hit('k', 3, 60, now=120), (True, None))
+        allowed, wait = self.store.hit('k', 3, 60, now=150)
+        self.assertFalse(allowed)
+        self.assertEqual(wait, 30)
+        self.assertTrue(self.store.hit('autre', 3, 60, now=150)[0])
+
+    def test_sliding_window(self):
+        for _ in range(4):
+            self.store.hit('k', 4, 60, now=100)
+        # Début de fenêtre : la précédente compte encore presque entièrement
+        self.assertTrue(self.store.hit('k', 4, 60, now=121)[0])
+        self.assertFalse(self.store.hit('k', 4, 60, now=121)[0])
+        # Fin de fenêtre : elle ne compte presque plus
+        self.assertTrue(self.store.hit('k', 4, 60, now=179)[0])
+
+    def test_auth_scope(self):
+        throttling.get_store().clear()
+        client = APIClient()
+        credentials = {'email': 'inconnu@exemple.fr', 'password': 'x'}
+        statuses = [client.post('/api/auth/login/', credentials, format='json').status_code for _ in range(11)]
+        self.assertEqual(statuses[:10], [400] * 10)
+        self.assertEqual(statuses[10], 429)
+
+
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(routers, 'REPLICAS', ['replica'])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.router = routers.ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def route(self, request):
+        token = routers.start_request(request)
+        try:
+            return self.router.db_for_read(Job)
+        finally:
+            routers.finish_request(request, None, token)
+
+    def test_reads_on_replica_until_write(self):
+        request = self.factory.get('/api/jobs/', HTTP_AUTHORIZATION='Token abc')
+        token = routers.start_request(request)
+        # TestCase : transaction ouverte, lectures forcées sur la principale
+        with mock.patch.object(routers.connections['default'], 'in_atomic_block', False):
+            self.assertEqual(self.router.db_for_read(Job), 'replica')
+            self.router.db_for_write(Job)
+            self.assertEqual(self.router.db_for_read(Job), 'default')
+        routers.finish_request(request, None, token)
+
+        # Le client reste sur la principale pour relire ses écritures
+        with mock.patch.object(routers.connections['default'], 'in_atomic_block', False):
+            self.assertEqual(self.route(self.factory.get('/api/jobs/', HTTP_AUTHORIZATION='Token abc')), 'default')
+            self.assertEqual(self.route(self.factory.get('/api/jobs/', HTTP_AUTHORIZATION='Token xyz')), 'replica')
+
+    def test_unsafe_methods_use_primary(self):
+        with mock.patch.object(routers.connections['default'], 'in_atomic_block', False):
+            self.assertEqual(self.route(self.factory.post('/api/jobs/')), 'default')
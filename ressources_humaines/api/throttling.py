@@ -0,0 +1,149 @@
+"""
+Throttling partagé entre processus
+
+Les compteurs DRF par défaut vivent dans le cache mémoire de chaque worker :
+avec N workers la limite réelle est multipliée par N et tout est remis à zéro
+au redémarrage. Ici, les compteurs sont dans un fichier SQLite local en mode
+WAL, commun à tous les processus de la machine.
+
+Fenêtre glissante approchée par deux fenêtres fixes : la fenêtre précédente
+est pondérée par la part qui recouvre encore la fenêtre glissante.
+"""
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.throttling import AnonRateThrottle, ScopedRateThrottle, UserRateThrottle
+
+logger = logging.getLogger(__name__)
+
+BUSY_TIMEOUT_MS = 1000
+CLEANUP_PROBABILITY = 0.001
+
+
+class SharedThrottleStore:
+    """
+    Compteurs (clé, début de fenêtre) -> nombre de requêtes. Une connexion
+    par thread et par processus (les connexions ne survivent pas à un fork).
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        # Compteurs éphémères : pas de fsync à chaque écriture
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS throttle ('
+            ' key TEXT NOT NULL, window INTEGER NOT NULL, count INTEGER NOT NULL, expires INTEGER NOT NULL,'
+            ' PRIMARY KEY (key, window)) WITHOUT ROWID'
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def hit(self, key, limit, duration, now=None):
+        """
+        Enregistre une requête si la limite n'est pas atteinte.
+        Renvoie (autorisée, secondes à attendre sinon).
+        """
+        now = time.time() if now is None else now
+        window = int(now // duration) * duration
+        elapsed = now - window
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            counts = dict(conn.execute(
+                'SELECT window, count FROM throttle WHERE key = ? AND window IN (?, ?)',
+                (key, window, window - duration)
+            ).fetchall())
+            current = counts.get(window, 0)
+            previous = counts.get(window - duration, 0)
+            if previous * (duration - elapsed) / duration + current >= limit:
+                conn.execute('COMMIT')
+                if current >= limit:
+                    return False, window + duration - now
+                return False, max(0.0, duration * (1 - (limit - current) / previous) - elapsed)
+            conn.execute(
+                'INSERT INTO throttle (key, window, count, expires) VALUES (?, ?, 1, ?) '
+                'ON CONFLICT (key, window) DO UPDATE SET count = count + 1',
+                (key, window, window + 2 * duration)
+            )
+            if random.random() < CLEANUP_PROBABILITY:
+                conn.execute('DELETE FROM throttle WHERE expires < ?', (int(now),))
+            conn.execute('COMMIT')
+            return True, None
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def clear(self):
+        self._connection().execute('DELETE FROM throttle')
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SharedThrottleStore(settings.THROTTLE_DB_PATH)
+        return _store
+
+
+class SharedThrottleMixin:
+    """
+    Remplace le cache de SimpleRateThrottle par le store partagé. En cas
+    d'indisponibilité du store (verrou trop long...), la requête passe.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        try:
+            allowed, self._wait = get_store().hit(self.key, self.num_requests, self.duration)
+        except sqlite3.Error as e:
+            logger.warning("Throttling indisponible, requête autorisée: %s", e)
+            return True
+        return allowed
+
+    def wait(self):
+        return getattr(self, '_wait', None)
+
+
+class SharedAnonRateThrottle(SharedThrottleMixin, AnonRateThrottle):
+    pass
+
+
+class SharedUserRateThrottle(SharedThrottleMixin, UserRateThrottle):
+    pass
+
+
+class SharedScopedRateThrottle(SharedThrottleMixin, ScopedRateThrottle):
+    """
+    Limite par endpoint : la vue déclare `throttle_scope`, le taux est lu
+    dans DEFAULT_THROTTLE_RATES. Sans scope, aucune limite supplémentaire.
+    """
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
@@ -0,0 +1,105 @@
+"""
+Upload fractionné et reprenable des CV et lettres de motivation
+"""
+import logging
+import os
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .models import UploadSession
+
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # 5MB, même limite que CandidatureSerializer
+MAX_CHUNK_SIZE = 1024 * 1024  # 1MB par requête
+READ_SIZE = 64 * 1024
+ALLOWED_EXTENSIONS = {'pdf'}
+PDF_MAGIC = b'%PDF-'
+
+
+class UploadError(Exception):
+    """
+    Erreur de réception d'un fragment, porte le code HTTP à renvoyer
+    """
+
+    def __init__(self, detail, status_code=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+class UploadRejected(UploadError):
+    """
+    Contenu refusé : la session ne peut pas aboutir
+    """
+
+
+def part_path(session):
+    return default_storage.path(session.part_name)
+
+
+def append_chunk(session_id, stream, offset, length):
+    """
+    Écrit un fragment à la position `offset` du fichier partiel.
+
+    Le fichier est tronqué à l'offset enregistré avant écriture : un fragment
+    interrompu en cours de route est simplement renvoyé par le client.
+    """
+    if length <= 0:
+        raise UploadError('Fragment vide.')
+    if length > MAX_CHUNK_SIZE:
+        raise UploadError('Fragment trop volumineux (1MB maximum).', 413)
+
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session_id)
+
+        if session.statut == 'terminee':
+            raise UploadError('Upload déjà terminé.', 409)
+        if offset != session.offset:
+            raise UploadError(f'Offset attendu: {session.offset}.', 409)
+        if offset + length > session.total_size:
+            raise UploadError('Le fragment dépasse la taille annoncée.')
+
+        first = stream.read(min(READ_SIZE, length))
+        if offset == 0 and not first.startswith(PDF_MAGIC):
+            raise UploadRejected("Le fichier n'est pas un PDF valide.")
+
+        path = part_path(session)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        written = 0
+        with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+            f.seek(offset)
+            f.truncate()
+            data = first
+            while data:
+                f.write(data)
+                written += len(data)
+                if written >= length:
+                    break
+                data = stream.read(min(READ_SIZE, length - written))
+
+        session.offset = offset + written
+        if session.offset == session.total_size:
+            session.statut = 'terminee'
+        session.save(update_fields=['offset', 'statut', 'date_modification'])
+
+    return session
+
+
+def open_completed_upload(session):
+    """
+    Fichier Django prêt à être affecté à un FileField (copié par blocs au save)
+    """
+    return File(open(part_path(session), 'rb'), name=session.filename)
+
+
+def discard_upload(session):
+    try:
+        os.remove(part_path(session))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning("Suppression du fichier partiel %s impossible: %s", session.pk, e)
+    session.delete()
@@ -2,8 +2,10 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     UserViewSet, CandidatViewSet, RecruteurViewSet, CandidatureViewSet, JobViewSet,
+    UploadSessionViewSet,
     CandidatRegisterView, RecruteurRegisterView,
-    LoginView, LogoutView, MeView, admin_dashboard_stats
+    LoginView, LogoutView, MeView, admin_dashboard_stats, recruteur_event_stream, event_stream_ticket,
+    analytics_timeseries, entreprise_par_siret, recherche_entreprises, profiling_recent
 )
 
 router = DefaultRouter()
@@ -12,6 +14,7 @@ router.register(r'candidats', CandidatViewSet, basename='candidat')
 router.register(r'recruteurs', RecruteurViewSet, basename='recruteur')
 router.register(r'candidatures', CandidatureViewSet, basename='candidature')
 router.register(r'jobs', JobViewSet, basename='job')
+router.register(r'uploads', UploadSessionViewSet, basename='upload')
 
 urlpatterns = [
     path('auth/register/candidat/', CandidatRegisterView.as_view(), name='register-candidat'),
@@ -20,6 +23,12 @@ urlpatterns = [
     path('auth/logout/', LogoutView.as_view(), name='logout'),
     path('auth/me/', MeView.as_view(), name='me'),
     path('admin/dashboard/stats/', admin_dashboard_stats, name='admin-dashboard-stats'),
+    path('admin/profiling/', profiling_recent, name='admin-profiling'),
+    path('events/stream/', recruteur_event_stream, name='event-stream'),
+    path('events/ticket/', event_stream_ticket, name='event-stream-ticket'),
+    path('analytics/timeseries/', analytics_timeseries, name='analytics-timeseries'),
+    path('entreprises/recherche/', recherche_entreprises, name='entreprises-recherche'),
+    path('entreprises/siret/<str:siret>/', entreprise_par_siret, name='entreprise-siret'),
 ]
 
 urlpatterns += router.urls
\ No newline at end of file
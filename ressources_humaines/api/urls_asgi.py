@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import jobs_publiques_async, job_detail_async, me_async
+
+# Prioritaires sur api.urls sous ASGI (mêmes chemins)
+urlpatterns = [
+    path('jobs/publiques/', jobs_publiques_async, name='job-publiques-async'),
+    path('jobs/<int:pk>/', job_detail_async, name='job-detail-async'),
+    path('auth/me/', me_async, name='me-async'),
+]
@@ -0,0 +1,115 @@
+"""
+Comptage des vues et impressions d'offres
+
+Les incréments sont accumulés en mémoire puis écrits par lots toutes les
+FLUSH_INTERVAL secondes (UPDATE ... SET vues = vues + n, un par valeur de n),
+au lieu d'une écriture par requête.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+
+from .models import Job, DailyJobViews
+from .rollup import local_day
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 5.0  # secondes
+FIELDS = ('vues', 'impressions')
+
+_lock = threading.Lock()
+_buffer = {field: Counter() for field in FIELDS}
+_flusher = None
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is None or not _flusher.is_alive():
+        _flusher = threading.Thread(target=_flush_loop, name='job-views-flush', daemon=True)
+        _flusher.start()
+
+
+def _flush_safely():
+    try:
+        flush()
+    except Exception as e:
+        logger.error("Échec de l'écriture des compteurs de vues: %s", e)
+    finally:
+        connection.close()
+
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        _flush_safely()
+
+
+def record(field, job_ids):
+    with _lock:
+        _buffer[field].update(job_ids)
+        _ensure_flusher()
+
+
+def record_view(job_id):
+    record('vues', [job_id])
+
+
+def record_impressions(job_ids):
+    record('impressions', job_ids)
+
+
+def _group_by_increment(counter):
+    groups = defaultdict(list)
+    for job_id, n in counter.items():
+        groups[n].append(job_id)
+    return groups
+
+
+def _restore(pending):
+    # Incréments remis au tampon, réécrits au prochain passage
+    with _lock:
+        for field, counter in pending.items():
+            _buffer[field].update(counter)
+
+
+def flush():
+    """
+    Écrit le tampon en base. Les incréments identiques sont regroupés : le
+    nombre de requêtes dépend des valeurs distinctes, pas du nombre d'offres.
+    """
+    with _lock:
+        pending = {field: _buffer[field] for field in FIELDS if _buffer[field]}
+        for field in pending:
+            _buffer[field] = Counter()
+    if not pending:
+        return 0
+
+    day = local_day()
+    try:
+        # Tout ou rien : Job et DailyJobViews restent cohérents
+        with transaction.atomic():
+            # Offres supprimées depuis l'enregistrement de la vue ignorées
+            job_ids = set(
+                Job.objects.filter(pk__in=set().union(*pending.values())).values_list('pk', flat=True)
+            )
+            DailyJobViews.objects.bulk_create(
+                [DailyJobViews(job_id=job_id, date=day) for job_id in job_ids],
+                ignore_conflicts=True
+            )
+            for field, counter in pending.items():
+                for n, ids in _group_by_increment(counter).items():
+                    ids = [job_id for job_id in ids if job_id in job_ids]
+                    Job.objects.filter(pk__in=ids).update(**{field: F(field) + n})
+                    DailyJobViews.objects.filter(date=day, job_id__in=ids).update(**{field: F(field) + n})
+    except DatabaseError:
+        _restore(pending)
+        raise
+    return len(job_ids)
+
+
+atexit.register(_flush_safely)
@@ -1,24 +1,44 @@
+from django.conf import settings
 from django.contrib.auth import authenticate
 from django.core.exceptions import ValidationError
-from rest_framework import viewsets, permissions, generics, status
+from rest_framework import viewsets, permissions, generics, status, mixins, exceptions
 from rest_framework.response import Response
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes, throttle_classes, throttle_scope
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authtoken.models import Token
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.views.decorators.csrf import csrf_exempt
+from functools import wraps
 from django.db import IntegrityError
-from django.db.models import Count, Q, Avg
-from django.utils import timezone
-from datetime import datetime, timedelta
-from collections import defaultdict
+from django.db.models import Avg
+from django.http import HttpResponse, StreamingHttpResponse, JsonResponse
+import hmac
 import logging
 
 logger = logging.getLogger(__name__)
 
-from .models import CustomUser, Candidat, Recruteur, Candidature, Job
+from .models import CustomUser, Candidat, Recruteur, Candidature, Job, UploadSession
 from .serializers import (
     UserSerializer, CandidatSerializer, RecruteurSerializer, LoginSerializer, 
-    CandidatureSerializer, JobSerializer, CandidatureUpdateSerializer
+    CandidatureSerializer, JobSerializer, CandidatureUpdateSerializer, UploadSessionSerializer
 )
+from .streaming import stream_zip, candidature_cv_arcname, export_response, EXPORT_FORMATS
+from . import metrics, profiling, uploads, viewcounts
+from .stats import get_recruteur_stats, compute_admin_dashboard, TOP_COMPANIES_LIMIT
+from .events import stream_events, parse_last_event_id
+from .cache import stale_while_revalidate
+from .analytics import timeseries, parse_date, hiring_funnel
+from .authentication import (
+    get_profile, get_profile_for_update, aauthenticate, aauthenticate_ticket, aload_profile,
+    stream_ticket, CachedTokenAuthentication, STREAM_TICKET_MAX_AGE,
+)
+from .executors import run_blocking
+from .throttling import SharedAnonRateThrottle, SharedUserRateThrottle, SharedScopedRateThrottle
+from .sirene import get_index, clean_siret, siret_valide
 
 class IsAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -31,6 +51,11 @@ class IsRecruteurOrAdmin(permissions.BasePermission):
                 getattr(request.user, 'role', None) in ['admin', 'recruteur'])
 
 
+class IsRecruteur(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and getattr(request.user, 'role', None) == 'recruteur'
+
+
 class IsCandidatOwnerOrRecruteurOrAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user.is_authenticated:
@@ -136,7 +161,8 @@ class CandidatViewSet(viewsets.ModelViewSet):
         user = request.user
         if getattr(user, 'role', None) != 'candidat':
             return Response({'detail': 'Accès refusé.'}, status=status.HTTP_403_FORBIDDEN)
-        instance = Candidat.objects.filter(pk=user.pk).first()
+        # Lecture : profil du cache ; modification : profil relu en base
+        instance = get_profile(request) if request.method == 'GET' else get_profile_for_update(request)
         if not instance:
             return Response({'detail': 'Profil introuvable.'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -171,7 +197,8 @@ class RecruteurViewSet(viewsets.ModelViewSet):
         user = request.user
         if getattr(user, 'role', None) != 'recruteur':
             return Response({'detail': 'Accès refusé.'}, status=status.HTTP_403_FORBIDDEN)
-        instance = Recruteur.objects.filter(pk=user.pk).first()
+        # Lecture : profil du cache ; modification : profil relu en base
+        instance = get_profile(request) if request.method == 'GET' else get_profile_for_update(request)
         if not instance:
             return Response({'detail': 'Profil introuvable.'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -185,11 +212,24 @@ class RecruteurViewSet(viewsets.ModelViewSet):
         instance.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=False, methods=['get'], url_path='me/stats',
+            permission_classes=[IsAuthenticated])
+    def me_stats(self, request):
+        if getattr(request.user, 'role', None) != 'recruteur':
+            return Response({'detail': 'Accès refusé.'}, status=status.HTTP_403_FORBIDDEN)
+        return Response(get_recruteur_stats(request.user.pk))
+
+    @action(detail=True, methods=['get'])
+    def funnel(self, request, pk=None):
+        recruteur = self.get_object()
+        return Response(hiring_funnel(Job.objects.filter(recruteur=recruteur)))
+
 
 class CandidatRegisterView(generics.CreateAPIView):
     queryset = Candidat.objects.all()
     serializer_class = CandidatSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'auth'
 
     def create(self, request, *args, **kwargs):
         try:
@@ -216,6 +256,7 @@ class RecruteurRegisterView(generics.CreateAPIView):
     queryset = Recruteur.objects.all()
     serializer_class = RecruteurSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'auth'
 
     def create(self, request, *args, **kwargs):
 
@@ -264,6 +305,7 @@ class RecruteurRegisterView(generics.CreateAPIView):
 class LoginView(generics.GenericAPIView):
     serializer_class = LoginSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'auth'
 
     def post(self, request):
        
@@ -304,12 +346,9 @@ class MeView(generics.GenericAPIView):
         return UserSerializer
 
     def get_object(self):
-        user = self.request.user
-        if user.role == 'candidat':
-            return Candidat.objects.filter(pk=user.pk).first()
-        elif user.role == 'recruteur':
-            return Recruteur.objects.filter(pk=user.pk).first()
-        return user
+        if self.request.method in permissions.SAFE_METHODS:
+            return get_profile(self.request)
+        return get_profile_for_update(self.request)
 
     def get(self, request):
         obj = self.get_object()
@@ -379,8 +418,7 @@ class CandidatureViewSet(viewsets.ModelViewSet):
         return CandidatureSerializer
 
     def perform_create(self, serializer):
-        candidat = Candidat.objects.get(pk=self.request.user.pk)
-        serializer.save(candidat=candidat)
+        serializer.save(candidat=get_profile(self.request))
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -426,6 +464,36 @@ class CandidatureViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(candidatures, many=True)
         return Response(serializer.data)
     
+    export_columns = [
+        ('id', 'id'),
+        ('statut', 'statut'),
+        ('date_candidature', 'date_candidature'),
+        ('date_modification', 'date_modification'),
+        ('candidat_id', 'candidat_id'),
+        ('candidat_email', 'candidat__email'),
+        ('candidat_nom', 'candidat__last_name'),
+        ('candidat_prenom', 'candidat__first_name'),
+        ('job_id', 'job_id'),
+        ('job_titre', 'job__titre'),
+        ('type_contrat', 'job__type_contrat'),
+        ('entreprise', 'job__recruteur__nom_entreprise'),
+        ('overall_score', 'ai_analysis__overall_score'),
+        ('skill_score', 'ai_analysis__skill_score'),
+        ('experience_score', 'ai_analysis__experience_score'),
+        ('education_score', 'ai_analysis__education_score'),
+    ]
+
+    @action(detail=False, methods=['get'], permission_classes=[IsRecruteurOrAdmin])
+    def export(self, request):
+        output = request.query_params.get('output', 'csv')
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {'detail': 'Format invalide (csv ou ndjson).'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = self.get_queryset().order_by('pk')
+        return export_response(queryset, self.export_columns, output, 'candidatures')
+
     @action(detail=False, methods=['get'], permission_classes=[IsRecruteurOrAdmin])
     def with_ai_scores(self, request):
         user = request.user
@@ -504,7 +572,7 @@ class CandidatureViewSet(viewsets.ModelViewSet):
                         }
                     })
             except Exception as e:
-                logger.error(f"Erreur lors du traitement de la candidature {candidature.id}: {e}")
+                logger.error("Erreur lors du traitement de la candidature %s: %s", candidature.id, e)
                 continue
         
         # Trier par score global (meilleur en premier, puis par date)
@@ -523,6 +591,57 @@ class CandidatureViewSet(viewsets.ModelViewSet):
         })
 
 
+class IsCandidat(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and getattr(request.user, 'role', None) == 'candidat'
+
+
+class UploadSessionViewSet(mixins.CreateModelMixin,
+                           mixins.RetrieveModelMixin,
+                           mixins.DestroyModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    Upload fractionné : POST crée la session, PATCH ajoute un fragment brut
+    (en-tête Upload-Offset), GET renvoie l'offset pour reprendre.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsCandidat]
+    throttle_scope = 'uploads'
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(owner__pk=self.request.user.pk)
+
+    def perform_create(self, serializer):
+        serializer.save(owner=self.request.user)
+
+    def perform_destroy(self, instance):
+        uploads.discard_upload(instance)
+
+    def partial_update(self, request, *args, **kwargs):
+        session = self.get_object()
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return Response({'detail': 'En-tête Upload-Offset invalide.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            session = uploads.append_chunk(session.pk, request.stream, offset, length)
+        except uploads.UploadRejected as e:
+            # Contenu refusé : inutile de garder la session
+            uploads.discard_upload(session)
+            return Response({'detail': e.detail}, status=e.status_code)
+        except uploads.UploadError as e:
+            session.refresh_from_db()
+            response = Response({'detail': e.detail, 'offset': session.offset}, status=e.status_code)
+            response['Upload-Offset'] = session.offset
+            return response
+
+        response = Response(self.get_serializer(session).data)
+        response['Upload-Offset'] = session.offset
+        return response
+
+
 class JobViewSet(viewsets.ModelViewSet):
     serializer_class = JobSerializer
     permission_classes = [IsRecruteurOwnerOrAdmin]
@@ -531,17 +650,46 @@ class JobViewSet(viewsets.ModelViewSet):
         user = self.request.user
         user_role = getattr(user, 'role', None) if user.is_authenticated else None
         
+        # recruteur joint : les fragments absents du cache lisent son nom et son logo
+        jobs = Job.objects.select_related('recruteur')
         if user_role == 'admin':
-            return Job.objects.all()
+            return jobs.all()
         
         if user_role == 'recruteur':
-            return Job.objects.filter(recruteur__pk=user.pk)
+            return jobs.filter(recruteur__pk=user.pk)
         
-        return Job.objects.filter(active=True)
+        return jobs.filter(active=True)
 
     def perform_create(self, serializer):
-        recruteur = Recruteur.objects.get(pk=self.request.user.pk)
-        serializer.save(recruteur=recruteur)
+        serializer.save(recruteur=get_profile(self.request))
+
+    def perform_update(self, serializer):
+        # Sauvegarde partielle : les compteurs incrémentés entre-temps sont conservés
+        job = serializer.instance
+        for attr, value in serializer.validated_data.items():
+            setattr(job, attr, value)
+        job.save(update_fields=[
+            field.name for field in Job._meta.concrete_fields
+            if not field.primary_key and field.name not in Job.COUNTER_FIELDS
+        ])
+
+    def _counts_audience(self, request):
+        # Les consultations des recruteurs et admins ne sont pas comptées
+        return getattr(request.user, 'role', None) not in ['admin', 'recruteur']
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        if self._counts_audience(request):
+            viewcounts.record_view(response.data['id'])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if self._counts_audience(request):
+            data = response.data
+            results = data['results'] if isinstance(data, dict) else data
+            viewcounts.record_impressions([job['id'] for job in results])
+        return response
 
     @action(detail=True, methods=['get'], permission_classes=[IsRecruteurOrAdmin])
     def candidatures(self, request, pk=None):
@@ -558,13 +706,90 @@ class JobViewSet(viewsets.ModelViewSet):
         serializer = CandidatureSerializer(candidatures, many=True, context={'request': request})
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'], permission_classes=[IsRecruteurOrAdmin])
+    def funnel(self, request, pk=None):
+        job = self.get_object()
+        user_role = getattr(request.user, 'role', None)
+        
+        if user_role == 'recruteur' and job.recruteur.pk != request.user.pk:
+            return Response(
+                {'detail': 'Vous ne pouvez consulter que les statistiques de vos propres jobs.'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        return Response(hiring_funnel(Job.objects.filter(pk=job.pk)))
+
+    @action(detail=True, methods=['get'], url_path=r'candidatures/cvs\.zip',
+            url_name='candidatures-cvs', permission_classes=[IsRecruteurOrAdmin])
+    def candidatures_cvs(self, request, pk=None):
+        job = self.get_object()
+        user_role = getattr(request.user, 'role', None)
+        
+        if user_role == 'recruteur' and job.recruteur.pk != request.user.pk:
+            return Response(
+                {'detail': 'Vous ne pouvez télécharger que les CV de vos propres jobs.'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        # Itération par lots : les candidatures ne sont jamais toutes chargées
+        candidatures = (
+            job.candidatures
+            .select_related('candidat')
+            .only('id', 'cv', 'candidat__first_name', 'candidat__last_name', 'candidat__email')
+            .order_by('pk')
+            .iterator(chunk_size=200)
+        )
+        entries = (
+            (candidature_cv_arcname(candidature), candidature.cv)
+            for candidature in candidatures
+            if candidature.cv
+        )
+        
+        response = StreamingHttpResponse(stream_zip(entries), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="cvs_job_{job.pk}.zip"'
+        return response
+
+    export_columns = [
+        ('id', 'id'),
+        ('titre', 'titre'),
+        ('recruteur_id', 'recruteur_id'),
+        ('entreprise', 'recruteur__nom_entreprise'),
+        ('type_contrat', 'type_contrat'),
+        ('localisation', 'localisation'),
+        ('experience', 'experience'),
+        ('salaire_min', 'salaire_min'),
+        ('salaire_max', 'salaire_max'),
+        ('active', 'active'),
+        ('date_creation', 'date_creation'),
+        ('date_expiration', 'date_expiration'),
+        ('nombre_candidatures', 'nombre_candidatures'),
+        ('score_moyen', 'score_moyen'),
+    ]
+
+    @action(detail=False, methods=['get'], permission_classes=[IsRecruteurOrAdmin])
+    def export(self, request):
+        output = request.query_params.get('output', 'csv')
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {'detail': 'Format invalide (csv ou ndjson).'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = (
+            self.get_queryset()
+            .annotate(score_moyen=Avg('candidatures__ai_analysis__overall_score'))
+            .order_by('pk')
+        )
+        return export_response(queryset, self.export_columns, output, 'jobs')
+
     @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
     def publiques(self, request):
-        queryset = Job.objects.filter(active=True).order_by('-date_creation')
+        queryset = Job.objects.select_related('recruteur').filter(active=True).order_by('-date_creation')
         
         # Appliquer la pagination DRF
         page = self.paginate_queryset(queryset)
         if page is not None:
+            if self._counts_audience(request):
+                viewcounts.record_impressions([job.pk for job in page])
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
         
@@ -572,124 +797,318 @@ class JobViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+@api_view(['POST'])
+@permission_classes([IsRecruteur])
+def event_stream_ticket(request):
+    """
+    Ticket de courte durée pour ouvrir le flux SSE avec EventSource
+    (?ticket=...), qui ne permet pas d'envoyer l'en-tête Authorization
+    """
+    if not isinstance(request.auth, Token):
+        return Response({'detail': 'Authentification par token requise.'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'ticket': stream_ticket(request.auth), 'expires_in': STREAM_TICKET_MAX_AGE})
+
+
+async def recruteur_event_stream(request):
+    """
+    Flux SSE des événements du recruteur connecté (à servir via l'application
+    ASGI) : en-tête Token, session, ou ticket de event_stream_ticket
+    """
+    try:
+        ticket = request.GET.get('ticket')
+        if ticket:
+            request.user = await aauthenticate_ticket(ticket)
+        else:
+            await _async_initial(request, require_auth=True)
+    except exceptions.APIException as e:
+        return _async_api_error(e)
+    user = request.user
+    if user.role != 'recruteur':
+        return _json_response({'detail': 'Accès refusé.'}, status.HTTP_403_FORBIDDEN)
+
+    response = StreamingHttpResponse(
+        stream_events(user.pk, parse_last_event_id(request)),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+
+# Lectures fréquentes servies par des vues asynchrones sous ASGI
+# (ressources_humaines/urls_asgi.py) : la connexion d'un client lent n'occupe
+# pas de thread, le travail synchrone passe par le pool borné.
+
+def _json_response(data, status_code=status.HTTP_200_OK):
+    # Même encodage que le JSONRenderer de DRF
+    return JsonResponse(
+        data, status=status_code, safe=False,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')}
+    )
+
+
+def _async_api_error(exc):
+    response = _json_response({'detail': str(exc.detail)}, exc.status_code)
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response['WWW-Authenticate'] = CachedTokenAuthentication.keyword
+    if getattr(exc, 'wait', None) is not None:
+        response['Retry-After'] = '%d' % exc.wait
+    return response
+
+
+async def _async_initial(request, require_auth):
+    """
+    Authentification, permission et throttling comme APIView.initial().
+    Lève une APIException.
+    """
+    user = await aauthenticate(request)
+    if user is None:
+        # Comme SessionAuthentication : vues en lecture seule, pas de contrôle CSRF
+        user = await request.auser()
+        if not user.is_active:
+            user = AnonymousUser()
+    request.user = user
+    if require_auth and not request.user.is_authenticated:
+        raise exceptions.NotAuthenticated()
+    for throttle in (SharedAnonRateThrottle(), SharedUserRateThrottle()):
+        if not await run_blocking(throttle.allow_request, request, None):
+            raise exceptions.Throttled(throttle.wait())
+
+
+def _async_reads(sync_view):
+    """
+    Vue ASGI : GET traité par la vue asynchrone décorée, les autres méthodes
+    par la vue DRF d'origine (dans un thread)
+    """
+    sync_view = sync_to_async(sync_view)
+
+    def decorator(async_view):
+        @csrf_exempt
+        @wraps(async_view)
+        async def view(request, *args, **kwargs):
+            if request.method != 'GET':
+                return await sync_view(request, *args, **kwargs)
+            try:
+                return await async_view(request, *args, **kwargs)
+            except exceptions.APIException as e:
+                return _async_api_error(e)
+        return view
+    return decorator
+
+
+@_async_reads(JobViewSet.as_view({'get': 'publiques'}))
+async def jobs_publiques_async(request):
+    await _async_initial(request, require_auth=False)
+    queryset = Job.objects.select_related('recruteur').filter(active=True).order_by('-date_creation')
+
+    # Pagination de PageNumberPagination
+    page_size = api_settings.PAGE_SIZE
+    count = await queryset.acount()
+    last_page = max(1, -(-count // page_size))
+    page = request.GET.get('page') or '1'
+    page = last_page if page in PageNumberPagination.last_page_strings else page
+    if not str(page).isdigit() or not 1 <= int(page) <= last_page:
+        raise exceptions.NotFound(PageNumberPagination.invalid_page_message.format(
+            page_number=page, message=''
+        ))
+    page = int(page)
+    jobs = [job async for job in queryset[(page - 1) * page_size:page * page_size]]
+
+    if getattr(request.user, 'role', None) not in ['admin', 'recruteur']:
+        viewcounts.record_impressions([job.pk for job in jobs])
+    results = await run_blocking(lambda: JobSerializer(jobs, many=True, context={'request': request}).data)
+
+    url = request.build_absolute_uri()
+    if page == 1:
+        previous = None
+    elif page == 2:
+        previous = remove_query_param(url, 'page')
+    else:
+        previous = replace_query_param(url, 'page', page - 1)
+    return _json_response({
+        'count': count,
+        'next': replace_query_param(url, 'page', page + 1) if page < last_page else None,
+        'previous': previous,
+        'results': results,
+    })
+
+
+@_async_reads(JobViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}))
+async def job_detail_async(request, pk):
+    await _async_initial(request, require_auth=True)
+    user_role = getattr(request.user, 'role', None)
+
+    # Mêmes restrictions que JobViewSet.get_queryset
+    jobs = Job.objects.select_related('recruteur')
+    if user_role == 'recruteur':
+        jobs = jobs.filter(recruteur__pk=request.user.pk)
+    elif user_role != 'admin':
+        jobs = jobs.filter(active=True)
+    job = await jobs.filter(pk=pk).afirst()
+    if job is None:
+        # Message de get_object_or_404, comme la vue DRF
+        raise exceptions.NotFound(f'No {Job._meta.object_name} matches the given query.')
+
+    if user_role not in ['admin', 'recruteur']:
+        viewcounts.record_view(job.pk)
+    data = await run_blocking(lambda: JobSerializer(job, context={'request': request}).data)
+    return _json_response(data)
+
+
+@_async_reads(MeView.as_view())
+async def me_async(request):
+    await _async_initial(request, require_auth=True)
+    profile = await aload_profile(request.user)
+    if not profile:
+        return _json_response({'detail': 'Profil introuvable.'}, status.HTTP_404_NOT_FOUND)
+
+    serializer_class = {'candidat': CandidatSerializer, 'recruteur': RecruteurSerializer}.get(
+        request.user.role, UserSerializer
+    )
+    data = await run_blocking(lambda: serializer_class(profile, context={'request': request}).data)
+    return _json_response(data)
+
+def _admin_dashboard_cache_key(request):
+    params = request.query_params
+    return f"admin_dashboard_stats:{params.get('top_metric', 'applications')}:{params.get('top', '')}"
+
+
 @api_view(['GET'])
 @permission_classes([IsAdmin])
+@stale_while_revalidate(_admin_dashboard_cache_key, soft_ttl=60, hard_ttl=900)
 def admin_dashboard_stats(request):
+    params = request.query_params
+    top = params.get('top', str(TOP_COMPANIES_LIMIT))
+    if not top.isdigit():
+        return Response({'detail': 'Le paramètre top doit être un entier.'}, status=status.HTTP_400_BAD_REQUEST)
     try:
-        total_users = CustomUser.objects.count()
-        total_candidats = Candidat.objects.count()
-        total_entreprises = Recruteur.objects.count()
-        total_jobs = Job.objects.count()
-        total_applications = Candidature.objects.count()
-        active_jobs = Job.objects.filter(active=True).count()
-        inactive_jobs = Job.objects.filter(active=False).count()
-        
-        accepted_applications = Candidature.objects.filter(statut='acceptee').count()
-        rejected_applications = Candidature.objects.filter(statut='refusee').count()
-        pending_applications = Candidature.objects.filter(statut='en_attente').count()
-        
-        stats = {
-            'totalUsers': total_users,
-            'totalCandidats': total_candidats,
-            'totalEntreprises': total_entreprises,
-            'totalJobs': total_jobs,
-            'totalApplications': total_applications,
-            'acceptedApplications': accepted_applications,
-            'rejectedApplications': rejected_applications,
-            'pendingApplications': pending_applications,
-            'activeJobs': active_jobs,
-            'inactiveJobs': inactive_jobs,
-            'totalViews': total_applications * 3 
-        }
-        
-        today = timezone.now()
-        user_growth = []
-        months = ["Jan", "Fév", "Mar", "Avr", "Mai", "Jun", "Jul", "Aoû", "Sep", "Oct", "Nov", "Déc"]
-        
-        for i in range(12):
-            start_date = today.replace(day=1) - timedelta(days=30*i)
-            end_date = start_date.replace(day=28) + timedelta(days=4)
-            end_date = end_date - timedelta(days=end_date.day)
-            
-            candidats = Candidat.objects.filter(date_joined__range=[start_date, end_date]).count()
-            entreprises = Recruteur.objects.filter(date_joined__range=[start_date, end_date]).count()
-            
-            user_growth.insert(0, {
-                'month': months[start_date.month - 1],
-                'candidats': candidats,
-                'entreprises': entreprises,
-                'total': candidats + entreprises
-            })
-        
-        application_status = [
-            {'name': 'En attente', 'value': pending_applications, 'color': '#f59e0b'},
-            {'name': 'Refusées', 'value': rejected_applications, 'color': '#ef4444'},
-            {'name': 'Acceptées', 'value': accepted_applications, 'color': '#10b981'}
-        ]
-        
-        contracts = Job.objects.values('type_contrat').annotate(count=Count('id')).order_by('-count')
-        total_contracts = sum(item['count'] for item in contracts)
-        
-        jobs_by_contract = []
-        for contract in contracts:
-            percentage = round((contract['count'] / total_contracts) * 100) if total_contracts > 0 else 0
-            jobs_by_contract.append({
-                'contract': contract['type_contrat'],
-                'count': contract['count'],
-                'percentage': percentage
-            })
-        
-        monthly_activity = []
-        for i in range(6):
-            start_date = today.replace(day=1) - timedelta(days=30*i)
-            end_date = start_date.replace(day=28) + timedelta(days=4)
-            end_date = end_date - timedelta(days=end_date.day)
-            
-            applications = Candidature.objects.filter(date_candidature__range=[start_date, end_date]).count()
-            jobs_created = Job.objects.filter(date_creation__range=[start_date, end_date]).count()
-            new_users = CustomUser.objects.filter(date_joined__range=[start_date, end_date]).count()
-            
-            monthly_activity.insert(0, {
-                'month': months[start_date.month - 1],
-                'applications': applications,
-                'jobsCreated': jobs_created,
-                'newUsers': new_users
-            })
-        
-        top_companies_data = (
-            Recruteur.objects
-            .annotate(
-                jobs_count=Count('jobs'),
-                applications_received=Count('jobs__candidatures')
-            )
-            .filter(jobs_count__gt=0)
-            .order_by('-applications_received')[:5]
+        payload = compute_admin_dashboard(
+            top_metric=params.get('top_metric', 'applications'),
+            top_limit=int(top),
         )
+        return Response(payload, status=status.HTTP_200_OK)
         
-        top_companies = []
-        for company in top_companies_data:
-            avg_views = company.applications_received * 5 
-            top_companies.append({
-                'company': company.nom_entreprise,
-                'jobsCount': company.jobs_count,
-                'applicationsReceived': company.applications_received,
-                'averageViews': avg_views
-            })
-        
-        dashboard_data = {
-            'stats': stats,
-            'userGrowth': user_growth,
-            'applicationStatus': application_status,
-            'jobsByContract': jobs_by_contract,
-            'monthlyActivity': monthly_activity,
-            'topCompanies': top_companies
-        }
-        
-        return Response(dashboard_data, status=status.HTTP_200_OK)
-        
+    except ValueError as e:
+        return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
-        logger.error(f"Erreur dans admin_dashboard_stats: {str(e)}")
+        logger.error("Erreur dans admin_dashboard_stats: %s", e)
         return Response(
             {'detail': 'Erreur lors de la récupération des statistiques'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+TIMESERIES_PARAMS = ['metric', 'granularity', 'start', 'end', 'recruteur', 'type_contrat']
+
+
+def _timeseries_scope(request):
+    # Un recruteur ne voit que ses propres données, quel que soit le paramètre
+    if getattr(request.user, 'role', None) == 'recruteur':
+        return request.user.pk
+    return request.query_params.get('recruteur') or None
+
+
+def _timeseries_cache_key(request):
+    params = {name: request.query_params.get(name, '') for name in TIMESERIES_PARAMS}
+    params['recruteur'] = _timeseries_scope(request) or ''
+    return 'timeseries:' + '&'.join(f'{name}={params[name]}' for name in TIMESERIES_PARAMS)
+
+
+@api_view(['GET'])
+@permission_classes([IsRecruteurOrAdmin])
+@stale_while_revalidate(_timeseries_cache_key, soft_ttl=300, hard_ttl=3600)
+def analytics_timeseries(request):
+    params = request.query_params
+    try:
+        recruteur_id = _timeseries_scope(request)
+        buckets = timeseries(
+            metric=params.get('metric', ''),
+            granularity=params.get('granularity', 'day'),
+            start=parse_date(params.get('start'), None),
+            end=parse_date(params.get('end'), None),
+            recruteur_id=int(recruteur_id) if recruteur_id is not None else None,
+            type_contrat=params.get('type_contrat') or None,
+        )
+    except ValueError as e:
+        return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'metric': params.get('metric'),
+        'granularity': params.get('granularity', 'day'),
+        'start': buckets[0][0] if buckets else None,
+        'end': buckets[-1][0] if buckets else None,
+        'buckets': [{'date': day, 'value': value} for day, value in buckets],
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def profiling_recent(request):
+    """
+    Dernières requêtes profilées par ce processus (PROFILING_ENABLED)
+    """
+    if not settings.PROFILING_ENABLED:
+        return Response({'detail': 'Profilage désactivé (PROFILING=1).'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(profiling.recent())
+
+
+def metrics_view(request):
+    """
+    Métriques au format Prometheus (hors DRF : ni throttling ni token DRF).
+    Si METRICS_TOKEN est défini, il est exigé dans l'en-tête
+    Authorization: Bearer <token>.
+    """
+    if not settings.METRICS_ENABLED:
+        return HttpResponse(status=404)
+    expected = settings.METRICS_TOKEN
+    if expected and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {expected}'):
+        return HttpResponse(status=401, headers={'WWW-Authenticate': 'Bearer'})
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+def _sirene_index_or_503():
+    index = get_index()
+    if index is None:
+        return None, Response(
+            {'detail': "L'annuaire des entreprises n'est pas disponible."},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    return index, None
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+@throttle_classes([SharedScopedRateThrottle])
+@throttle_scope('entreprises')
+def entreprise_par_siret(request, siret):
+    """
+    Pré-remplissage de l'inscription recruteur à partir du SIRET
+    """
+    siret = clean_siret(siret)
+    if not siret_valide(siret):
+        return Response({'detail': 'SIRET invalide.'}, status=status.HTTP_400_BAD_REQUEST)
+    index, error = _sirene_index_or_503()
+    if error:
+        return error
+    entreprise = index.lookup(siret)
+    if entreprise is None:
+        return Response({'detail': 'Établissement introuvable.'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(entreprise)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+@throttle_classes([SharedScopedRateThrottle])
+@throttle_scope('entreprises')
+def recherche_entreprises(request):
+    """
+    Autocomplétion du nom d'entreprise (préfixe, sans accents ni casse)
+    """
+    query = request.query_params.get('q', '')
+    if len(query.strip()) < 2:
+        return Response({'detail': 'Au moins 2 caractères sont requis.'}, status=status.HTTP_400_BAD_REQUEST)
+    index, error = _sirene_index_or_503()
+    if error:
+        return error
+    return Response(index.search(query))
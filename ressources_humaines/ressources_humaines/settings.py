@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -44,6 +47,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestIdMiddleware',
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.ProfilingMiddleware',
+    'api.middleware.AsgiRoutesMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -58,7 +66,7 @@ AUTH_USER_MODEL = 'api.CustomUser'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -67,15 +75,45 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'api.throttling.SharedAnonRateThrottle',
+        'api.throttling.SharedUserRateThrottle',
+        'api.throttling.SharedScopedRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',
-        'user': '1000/hour'
+        'user': '1000/hour',
+        # Par endpoint (attribut throttle_scope des vues)
+        'auth': '10/min',
+        'uploads': '600/hour',
+        # Autocomplétion de l'inscription : hors du quota anonyme du formulaire
+        'entreprises': '300/hour',
     }
 }
 
+# Compteurs de throttling partagés entre les workers (SQLite en mode WAL)
+THROTTLE_DB_PATH = BASE_DIR / 'throttle.sqlite3'
+
+# Cache token -> utilisateur de l'authentification (par processus)
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_TTL = 30  # secondes
+
+# Profilage par requête (api.profiling) : en-tête Server-Timing, échantillon
+# consultable sur /api/admin/profiling/, cProfile à la demande (X-Profile: 1, admins)
+PROFILING_ENABLED = os.getenv('PROFILING') == '1'
+PROFILING_SAMPLE_RATE = 0.1
+PROFILING_BUFFER_SIZE = 200
+PROFILING_DUMP_DIR = BASE_DIR / 'profiles'
+
+# Métriques Prometheus (/metrics, api.metrics) : séries de chaque worker
+# recopiées dans un fichier SQLite commun. METRICS_TOKEN : jeton exigé du scraper
+METRICS_ENABLED = os.getenv('METRICS', '1') == '1'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+METRICS_DB_PATH = BASE_DIR / 'metrics.sqlite3'
+METRICS_FLUSH_INTERVAL = 5  # secondes
+
+# Index local des établissements (manage.py build_sirene_index)
+SIRENE_INDEX_PATH = BASE_DIR / 'data' / 'sirene.idx'
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
@@ -99,26 +137,24 @@ CORS_ALLOWED_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'x-request-id',
+    'x-profile',
 ]
+CORS_EXPOSE_HEADERS = ['Age', 'X-Cache', 'X-Request-ID', 'Server-Timing', 'X-Profile-Dump']
 
-# Configuration des logs pour le debug
+# Logs JSON écrits par un thread dédié (api.logs), corrélés par X-Request-ID
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
-    'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
-            'style': '{',
-        },
-        'simple': {
-            'format': '{levelname} {message}',
-            'style': '{',
-        },
-    },
     'handlers': {
         'console': {
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            'class': 'api.logs.QueueJsonHandler',
+            # Part des messages INFO/DEBUG conservée pour les chemins fréquents
+            # (une analyse IA par candidature) ; avertissements et erreurs gardés
+            'sampling': {
+                'api.signals': 0.1,
+            },
         },
     },
     'root': {
@@ -133,7 +169,7 @@ LOGGING = {
         },
         'api': {
             'handlers': ['console'],
-            'level': 'DEBUG',
+            'level': LOG_LEVEL,
             'propagate': False,
         },
     },
@@ -158,16 +194,127 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'ressources_humaines.wsgi.application'
 
+# Sous ASGI, routes des lectures fréquentes servies par des vues asynchrones
+ASGI_URLCONF = 'ressources_humaines.urls_asgi'
+# Threads du pool des appels synchrones des vues asynchrones (api.executors)
+ASYNC_BLOCKING_WORKERS = int(os.getenv('ASYNC_BLOCKING_WORKERS', '8'))
+# Analyses IA traitées en parallèle en arrière-plan
+AI_ANALYSIS_WORKERS = 2
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Profil choisi par DB_PROFILE :
+# - sqlite (défaut) : WAL, attente des verrous, transactions IMMEDIATE ;
+# - sqlite-basic : configuration Django par défaut (comparaison) ;
+# - postgres : connexions persistantes vérifiées, ou pool si DB_POOL_MAX_SIZE.
+DB_PROFILE = os.getenv('DB_PROFILE', 'sqlite')
+
+if DB_PROFILE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'ressources_humaines'),
+            'USER': os.getenv('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
+            'PORT': os.getenv('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': 5,
+            },
+        }
     }
-}
+    if os.getenv('DB_POOL_MAX_SIZE'):
+        # Pool psycopg (psycopg[pool]) : incompatible avec CONN_MAX_AGE
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE')),
+            'timeout': 10,
+        }
+elif DB_PROFILE == 'sqlite-basic':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+elif DB_PROFILE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Attente d'un verrou en écriture avant "database is locked" (secondes)
+                'timeout': 20,
+                # Verrou d'écriture pris dès BEGIN : évite l'échec immédiat lors du
+                # passage lecture -> écriture d'une transaction
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA cache_size=-20000;'
+                    'PRAGMA temp_store=MEMORY;'
+                    'PRAGMA mmap_size=134217728;'
+                ),
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"DB_PROFILE inconnu: {DB_PROFILE} (sqlite, sqlite-basic ou postgres)")
+
+# Réplicas en lecture (api.routers.ReplicaRouter) :
+# - postgres : POSTGRES_REPLICA_HOSTS=hôte1,hôte2 (mêmes identifiants) ;
+# - sqlite : SQLITE_REPLICA_PATH, ouvert en lecture seule (en local, le
+#   chemin de la base principale suffit pour tester le routage).
+DATABASE_REPLICAS = []
+if DB_PROFILE == 'postgres':
+    for i, host in enumerate(filter(None, os.getenv('POSTGRES_REPLICA_HOSTS', '').split(',')), start=1):
+        DATABASES[f'replica{i}'] = {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
+        DATABASE_REPLICAS.append(f'replica{i}')
+elif os.getenv('SQLITE_REPLICA_PATH'):
+    replica_options = dict(DATABASES['default'].get('OPTIONS', {}))
+    replica_options.pop('transaction_mode', None)
+    replica_options['init_command'] = replica_options.get('init_command', '') + 'PRAGMA query_only=ON;'
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('SQLITE_REPLICA_PATH'),
+        'OPTIONS': replica_options,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append('replica')
+
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+# Durée pendant laquelle un client reste sur la base principale après une écriture
+REPLICA_STICKY_SECONDS = 10
+
+# Cache par défaut : Redis si REDIS_URL (partagé par les workers), sinon
+# mémoire locale à chaque processus. Les caches qui doivent être invalidés
+# dans tous les workers ne sont actifs qu'avec un cache partagé.
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+CACHE_SHARED = bool(REDIS_URL)
+if DATABASE_REPLICAS and not CACHE_SHARED:
+    # Le maintien sur la base principale après une écriture doit être vu par tous les workers
+    raise ImproperlyConfigured('Les réplicas en lecture exigent un cache partagé (REDIS_URL)')
+# Représentations sérialisées des offres et recruteurs (api.serializer_cache)
+SERIALIZER_CACHE_ENABLED = CACHE_SHARED
 
 
 # Password validation
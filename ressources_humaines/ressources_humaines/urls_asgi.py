@@ -0,0 +1,8 @@
+from django.urls import path, include
+from .urls import urlpatterns as wsgi_urlpatterns
+
+# Routes de l'application ASGI (ASGI_URLCONF) : vues asynchrones, puis les
+# mêmes routes que sous WSGI
+urlpatterns = [
+    path('api/', include('api.urls_asgi')),
+] + wsgi_urlpatterns